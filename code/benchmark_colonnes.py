@@ -0,0 +1,68 @@
+"""
+Benchmark Colonnes
+"""
+
+import csv
+import time
+import random
+import string
+import tempfile
+from pathlib import Path
+
+import index_annuaire
+import colonnes_annuaire
+
+"""
+Compare, sur un gros annuaire généré, la recherche d'un terme court (sans trigramme utilisable)
+ligne par ligne et colonne par colonne (colonnes_annuaire, avec NumPy s'il est installé).
+
+Utilisation : python benchmark_colonnes.py [nombre_de_contacts]
+"""
+
+def generer_annuaire(path, nb_contacts):
+    """
+    Écrit un annuaire de 'nb_contacts' contacts aléatoires.
+    """
+    aleatoire = random.Random(42)
+    def mot(taille):
+        return "".join(aleatoire.choices(string.ascii_lowercase, k=taille))
+    with open(path, "w", newline="", encoding="utf-8") as fichier:
+        writer = csv.writer(fichier)
+        writer.writerow(index_annuaire.CHAMPS_RECHERCHE)
+        for _ in range(nb_contacts):
+            writer.writerow([mot(8).upper(), mot(6).capitalize(), "06" + "".join(aleatoire.choices(string.digits, k=8)),
+                             f"{aleatoire.randint(1, 99)} rue {mot(7)}", f"{mot(5)}@{mot(4)}.fr"])
+
+def chronometrer(fonction, repetitions=5):
+    """
+    Renvoie le meilleur temps (en secondes) sur plusieurs exécutions, et le dernier résultat.
+    """
+    meilleur, resultat = None, None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        duree = time.perf_counter() - debut
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur, resultat
+
+def main(nb_contacts=200000):
+    with tempfile.TemporaryDirectory() as dossier:
+        path = Path(dossier) / "annuaire_bench.csv"
+        generer_annuaire(path, nb_contacts)
+        entree = index_annuaire.charger(path)
+        minuscules = entree["minuscules"]
+        colonnes_annuaire.colonnes_de(entree) # Construction des colonnes hors chronométrage
+
+        print(f"Annuaire de {nb_contacts} contacts - moteur : {'NumPy' if colonnes_annuaire.numpy else 'bibliothèque standard'}")
+        for terme in ["zq", "x", "@ab"]:
+            duree_lignes, lignes = chronometrer(
+                lambda: [identifiant for identifiant, ligne in minuscules.items() if any(terme in champ for champ in ligne)])
+            duree_colonnes, colonnes = chronometrer(lambda: colonnes_annuaire.lignes_contenant(entree, terme))
+            assert lignes == colonnes
+            print(f"  '{terme}' : {len(lignes)} contacts | ligne par ligne {duree_lignes * 1000:.1f} ms | "
+                  f"colonnes {duree_colonnes * 1000:.1f} ms | x{duree_lignes / max(duree_colonnes, 1e-9):.1f}")
+        index_annuaire.oublier(path)
+
+if __name__ == "__main__":
+    import sys
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
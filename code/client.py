@@ -3,6 +3,8 @@ Client
 """
 
 import re
+import sys
+import csv
 import time
 import mes_fonctions
 from hashlib import sha512
@@ -14,6 +16,7 @@ Présentation des "status" :
     Succès :
         - 200 (Succès) : Connexion réussie, contact ajouté, liste de contacts récupérée.
         - 201 (Créé) : Uniquement lors de la Création de Compte.
+        - 304 (Non Modifié) : LISTE_CONTACTS avec 'si_version' : l'annuaire n'a pas changé (voir lister_contacts).
         
     Erreur :
         - 400 (Mauvaise Requête) : L'utilisateur a oublié de taper le Nom ou le Prénom d'un contact, ou l'action demandée n'existe pas.
@@ -79,7 +82,106 @@ def menu_modif(prenom, nom, tel, adresse, mail):
                 print(f"exemple mail valide: {prenom.lower()}{nom.lower()}@gmail.com")
                 mail = mes_fonctions.test_valeur("Email")
     return {"Nom": nom, "Prenom": prenom, "Telephone": tel, "Adresse": adresse, "Email": mail}
+
+def lire_fichier_comptes(chemin):
+    """
+    Lit un fichier CSV d'utilisateurs à importer (colonnes : Nom, Mot_de_passe, Statut).
+    Les mots de passe sont hachés (SHA-512) ici, avant tout envoi au serveur.
+    La colonne Statut est optionnelle (par défaut : utilisateur).
+    
+    Args:
+        chemin (str): Chemin du fichier CSV.
+        
+    Returns:
+        list: Liste de dictionnaires {"nom", "mot_de_passe", "statut"} prêts pour CREATION_COMPTES_LOT.
+    """
+    comptes = []
+    with open(chemin, "r", encoding="utf-8") as fichier:
+        for ligne in csv.DictReader(fichier):
+            nom = (ligne.get("Nom") or "").strip()
+            mdp = (ligne.get("Mot_de_passe") or "").strip()
+            statut = (ligne.get("Statut") or "utilisateur").strip().lower()
+            comptes.append({
+                "nom": nom,
+                # Un mot de passe trop court est envoyé vide : le serveur refusera ce compte (400).
+                "mot_de_passe": sha512(mdp.encode()).hexdigest() if len(mdp) >= 5 else "",
+                "statut": statut
+            })
+    return comptes
+    
+def menu_partage(choix, utilisateur, beneficiaires):
+    """
+    Sous-menu de partage étendu : donner/retirer l'accès à un groupe entier (choix "3")
+    ou rendre son annuaire public/privé (choix "4").
     
+    Args:
+        choix (str): "3" (groupe) ou "4" (public).
+        utilisateur (str): L'utilisateur connecté (propriétaire de l'annuaire).
+        beneficiaires (list): Résultat de LISTE_DROIT ("@groupe" pour les groupes, "*" si public).
+    """
+    if choix == "4":
+        est_public = "*" in beneficiaires
+        print(f"Votre annuaire est actuellement {'PUBLIC' if est_public else 'PRIVÉ'}.")
+        confirm = input(f"Le rendre {'privé' if est_public else 'public'} ? [O/N] : ").strip().lower()
+        if confirm == "o":
+            action = "retirer" if est_public else "donner"
+            reponse = reseau.envoyer_PDU("GERER_PERMISSION", {"public": True, "type": action}, utilisateur)
+            print(reponse["message"])
+        else:
+            print("Action annulée.")
+        return
+
+    reponse = reseau.envoyer_PDU("LISTE_GROUPES", {}, utilisateur)
+    if reponse["status"] != 200:
+        print(reponse["message"])
+        return
+    groupes = [groupe["Groupe"] for groupe in reponse["donnee"]]
+    options = [f" - {groupe} {'(accès donné)' if '@' + groupe in beneficiaires else ''}" for groupe in groupes]
+    mes_fonctions.clear_console()
+    mes_fonctions.deco_console("--- PARTAGE AVEC UN GROUPE ---", 60, options, "Groupes existants :")
+    groupe = input("Groupe cible (Vide pour quitter): ").strip()
+    if groupe == "":
+        print("Action annulé, retour à l'Accueil")
+    elif groupe not in groupes:
+        print("La cible doit être un groupe existant")
+    else:
+        action = "retirer" if "@" + groupe in beneficiaires else "donner"
+        reponse = reseau.envoyer_PDU("GERER_PERMISSION", {"groupe_cible": groupe, "type": action}, utilisateur)
+        if reponse["status"] == 200:
+            print(f"Permission {'retiré' if action == 'retirer' else 'accordé'} au groupe {groupe}")
+        else:
+            print(reponse["message"])
+
+# Dernière liste reçue par annuaire : (cible, tri) -> (version, contacts). Vidé à la déconnexion.
+CACHE_CONTACTS = {}
+
+def lister_contacts(utilisateur, cible, tri="fichier"):
+    """
+    Demande la liste des contacts d'un annuaire (LISTE_CONTACTS) en joignant la version de la dernière liste reçue :
+    si l'annuaire n'a pas changé, le serveur répond 304 sans la liste, et celle du cache est utilisée.
+
+    Args:
+        utilisateur (str): L'utilisateur connecté.
+        cible (str): Propriétaire de l'annuaire.
+        tri (str): "fichier" ou "nom".
+
+    Returns:
+        dict: La réponse du serveur (un 304 est rendu comme un 200 avec la liste du cache).
+    """
+    cle = (cible, tri)
+    version, contacts = CACHE_CONTACTS.get(cle, (None, None))
+    corps = {"proprietaire_cible": cible, "tri": tri}
+    if version is not None:
+        corps["si_version"] = version
+    reponse = reseau.envoyer_PDU("LISTE_CONTACTS", corps, utilisateur)
+    if reponse["status"] == 304:
+        return {"status": 200, "message": reponse["message"], "donnee": [dict(contact) for contact in contacts]}
+    if reponse["status"] == 200:
+        CACHE_CONTACTS[cle] = (reponse.get("version"), [dict(contact) for contact in reponse["donnee"]])
+    else:
+        CACHE_CONTACTS.pop(cle, None)
+    return reponse
+
 def menu_principal():
     """
     Boucle principale de l'interface utilisateur (CLI).
@@ -118,6 +220,11 @@ def menu_principal():
                     print("\033[91mÉchec : Le serveur n'a pas ouvert la connexion.\033[0m")
         else: # 2. Si le serveur est en ligne, on nettoie la console pour afficher les menus.
             mes_fonctions.clear_console()
+            # Session fermée par le serveur (expirée, compte modifié, serveur redémarré) : retour à l'accueil.
+            if utilisateur and reseau.JETON_SESSION is None:
+                print("\033[93mSession expirée : veuillez vous reconnecter.\033[0m")
+                CACHE_CONTACTS.clear()
+                utilisateur = None
             # --- CAS A : L'UTILISATEUR N'EST PAS ENCORE IDENTIFIÉ ---
             if not utilisateur:
                 titre = "--- ACCUEIL ---"
@@ -137,10 +244,11 @@ def menu_principal():
                     mdp = sha512(getpass("Mot de passe : ").strip().encode()).hexdigest()
                     # Envoi du PDU "CONNEXION". Le serveur vérifiera le couple (nom, hash).
                     reponse = reseau.envoyer_PDU("CONNEXION", {"nom": nom, "mdp": mdp})
-                    # Si statut 200, on stocke le nom et le rôle (admin/user) pour la session.
+                    # Si statut 200, on stocke le nom, le rôle (admin/user) et le jeton de session.
                     if reponse["status"] == 200:
                         utilisateur = nom
                         role = reponse["role"]
+                        reseau.JETON_SESSION = reponse["jeton"] # Joint à chaque PDU : c'est lui qui nous identifie
                         print(f"Connecté: {utilisateur}")
                     else: print("Erreur:", reponse["message"])
             else: # --- CAS B : L'UTILISATEUR EST CONNECTÉ (MENU PRINCIPAL) ---
@@ -159,8 +267,11 @@ def menu_principal():
                 choix = input("Faite votre choix > ").strip()
                 # --- CHOIX 0 : DÉCONNEXION ---
                 if choix == "0":
-                    # On remet la variable de session à None. 
+                    # On ferme la session côté serveur, puis on remet la variable de session à None.
                     # Au prochain tour de boucle 'while', on retombera dans le CAS A (Login).
+                    reseau.envoyer_PDU("DECONNEXION", {}, utilisateur)
+                    reseau.JETON_SESSION = None
+                    CACHE_CONTACTS.clear()
                     utilisateur = None
                     print("Déconnexion...")
                 
@@ -180,8 +291,8 @@ def menu_principal():
                         mes_fonctions.deco_console(titre, taille, options_brutes, "Annuaire Consultable :")
                         # L'utilisateur choisit le propriétaire cible. Par défaut (Entrée vide) = lui-même.
                         cible = input("Propriétaire de l'annuaire (Vide pour le votre) : ").strip() or utilisateur
-                        # Étape 2 : On demande le contenu de l'annuaire ciblé.
-                        reponse = reseau.envoyer_PDU("LISTE_CONTACTS", {"proprietaire_cible": cible}, utilisateur)
+                        # Étape 2 : On demande le contenu de l'annuaire ciblé, trié par ordre alphabétique (Nom, Prénom).
+                        reponse = lister_contacts(utilisateur, cible, "nom")
                         if reponse["status"] == 200:
                             # Affichage itératif de chaque fiche contact reçue du serveur.
                             if reponse["donnee"] != []:
@@ -224,7 +335,7 @@ def menu_principal():
                             # Vérification préalable : Le contact existe-t-il déjà ?
                             # On télécharge l'annuaire complet pour vérifier localement.
                             existe = False
-                            reponse = reseau.envoyer_PDU("LISTE_CONTACTS", {"proprietaire_cible": utilisateur},utilisateur)
+                            reponse = lister_contacts(utilisateur, utilisateur)
                             if reponse["status"] == 200:
                                 for contact in reponse["donnee"]:
                                     if contact["Nom"] == nom and contact["Prenom"] == prenom:
@@ -285,7 +396,7 @@ def menu_principal():
                                 print("Annulation : Nom et Prénom obligatoires.")
                             else:
                                 existe = False
-                                reponse = reseau.envoyer_PDU("LISTE_CONTACTS", {"proprietaire_cible": utilisateur},utilisateur)
+                                reponse = lister_contacts(utilisateur, utilisateur)
                                 if reponse["status"] == 200:
                                     for contact in reponse["donnee"]:
                                         if contact["Nom"] == nom and contact["Prenom"] == prenom:
@@ -322,15 +433,35 @@ def menu_principal():
                         for personne in reponse["donnee"]:
                             options_brutes.append(f" - {personne}")
                         mes_fonctions.deco_console(titre, taille, options_brutes, "Annuaire Consultable :")
-                        cible = input("Dans l'annuaire de qui (Vide pour le votre) : ").strip() or utilisateur
+                        cible = input("Dans l'annuaire de qui (Vide pour le votre, '*' pour tous, '#' par numéro) : ").strip() or utilisateur
                         # Étape 2 : Saisie du mot-clé
-                        quelquun = input("Mot clé recherché : ").strip().lower()
-                        # Étape 3 : Envoi de la requête RECHERCHE.
-                        reponse = reseau.envoyer_PDU("RECHERCHE_CONTACT", {"proprietaire_cible": cible, "recherche": quelquun}, utilisateur)
+                        # Un mot terminé par '?' affiche des suggestions (AUTOCOMPLETE) puis redemande le mot-clé.
+                        quelquun = input("Mot clé recherché (terminez par '?' pour des suggestions) : ").strip().lower()
+                        while quelquun.endswith("?"):
+                            cible_suggestion = utilisateur if cible in ["*", "#"] else cible
+                            reponse = reseau.envoyer_PDU("AUTOCOMPLETE", {"prefixe": quelquun[:-1], "type": "contacts", "proprietaire_cible": cible_suggestion}, utilisateur)
+                            if reponse["status"] == 200:
+                                print("Suggestions : " + (", ".join(reponse["donnee"]) or "Aucune"))
+                            else:
+                                print(reponse["message"])
+                            quelquun = input("Mot clé recherché : ").strip().lower()
+                        # Étape 3 : Envoi de la requête RECHERCHE ('*' : une seule requête sur tous les annuaires consultables).
+                        if cible == "#":
+                            reponse = reseau.envoyer_PDU("RECHERCHE_TELEPHONE", {"telephone": quelquun}, utilisateur)
+                        elif cible == "*":
+                            reponse = reseau.envoyer_PDU("RECHERCHE_GLOBALE", {"recherche": quelquun}, utilisateur, timeout=20)
+                        else:
+                            reponse = reseau.envoyer_PDU("RECHERCHE_CONTACT", {"proprietaire_cible": cible, "recherche": quelquun}, utilisateur)
+                            # Aucun résultat exact : on retente en tolérant les fautes de frappe.
+                            if reponse["status"] == 200 and reponse["donnee"] == [] and quelquun != "":
+                                reponse = reseau.envoyer_PDU("RECHERCHE_CONTACT", {"proprietaire_cible": cible, "recherche": quelquun, "approximatif": True}, utilisateur)
+                                if reponse["status"] == 200 and reponse["donnee"] != []:
+                                    print("Aucun résultat exact. Vouliez-vous dire :")
                         if reponse["status"] == 200:
                             # Affichage des résultats trouvés
                             for element in reponse["donnee"]:
-                                print(f"\nTrouvé: {element["Prenom"]} {element["Nom"]}")
+                                origine = f" (annuaire de {element['Proprietaire']})" if "Proprietaire" in element else ""
+                                print(f"\nTrouvé: {element["Prenom"]} {element["Nom"]}{origine}")
                                 print("=" * taille)
                                 print(f"  > Numéro : {element["Telephone"]}")
                                 print(f"  > Adresse Postal : {element["Adresse"]}")
@@ -344,7 +475,9 @@ def menu_principal():
                     taille = 40
                     options = [
                         "1. Donner le droit d'accès",
-                        "2. Retirer le droit d'accès"
+                        "2. Retirer le droit d'accès",
+                        "3. Partager avec un groupe",
+                        "4. Annuaire public / privé"
                     ]
                     mes_fonctions.deco_console(titre, taille, options)
                     # Pour faire afficher les droits d'accès, on doit récupérer 3 listes :
@@ -382,32 +515,39 @@ def menu_principal():
                                 taille = 60
                                 options = []
                                 for option in utilisateur_avec_droit:
-                                    options.append(f" - {option}")
+                                    if option in tous_les_utilisateur: # Les groupes/public se retirent via '3' et '4'
+                                        options.append(f" - {option}")
                                 mes_fonctions.deco_console(titre, taille, options, "Les utilisateurs ayant accès à votre annuaire :")
                                 break
-                            else:
-                                print("Insèrez '1' pour Donner ou '2' pour Retirer l'accès")
-                                continue
-                        while True:
-                            cible = input("Utilisateur cible (Vide pour quitter): ").strip()
-                            if cible == "":
-                                print("Action annulé, retour à l'Accueil")
+                            elif choix in ["3", "4"]:
                                 break
-                            elif cible not in tous_les_utilisateur:
-                                print("La cible doit être un utilisateur existant")
-                                continue
                             else:
-                                break
-                        # Envoi de la demande au serveur
-                        if cible != "":
-                            reponse = reseau.envoyer_PDU("GERER_PERMISSION", {"utilisateur_cible": cible, "type": action}, utilisateur)
-                        if reponse["status"] == 200:
-                            if choix == "1" and cible != "":
-                                print(f"Permission accordé à {cible}")
-                            elif choix == "2" and cible != "":
-                                print(f"Permission retiré à {cible}")
+                                print("Insèrez '1' pour Donner, '2' pour Retirer, '3' pour un Groupe ou '4' pour Public")
+                                continue
+                        if choix in ["3", "4"]:
+                            # Partage avec un groupe ou public : une seule ligne de permission pour plusieurs utilisateurs.
+                            menu_partage(choix, utilisateur, utilisateur_avec_droit)
                         else:
-                            print(reponse["message"])
+                            while True:
+                                cible = input("Utilisateur cible (Vide pour quitter): ").strip()
+                                if cible == "":
+                                    print("Action annulé, retour à l'Accueil")
+                                    break
+                                elif cible not in tous_les_utilisateur:
+                                    print("La cible doit être un utilisateur existant")
+                                    continue
+                                else:
+                                    break
+                            # Envoi de la demande au serveur
+                            if cible != "":
+                                reponse = reseau.envoyer_PDU("GERER_PERMISSION", {"utilisateur_cible": cible, "type": action}, utilisateur)
+                            if reponse["status"] == 200:
+                                if choix == "1" and cible != "":
+                                    print(f"Permission accordé à {cible}")
+                                elif choix == "2" and cible != "":
+                                    print(f"Permission retiré à {cible}")
+                            else:
+                                print(reponse["message"])
                     else:
                         print(reponse["message"])
                 # --- CHOIX 5 : ADMINISTRATION SYSTÈME (Réservé Admin) ---
@@ -421,6 +561,10 @@ def menu_principal():
                             "2. Supprimer Compte",
                             "3. Modifier Compte",
                             "4. Lister Compte",
+                            "5. Importer Comptes (CSV)",
+                            "6. Gérer Groupes",
+                            "7. Métriques Serveur",
+                            "8. Profilage Serveur",
                             "0. Retour"
                         ]
                         mes_fonctions.deco_console(titre, taille, options)
@@ -564,7 +708,7 @@ def menu_principal():
                         elif choix_compte == "4":
                             mes_fonctions.clear_console()
                             # Appel de INFOS_ADMIN.
-                            reponse = reseau.envoyer_PDU("INFOS_ADMIN", {}, utilisateur)
+                            reponse = reseau.envoyer_PDU("INFOS_ADMIN", {}, utilisateur, timeout=30) # Relit tous les annuaires
                             
                             if reponse["status"] == 200:
                                 print("\033[92m" + f"{"=== LISTE GLOBALE DES COMPTES ===":^{80}}" + "\033[0m")
@@ -588,7 +732,7 @@ def menu_principal():
                                 print("Voir la liste complète des annuaires accessible d'un compte")
                                 cible_compte = input("Le compte de qui (vide pour annuler) : ")
                                 if cible_compte != "":
-                                    reponse = reseau.envoyer_PDU("LISTE_PROPRIO", {}, cible_compte)
+                                    reponse = reseau.envoyer_PDU("LISTE_PROPRIO", {"compte": cible_compte}, utilisateur)
                                     print(f"Cible : {cible_compte}")
                                     if reponse["status"] == 200 and reponse["donnee"] != []:
                                         for personne in reponse["donnee"]:
@@ -601,6 +745,149 @@ def menu_principal():
                                 print("Erreur lors de la récupération des données.")
                                 break
 
+                        # --- ADMIN 5 : IMPORT DE COMPTES EN MASSE ---
+                        elif choix_compte == "5":
+                            mes_fonctions.clear_console()
+                            print("=" * taille)
+                            print("\033[92m" + f"{"--- IMPORTER DES COMPTES ---":^{taille}}" + "\033[0m")
+                            print("=" * taille)
+                            print("Format attendu : Nom,Mot_de_passe,Statut (une ligne par compte)")
+                            chemin = input("Chemin du fichier CSV (vide pour annuler) : ").strip()
+                            if chemin == "":
+                                print("Annulation.")
+                            else:
+                                try:
+                                    comptes = lire_fichier_comptes(chemin)
+                                except (OSError, csv.Error) as e:
+                                    comptes = None
+                                    print(f"Lecture impossible : {e}")
+                                if comptes:
+                                    # Un seul PDU pour tout le fichier, le serveur renvoie le résultat compte par compte.
+                                    reponse = reseau.envoyer_PDU("CREATION_COMPTES_LOT", {"comptes": comptes}, utilisateur, timeout=30)
+                                    print(f"Résultat : {reponse['message']}")
+                                    for resultat in reponse.get("donnee", []):
+                                        if resultat["status"] != 201:
+                                            print(f"  - {resultat['nom']} : {resultat['message']}")
+                                elif comptes == []:
+                                    print("Le fichier ne contient aucun compte.")
+
+                        # --- ADMIN 6 : GROUPES DE PARTAGE ---
+                        elif choix_compte == "6":
+                            mes_fonctions.clear_console()
+                            reponse = reseau.envoyer_PDU("LISTE_GROUPES", {}, utilisateur)
+                            if reponse["status"] == 200:
+                                options = [f"{groupe['Groupe']} : {', '.join(groupe['Membres'])}" for groupe in reponse["donnee"]]
+                                mes_fonctions.deco_console("--- GROUPES ---", 60, options, "Groupe : Membres")
+                                print(" 1. Ajouter un membre")
+                                print(" 2. Retirer un membre")
+                                print(" 3. Supprimer un groupe")
+                                choix_groupe = input("\nFaites votre choix > ").strip()
+                                types = {"1": "ajouter", "2": "retirer", "3": "supprimer"}
+                                if choix_groupe in types:
+                                    groupe = mes_fonctions.test_valeur("Nom du groupe")
+                                    membre = mes_fonctions.test_valeur("Membre") if choix_groupe != "3" else None
+                                    reponse = reseau.envoyer_PDU("GERER_GROUPE", {"groupe": groupe, "membre": membre, "type": types[choix_groupe]}, utilisateur)
+                                    print(f"Résultat : {reponse['message']}")
+                                else:
+                                    print("Annulation.")
+                            else:
+                                print(reponse["message"])
+
+                        # --- ADMIN 7 : MÉTRIQUES DU SERVEUR ---
+                        elif choix_compte == "7":
+                            mes_fonctions.clear_console()
+                            reponse = reseau.envoyer_PDU("METRIQUES", {}, utilisateur)
+                            if reponse["status"] == 200:
+                                print("\033[92m" + f"{"=== MÉTRIQUES DES REQUÊTES ===":^{80}}" + "\033[0m")
+                                print("-" * 80)
+                                print(f"| {'Action':<20} | {'Nombre':>7} | {'Erreurs':>7} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'p99 (ms)':>9} |")
+                                print("-" * 80)
+                                # Les actions qui coûtent le plus de temps au serveur arrivent en premier.
+                                for ligne in reponse["donnee"]:
+                                    coul = "\033[91m" if ligne["Erreurs"] else ""
+                                    reset = "\033[0m" if ligne["Erreurs"] else ""
+                                    print(f"| {ligne['Action']:<20} | {ligne['Nombre']:>7} | {coul}{ligne['Erreurs']:>7}{reset} | "
+                                          f"{ligne['p50_ms']:>9.2f} | {ligne['p95_ms']:>9.2f} | {ligne['p99_ms']:>9.2f} |")
+                                print("-" * 80)
+                                erreurs = [f"{ligne['Action']} {ligne['Status']}" for ligne in reponse["donnee"] if ligne["Erreurs"]]
+                                if erreurs:
+                                    print("Réponses par code (actions en erreur) :")
+                                    for detail in erreurs:
+                                        print(f"  - {detail}")
+                                # Entrées/sorties fichier moyennes par requête (amplification des lectures/écritures).
+                                print("\n" + "-" * 80)
+                                print(f"| {'Action':<20} | {'Fichiers/req':>12} | {'Ko lus/req':>12} | {'Ko écrits/req':>12} | {'fsync':>8} |")
+                                print("-" * 80)
+                                for ligne in reponse["donnee"]:
+                                    es = ligne["ES_par_requete"]
+                                    print(f"| {ligne['Action']:<20} | {es['fichiers']:>12.1f} | {es['octets_lus'] / 1024:>12.1f} | "
+                                          f"{es['octets_ecrits'] / 1024:>12.1f} | {ligne['ES']['fsync']:>8} |")
+                                print("-" * 80)
+                                chemin = input("\nExporter au format Prometheus dans un fichier (vide pour ignorer) : ").strip()
+                                if chemin != "":
+                                    reponse = reseau.envoyer_PDU("METRIQUES", {"format": "prometheus"}, utilisateur)
+                                    if reponse["status"] == 200:
+                                        try:
+                                            with open(chemin, "w", encoding="utf-8") as f:
+                                                f.write(reponse["donnee"])
+                                            print(f"Métriques écrites dans '{chemin}'.")
+                                        except OSError as e:
+                                            print(f"Écriture impossible : {e}")
+                                    else:
+                                        print(reponse["message"])
+                            else:
+                                print(reponse["message"])
+
+                        # --- ADMIN 8 : PROFILAGE À LA DEMANDE ---
+                        elif choix_compte == "8":
+                            mes_fonctions.clear_console()
+                            reponse = reseau.envoyer_PDU("PROFILAGE", {"type": "etat"}, utilisateur)
+                            if reponse["status"] != 200:
+                                print(reponse["message"])
+                            else:
+                                etat = reponse["donnee"]
+                                if etat["En_cours"]:
+                                    en_cours = etat["En_cours"]
+                                    print(f"Profilage {en_cours['Outil']} en cours "
+                                          f"(requêtes restantes : {en_cours['Restant']}, secondes restantes : {en_cours['Secondes_restantes']})")
+                                options = ["1. Profiler le temps (cProfile)", "2. Profiler la mémoire (tracemalloc)",
+                                           "3. Voir le dernier résultat", "4. Arrêter le profilage en cours"]
+                                mes_fonctions.deco_console("--- PROFILAGE ---", 40, options)
+                                choix_profil = input("Faites votre choix > ").strip()
+                                if choix_profil in ["1", "2"]:
+                                    print("Limite : un nombre de requêtes, ou une durée suivie de 's' (ex: 50 ou 30s)")
+                                    limite = input("Limite > ").strip().lower()
+                                    corps = {"type": "demarrer", "outil": "cprofile" if choix_profil == "1" else "tracemalloc"}
+                                    try:
+                                        if limite.endswith("s"):
+                                            corps["duree"] = float(limite[:-1])
+                                        else:
+                                            corps["nb_requetes"] = int(limite)
+                                        reponse = reseau.envoyer_PDU("PROFILAGE", corps, utilisateur)
+                                        print(f"Résultat : {reponse['message']}")
+                                    except ValueError:
+                                        print("Limite invalide.")
+                                elif choix_profil in ["3", "4"]:
+                                    corps = {"type": "etat" if choix_profil == "3" else "arreter"}
+                                    reponse = reseau.envoyer_PDU("PROFILAGE", corps, utilisateur)
+                                    resultat = reponse.get("donnee", {}).get("Resultat")
+                                    if reponse["status"] != 200:
+                                        print(reponse["message"])
+                                    elif resultat is None:
+                                        print("Aucun profilage terminé pour l'instant.")
+                                    else:
+                                        print(f"Outil : {resultat['Outil']} | Fichiers : {', '.join(resultat['Fichiers'])}")
+                                        print("-" * 80)
+                                        for ligne in resultat["Top"]:
+                                            if resultat["Outil"] == "cprofile":
+                                                print(f"{ligne['Cumule_ms']:>10.2f} ms cumulés | {ligne['Propre_ms']:>10.2f} ms propres | "
+                                                      f"{ligne['Appels']:>6} appels | {ligne['Fonction']}")
+                                            else:
+                                                print(f"{ligne['Difference_ko']:>+10.1f} ko | {ligne['Blocs']:>+7} blocs | {ligne['Emplacement']}")
+                                        print("-" * 80)
+                                else:
+                                    print("Annulation.")
+
                         elif choix_compte == "0":
                             
                             break
@@ -610,4 +897,7 @@ def menu_principal():
         input("\nAppuyez sur Entrée pour continuer...")
 
 if __name__ == "__main__":
+    # python client.py --verbeux : affiche pour chaque requête son identifiant de trace et où est passé le temps
+    # (aller, attente dans la file du serveur, traitement, retour).
+    reseau.MODE_VERBEUX = "--verbeux" in sys.argv or "-v" in sys.argv
     menu_principal()
\ No newline at end of file
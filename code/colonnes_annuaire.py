@@ -0,0 +1,132 @@
+"""
+Colonnes Annuaire
+"""
+
+import itertools
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError: # NumPy est optionnel : sans lui, on balaye des chaînes concaténées (bibliothèque standard)
+    numpy = None
+
+"""
+Représentation en colonnes des gros annuaires, pour les recherches qui doivent regarder tous les contacts
+(terme de moins de 3 caractères, sans trigramme utilisable) et pour les comptages.
+
+Au lieu de parcourir les contacts un par un (un dictionnaire par ligne), chaque champ en minuscules est
+rangé dans une seule colonne :
+    - avec NumPy : un tableau de chaînes, balayé d'un coup par numpy.char.find ;
+    - sans NumPy : toutes les valeurs concaténées (séparées par SEPARATEUR) dans une seule chaîne,
+      balayée par str.find (boucle en C), les positions trouvées étant converties en numéro de ligne par dichotomie.
+
+Les colonnes sont construites à la demande à partir de l'entrée d'index (index_annuaire) et reconstruites
+quand sa version change (après une écriture du serveur).
+
+Structure :
+COLONNES = {
+    "donnee_serveur/annuaires/annuaire_X.csv": {
+        "version": 12,                          # Version de l'entrée d'index utilisée
+        "identifiants": [id, ...],              # Identifiant du contact de chaque ligne (ordre du fichier)
+        "textes": ["dupont\\x00martin...", ...], # Sans NumPy : une chaîne concaténée par champ
+        "debuts": [[0, 7, ...], ...],           # Sans NumPy : position de début de chaque ligne dans la chaîne
+        "tableaux": [array([...]), ...],        # Avec NumPy : un tableau par champ
+    }
+}
+"""
+
+# En dessous de ce nombre de contacts, la boucle ligne par ligne est déjà assez rapide
+SEUIL_COLONNES = 20000
+# Sépare les valeurs d'une colonne concaténée (ne doit apparaître ni dans les valeurs ni dans le terme)
+SEPARATEUR = "\x00"
+
+COLONNES = {}
+
+def construire(entree):
+    """
+    Construit les colonnes d'une entrée d'index (une par champ, dans l'ordre de 'minuscules').
+
+    Returns:
+        dict: Les colonnes, ou None si une valeur contient le séparateur (on reste alors en ligne par ligne).
+    """
+    identifiants = list(entree["contacts"])
+    champs = list(zip(*(entree["minuscules"][identifiant] for identifiant in identifiants)))
+    colonnes = {"version": entree["version"], "identifiants": identifiants}
+    if numpy is not None:
+        colonnes["tableaux"] = [numpy.array(valeurs, dtype=str) for valeurs in champs]
+        return colonnes
+
+    colonnes["textes"], colonnes["debuts"] = [], []
+    for valeurs in champs:
+        texte = SEPARATEUR.join(valeurs)
+        if texte.count(SEPARATEUR) != len(valeurs) - 1:
+            return None
+        colonnes["textes"].append(texte)
+        colonnes["debuts"].append([0] + list(itertools.accumulate(len(valeur) + 1 for valeur in valeurs[:-1])))
+    return colonnes
+
+def colonnes_de(entree):
+    """
+    Renvoie les colonnes à jour d'une entrée d'index (reconstruites si la version a changé), ou None.
+    """
+    colonnes = COLONNES.get(entree["chemin"])
+    if colonnes is None or colonnes["version"] != entree["version"]:
+        colonnes = construire(entree)
+        if colonnes is None:
+            COLONNES.pop(entree["chemin"], None)
+            return None
+        COLONNES[entree["chemin"]] = colonnes
+    return colonnes
+
+def positions_texte(texte, debuts, terme):
+    """
+    Numéros des lignes d'une colonne concaténée dont la valeur contient 'terme' (balayage par str.find).
+    Après chaque occurrence, on saute directement au début de la ligne suivante.
+    """
+    lignes = []
+    position = texte.find(terme)
+    while position != -1:
+        ligne = bisect_right(debuts, position) - 1
+        lignes.append(ligne)
+        if ligne + 1 >= len(debuts):
+            break
+        position = texte.find(terme, debuts[ligne + 1])
+    return lignes
+
+def lignes_contenant(entree, terme):
+    """
+    Renvoie les identifiants (ordre du fichier) des contacts dont au moins un champ contient 'terme',
+    en balayant les colonnes entières plutôt que les contacts un par un.
+
+    Args:
+        entree (dict): Entrée d'index de l'annuaire (index_annuaire).
+        terme (str): Terme recherché, non vide et déjà en minuscules.
+
+    Returns:
+        list: Les identifiants trouvés, ou None si la représentation en colonnes n'est pas utilisable.
+    """
+    if SEPARATEUR in terme:
+        return None
+    colonnes = colonnes_de(entree)
+    if colonnes is None:
+        return None
+    identifiants = colonnes["identifiants"]
+    if not identifiants:
+        return []
+
+    if numpy is not None:
+        masque = numpy.zeros(len(identifiants), dtype=bool)
+        for tableau in colonnes["tableaux"]:
+            masque |= numpy.char.find(tableau, terme) >= 0
+        return [identifiants[ligne] for ligne in numpy.flatnonzero(masque).tolist()]
+
+    lignes = set()
+    for texte, debuts in zip(colonnes["textes"], colonnes["debuts"]):
+        lignes.update(positions_texte(texte, debuts, terme))
+    return [identifiants[ligne] for ligne in sorted(lignes)]
+
+def oublier(chemin):
+    """
+    Supprime les colonnes d'un annuaire (ex: index retiré).
+    """
+    COLONNES.pop(str(chemin), None)
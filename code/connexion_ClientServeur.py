@@ -6,6 +6,8 @@ import os
 import csv
 import json
 import time
+import uuid
+import itertools
 from pathlib import Path
 from hashlib import sha512
 
@@ -22,12 +24,18 @@ Présentation des "status" :
         - 404 (Non Trouvé) : Utilisé si on cherche l'annuaire d'un utilisateur qui n'existe pas (le fichier .csv est introuvable).
         - 409 (Conflit) : Utilisé lors de la création de compte si le nom d'utilisateur existe déjà. On ne peut pas écraser un compte existant.
         - 500 (Erreur Interne) : Le fichier de réponse JSON est vide, illisible, ou le client n'est pas connecté via connecter_serveur().
+        - 503 (Indisponible) : Serveur hors ligne, ou surchargé (file d'attente pleine) : "reessayer_dans" donne le délai conseillé en secondes.
 
 Client -> Serveur (Requete) :
     PDU :
         {
             "action": "NOM_DE_L_ACTION",
             "demandeur": "Nom_Utilisateur_Connecté",
+            "jeton": "jeton de session reçu à la CONNEXION",
+            "client": "identifiant du programme client",
+            "sequence": numero_de_la_requete_pour_ce_client,
+            "trace": "identifiant unique de la requête (journaux du serveur)",
+            "echeance": heure_limite_time_time,
             "corps":{
                 "parametre_1": "valeur",
                 "parametre_2": "valeur"
@@ -39,21 +47,43 @@ Serveur -> Client (Reponse) :
         {
             "status": code_status,
             "message": "Texte explicatif pour l'humain",
-            "donnee": [ ... ]
+            "donnee": [ ... ],
+            "trace": {"id": "...", "recu": horodatage, "debut": horodatage, "fin": horodatage}
         }
+    Horodatages (time.time()) du serveur : requête lue, début et fin du traitement.
+    Le client en déduit où est passé le temps (voir decomposer_latence).
+    Échéance : heure (time.time()) au-delà de laquelle le client n'attend plus ; le serveur abandonne
+    alors la requête (504) sans la traiter ni écrire de réponse.
 """
 
 DOSSIER_DATA = Path("donnee_serveur")
 
 FICHIER_TEMOIN = DOSSIER_DATA / ".server_online"
+# Verrou partagé par les processus du serveur en mode multi-processus (lectures / écritures)
+FICHIER_VERROU = DOSSIER_DATA / ".verrou_serveur"
+# Compteurs de générations du mode multi-processus, un par fichier de données (voir index_annuaire.generation)
+DOSSIER_GENERATIONS = DOSSIER_DATA / ".generations"
 
-FICHIER_REQUETE = DOSSIER_DATA / "pdu_requete.json"
-FICHIER_REPONSE = DOSSIER_DATA / "pdu_reponse.json"
+# Une requête = un fichier requetes/<id>.json, sa réponse = reponses/<id>.json
+# (plusieurs requêtes peuvent ainsi être en cours en même temps).
+DOSSIER_REQUETES = DOSSIER_DATA / "requetes"
+DOSSIER_REPONSES = DOSSIER_DATA / "reponses"
 
 FICHIER_COMPTES = DOSSIER_DATA / "comptes.csv"
 FICHIER_PERMISSIONS = DOSSIER_DATA / "permissions.csv"
+FICHIER_GROUPES = DOSSIER_DATA / "groupes.csv"
 DOSSIER_ANNUAIRES = DOSSIER_DATA / "annuaires" 
 
+# Identifie ce programme client auprès du serveur (ses requêtes sont traitées dans l'ordre)
+ID_CLIENT = uuid.uuid4().hex[:12]
+SEQUENCES = itertools.count(1)
+# Mode verbeux (python client.py --verbeux) : affiche la décomposition de la latence de chaque requête
+MODE_VERBEUX = False
+# Jeton de session reçu à la CONNEXION, joint à chaque PDU (None : pas connecté)
+JETON_SESSION = None
+# Attente maximale d'une réponse (secondes), modifiable par appel (envoyer_PDU(..., timeout=30))
+TIMEOUT_DEFAUT = 10
+
 def creer_serveur():
     """
     Initialise l'architecture du serveur au démarrage.
@@ -62,6 +92,8 @@ def creer_serveur():
     """
     DOSSIER_DATA.mkdir(exist_ok=True)
     DOSSIER_ANNUAIRES.mkdir(exist_ok=True)
+    DOSSIER_REQUETES.mkdir(exist_ok=True)
+    DOSSIER_REPONSES.mkdir(exist_ok=True)
     
     if not FICHIER_COMPTES.exists():
         with open(FICHIER_COMPTES, "w", encoding="utf-8", newline="") as f:
@@ -71,6 +103,10 @@ def creer_serveur():
         with open(FICHIER_PERMISSIONS, "w", encoding="utf-8", newline="") as f:
             csv.writer(f).writerow(["Proprietaire", "Utilisateur_Autorise"])
 
+    if not FICHIER_GROUPES.exists():
+        with open(FICHIER_GROUPES, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(["Groupe", "Membre"])
+
     ya_admin = False
     with open(FICHIER_COMPTES, "r", encoding="utf-8") as f:
         contenu = csv.DictReader(f)
@@ -113,43 +149,156 @@ def deconnecter_serveur():
         os.remove(FICHIER_TEMOIN)
     print("[RESEAU] Serveur fermé.")
 
-def envoyer_PDU(action, corps, utilisateur_courant=None):
+def ecrire_fichier(path, texte):
+    """
+    Écrit un fichier d'un seul coup : il est d'abord écrit sous un nom temporaire (caché), puis renommé.
+    Celui qui surveille le dossier ne peut donc jamais lire un fichier à moitié écrit.
+    Le fichier est créé lisible par son seul propriétaire (0600) : les requêtes portent le jeton de session
+    et la réponse à CONNEXION le contient, ils ne doivent pas être lisibles par les autres comptes de la machine.
+    """
+    temporaire = path.with_name(f".{path.name}.tmp")
+    temporaire.unlink(missing_ok=True) # Reste d'un arrêt brutal : recréé avec les bons droits
+    with open(temporaire, "w", encoding="utf-8", opener=lambda chemin, options: os.open(chemin, options, 0o600)) as fichier:
+        fichier.write(texte)
+    os.replace(temporaire, path)
+
+def ecrire_json(path, donnee):
+    """
+    Écrit un fichier JSON d'un seul coup (voir ecrire_fichier).
+    """
+    ecrire_fichier(path, json.dumps(donnee, indent=4))
+
+def requetes_en_attente():
+    """
+    Renvoie les fichiers requêtes déposés par les clients, du plus ancien au plus récent
+    (le nom commence par l'heure d'envoi en nanosecondes).
+    """
+    if not DOSSIER_REQUETES.exists():
+        return []
+    return sorted(DOSSIER_REQUETES.glob("[!.]*.json"))
+
+def reclamer_requete(fichier_requete):
+    """
+    Réserve une requête pour ce processus en la renommant (nom caché) : le renommage est atomique,
+    donc si plusieurs processus serveur voient le même fichier, un seul le récupère.
+
+    Returns:
+        Path: Le fichier renommé (à lire puis supprimer), ou None si un autre processus l'a pris avant.
+    """
+    reserve = fichier_requete.with_name(f".{fichier_requete.name}.{os.getpid()}")
+    try:
+        os.rename(fichier_requete, reserve)
+    except (FileNotFoundError, PermissionError):
+        return None
+    return reserve
+
+def decomposer_latence(envoi, reception, horodatages):
+    """
+    Découpe la durée d'une requête vue par le client, à partir des horodatages renvoyés par le serveur
+    (même horloge : client et serveur partagent la machine, ou des horloges synchronisées).
+
+    Args:
+        envoi (float): Heure de dépôt de la requête par le client.
+        reception (float): Heure de lecture de la réponse par le client.
+        horodatages (dict): {"recu", "debut", "fin"} renvoyés dans la réponse ("trace").
+
+    Returns:
+        dict: Durées en millisecondes : "total", "aller" (dépôt -> lecture par le serveur),
+              "file" (attente dans l'ordonnanceur), "traitement", "retour" (fin du traitement -> lecture par le client).
+    """
+    def ms(duree):
+        return round(duree * 1000, 1)
+    return {
+        "total": ms(reception - envoi),
+        "aller": ms(horodatages["recu"] - envoi),
+        "file": ms(horodatages["debut"] - horodatages["recu"]),
+        "traitement": ms(horodatages["fin"] - horodatages["debut"]),
+        "retour": ms(reception - horodatages["fin"])
+    }
+
+def afficher_trace(action, trace, envoi, reception, reponse):
+    """
+    Mode verbeux : affiche l'identifiant de trace et la décomposition de la latence d'une requête.
+    """
+    entete = f"\033[90m[TRACE {trace}] {action} {reponse.get('status')}"
+    horodatages = reponse.get("trace") or {}
+    if not {"recu", "debut", "fin"} <= set(horodatages):
+        print(f"{entete} | total {(reception - envoi) * 1000:.1f} ms (sans horodatage serveur)\033[0m")
+        return
+    duree = decomposer_latence(envoi, reception, horodatages)
+    print(f"{entete} | total {duree['total']} ms = aller {duree['aller']} + file {duree['file']} "
+          f"+ traitement {duree['traitement']} + retour {duree['retour']} ms\033[0m")
+
+def envoyer_PDU(action, corps, utilisateur_courant=None, timeout=None):
     """
     Gère la communication fichier avec le serveur.
-    1. Écrit la requête dans 'pdu_requete.json'.
-    2. Attend (avec timeout) l'apparition de 'pdu_reponse.json'.
-    3. Lit et retourne la réponse.
+    1. Dépose la requête dans 'requetes/<id>.json' (un fichier par requête).
+    2. Attend (avec timeout) l'apparition de 'reponses/<id>.json'.
+    3. Lit, supprime et retourne la réponse.
+    Si le serveur est surchargé (503 avec "reessayer_dans"), la requête est renvoyée après le délai conseillé,
+    tant que le timeout n'est pas dépassé.
+    L'heure limite (début + timeout) part dans le PDU ("echeance") : le serveur abandonne la requête
+    si elle est dépassée avant ou pendant son traitement, puisque plus personne n'attend la réponse.
     
     Args:
         action (str): Nom de l'action à effectuer.
         corps (dict): Paramètres de l'action.
         utilisateur_courant (str, optional): Nom de l'utilisateur faisant la requête.
+        timeout (float, optional): Attente maximale en secondes (TIMEOUT_DEFAUT par défaut).
         
     Returns:
         dict: La réponse du serveur ou un message d'erreur (500/503/504).
+              Un 401 (session expirée) efface JETON_SESSION.
+    """
+    global JETON_SESSION
+    trace = uuid.uuid4().hex[:16] # Retrouvé dans les journaux du serveur (requetes.jsonl, requetes_lentes.jsonl)
+    timeout = timeout or TIMEOUT_DEFAUT
+    debut = time.time()
+    while True:
+        reponse = deposer_et_attendre(action, corps, utilisateur_courant, trace, debut + timeout)
+        if reponse["status"] == 401 and action != "CONNEXION":
+            JETON_SESSION = None # Session expirée ou fermée par le serveur : il faut se reconnecter
+        delai = reponse.get("reessayer_dans")
+        if reponse["status"] != 503 or delai is None or time.time() + delai >= debut + timeout:
+            return reponse
+        if MODE_VERBEUX:
+            print(f"\033[90m[TRACE {trace}] {action} : serveur surchargé, nouvel essai dans {delai} s\033[0m")
+        time.sleep(delai)
+
+def deposer_et_attendre(action, corps, utilisateur_courant, trace, limite):
+    """
+    Un essai d'envoi : dépose la requête puis attend sa réponse jusqu'à l'heure 'limite' (time.time()).
     """
-    pdu = {"action": action, "demandeur": utilisateur_courant, "corps": corps}
+    sequence = next(SEQUENCES)
+    pdu = {"action": action, "demandeur": utilisateur_courant, "jeton": JETON_SESSION, "client": ID_CLIENT, "sequence": sequence, "trace": trace,
+           "echeance": limite, "corps": corps}
     
     if not FICHIER_TEMOIN.exists():
          return {"status": 503, "message": "Serveur hors ligne (Connexion perdue)"}
 
-    if FICHIER_REPONSE.exists():
-        os.remove(FICHIER_REPONSE)
+    id_requete = f"{time.time_ns()}_{ID_CLIENT}_{sequence}"
+    fichier_requete = DOSSIER_REQUETES / f"{id_requete}.json"
+    fichier_reponse = DOSSIER_REPONSES / f"{id_requete}.json"
             
     try:
-        with open(FICHIER_REQUETE, "w", encoding="utf-8") as fichier:
-            json.dump(pdu, fichier, indent=4)
-            
-        timeout = 10
         debut = time.time()
-        while not FICHIER_REPONSE.exists():
-            time.sleep(0.1)
-            if time.time() - debut > timeout:
-                return {"status": 504, "message": "Serveur ne répond pas"}
+        ecrire_json(fichier_requete, pdu)
+            
+        while not fichier_reponse.exists():
+            time.sleep(0.05)
+            if time.time() > limite:
+                if fichier_requete.exists():
+                    os.remove(fichier_requete) # Le serveur ne l'a pas prise : on la retire
+                if MODE_VERBEUX:
+                    print(f"\033[90m[TRACE {trace}] {action} : pas de réponse après {time.time() - debut:.1f} s\033[0m")
+                return {"status": 504, "message": f"Serveur ne répond pas (trace {trace})"}
                 
-        time.sleep(0.1)
-        with open(FICHIER_REPONSE, "r", encoding="utf-8") as fichier:
-            return json.load(fichier)
+        with open(fichier_reponse, "r", encoding="utf-8") as fichier:
+            reponse = json.load(fichier)
+        os.remove(fichier_reponse)
+        if MODE_VERBEUX:
+            afficher_trace(action, trace, debut, time.time(), reponse)
+        return reponse
             
     except Exception as e:
-        return {"status": 500, "message": f"Erreur: {e}"}
\ No newline at end of file
+        return {"status": 500, "message": f"Erreur: {e}"}
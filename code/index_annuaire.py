@@ -0,0 +1,660 @@
+"""
+Index Annuaire
+"""
+
+import csv
+import uuid
+import hashlib
+import itertools
+import threading
+import mesure_es
+import colonnes_annuaire
+from bisect import bisect_left, insort
+
+"""
+Index mémoire des annuaires (côté serveur) :
+    Chaque fichier annuaire_X.csv est chargé une seule fois en mémoire, puis l'index est tenu à jour
+    à chaque ajout / modification / suppression faite par le serveur (pas de relecture du fichier).
+
+    Si le fichier a été modifié par quelqu'un d'autre (date de modification ou taille différente),
+    l'index est simplement reconstruit à la prochaine lecture.
+    En mode multi-processus, une écriture d'un autre processus est aussi repérée par la génération du fichier.
+
+Structure d'une entrée (une par annuaire) :
+    {
+        "signature": (chemin, mtime_ns, taille),   # État du fichier au moment du dernier chargement/écriture
+        "entete": ["Nom", "Prenom", ...],           # Colonnes du fichier CSV
+        "contacts": {id: ligne},                    # Les lignes du CSV, dans l'ordre du fichier
+        "minuscules": {id: (nom, prenom, ...)},     # Champs recherchables déjà passés en minuscules
+        "cles": {(Nom, Prenom): id},                # Accès direct à un contact
+        "trigrammes": {"dup": {id, ...}},           # Index inversé : trigramme -> contacts qui le contiennent
+        "noms_tries": [("dupont", "DUPONT", id)],   # Noms et prénoms triés, pour l'autocomplétion par préfixe
+        "ordre_nom": [("dupont", "jean", id)],      # Contacts triés par (Nom, Prénom), pour les listes alphabétiques
+        "suppressions": {"dupnt": {id, ...}},       # Recherche approximative (construit à la 1re utilisation, sinon None)
+        "version": 12,                              # Change à chaque rechargement ou écriture du serveur
+        "generation": 7,                            # Génération du fichier à laquelle l'entrée est à jour (ou None)
+        "chemin": "donnee_serveur/annuaires/annuaire_X.csv",
+        "prochain_id": int
+    }
+
+Index des téléphones (un par annuaire, à part de l'index complet : la recherche inversée n'a besoin
+ni des trigrammes ni des tris, il est construit en une lecture du fichier) :
+    {chemin: {"signature": (...), "generation": 7, "numeros": {"0612345678": [ligne, ...]}}}
+"""
+
+CHAMPS_RECHERCHE = ["Nom", "Prenom", "Telephone", "Adresse", "Email"]
+
+# Un index par fichier annuaire : {chemin (str): entrée}
+INDEX = {}
+# Index des téléphones par annuaire : {chemin (str): {"signature", "generation", "numeros"}}
+TELEPHONES = {}
+# Opérateurs des filtres par champ, du moins coûteux (et plus sélectif) au plus coûteux à vérifier
+OPERATEURS_FILTRE = {
+    "egal": lambda champ, valeur: champ == valeur,
+    "commence_par": lambda champ, valeur: champ.startswith(valeur),
+    "finit_par": lambda champ, valeur: champ.endswith(valeur),
+    "contient": lambda champ, valeur: valeur in champ,
+}
+# Les lectures du serveur tournent en parallèle (ordonnanceur) : un seul thread à la fois (re)construit une entrée.
+VERROU_CHARGEMENT = threading.RLock()
+# Numéros de version des annuaires : jamais réutilisés, même après suppression / recréation d'un annuaire
+VERSIONS = itertools.count(1)
+# Préfixe des étiquettes de version envoyées aux clients en mode un seul processus : propre à ce démarrage,
+# pour qu'un numéro de VERSIONS d'avant un redémarrage ne soit jamais pris pour le même.
+INSTANCE = uuid.uuid4().hex[:8]
+# Distance d'édition maximale couverte par l'index des suppressions (recherche approximative)
+DISTANCE_MAX = 2
+# Mode multi-processus (pre-fork) : dossier des compteurs de générations partagés entre les processus, None sinon.
+# Deux écritures rapprochées de même taille peuvent laisser la même signature (mtime, taille) : chaque écriture
+# incrémente donc le compteur du fichier écrit (un par fichier), et l'index d'un fichier n'est à jour
+# que s'il a été vérifié à sa génération courante. Les autres fichiers ne sont pas rechargés.
+GENERATIONS = {"dossier": None}
+
+def signature_fichier(path):
+    """
+    Renvoie une empreinte légère d'un fichier (date de modification + taille) sans le lire.
+    Sert à savoir si un index mémoire construit à partir de ce fichier est encore à jour.
+
+    Returns:
+        tuple: (chemin, mtime en ns, taille) ou (chemin, None, None) si le fichier n'existe pas.
+    """
+    try:
+        infos = path.stat()
+    except OSError:
+        return (str(path), None, None)
+    return (str(path), infos.st_mtime_ns, infos.st_size)
+
+def fichier_generation(path):
+    """
+    Fichier du compteur de générations d'un fichier de données (nommé par l'empreinte de son chemin).
+    """
+    return GENERATIONS["dossier"] / hashlib.sha1(str(path).encode()).hexdigest()[:16]
+
+def generation(path):
+    """
+    Renvoie la génération courante d'un fichier de données (à lire sous le verrou inter-processus).
+
+    Returns:
+        int|None: La génération (0 si le fichier n'a jamais été écrit), ou None en mode un seul processus.
+    """
+    if GENERATIONS["dossier"] is None:
+        return None
+    try:
+        return int(fichier_generation(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+
+def avancer_generation(chemin, ancienne, nouvelle):
+    """
+    Après une écriture de ce processus dans 'chemin' (dont il a incrémenté la génération) : l'entrée vérifiée
+    à la génération précédente a suivi l'écriture, elle reste à jour à la nouvelle.
+    """
+    entree = INDEX.get(chemin)
+    if entree is not None and entree["generation"] == ancienne:
+        entree["generation"] = nouvelle
+
+def normaliser_telephone(numero):
+    """
+    Met un numéro de téléphone sous une forme unique pour pouvoir le comparer :
+    on ne garde que les chiffres, et l'indicatif français (+33 / 0033 / 33) est remplacé par 0.
+    Exemple : "+33 6 12.34.56.78" -> "0612345678"
+
+    Returns:
+        str: Le numéro normalisé ("" si aucun chiffre).
+    """
+    numero = (numero or "").strip()
+    if numero.startswith("+"):
+        numero = "00" + numero[1:]
+    chiffres = "".join(caractere for caractere in numero if caractere.isdigit())
+    if chiffres.startswith("0033"):
+        chiffres = "0" + chiffres[4:]
+    elif chiffres.startswith("33") and len(chiffres) == 11:
+        chiffres = "0" + chiffres[2:]
+    return chiffres
+
+def trigrammes(texte):
+    """
+    Découpe un texte en trigrammes (toutes les sous-chaînes de 3 caractères).
+    Exemple : "dupont" -> {"dup", "upo", "pon", "ont"}
+    """
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+def noms_autocompletion(ligne, identifiant):
+    """
+    Renvoie les entrées d'autocomplétion d'un contact : une pour le Nom, une pour le Prénom.
+    Chaque entrée est un tuple (valeur en minuscules, valeur d'origine, identifiant) : le tri se fait sur la minuscule.
+    """
+    return [((ligne.get(champ) or "").lower(), ligne.get(champ) or "", identifiant)
+            for champ in ["Nom", "Prenom"] if ligne.get(champ)]
+
+def prefixe_trie(noms_tries, prefixe, limite):
+    """
+    Renvoie au plus 'limite' valeurs distinctes d'une liste triée de tuples (minuscule, valeur, ...)
+    dont la minuscule commence par 'prefixe'. Coût : O(log n + limite) grâce à la recherche dichotomique.
+    """
+    resultats = {}
+    position = bisect_left(noms_tries, (prefixe,))
+    while position < len(noms_tries) and len(resultats) < limite:
+        entree = noms_tries[position]
+        if not entree[0].startswith(prefixe):
+            break
+        resultats[entree[1]] = None
+        position += 1
+    return list(resultats)
+
+def variantes_suppression(mot, distance):
+    """
+    Renvoie toutes les variantes d'un mot obtenues en supprimant jusqu'à 'distance' caractères (le mot compris).
+    Exemple (distance 1) : "luc" -> {"luc", "uc", "lc", "lu"}
+    Deux mots à distance d'édition <= d ont toujours au moins une variante commune : c'est le principe
+    de l'index des suppressions (pas besoin de comparer le terme à tous les noms).
+    """
+    variantes = {mot}
+    frontiere = {mot}
+    for _ in range(distance):
+        frontiere = {variante[:i] + variante[i + 1:] for variante in frontiere for i in range(len(variante))}
+        variantes |= frontiere
+    return variantes
+
+def distance_edition(a, b, maximum):
+    """
+    Distance d'édition entre deux mots (insertion, suppression, substitution, inversion de 2 lettres voisines).
+    S'arrête dès que la distance dépasse 'maximum' (renvoie alors maximum + 1).
+    """
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    avant_precedente = None
+    precedente = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        courante = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cout = 0 if a[i - 1] == b[j - 1] else 1
+            courante[j] = min(precedente[j] + 1, courante[j - 1] + 1, precedente[j - 1] + cout)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                courante[j] = min(courante[j], avant_precedente[j - 2] + 1)
+        if min(courante) > maximum:
+            return maximum + 1
+        avant_precedente, precedente = precedente, courante
+    return precedente[-1]
+
+def indexer_suppressions(entree, identifiant, retirer=False, suppressions=None):
+    """
+    Ajoute (ou retire) le Nom et le Prénom d'un contact dans l'index des suppressions
+    (celui de l'entrée, ou 'suppressions' s'il est fourni : index en cours de construction).
+    """
+    if suppressions is None:
+        suppressions = entree["suppressions"]
+    for mot in set(entree["minuscules"][identifiant][:2]): # (nom, prenom)
+        if not mot:
+            continue
+        for variante in variantes_suppression(mot, DISTANCE_MAX):
+            if retirer:
+                posting = suppressions.get(variante)
+                if posting is not None:
+                    posting.discard(identifiant)
+                    if not posting:
+                        del suppressions[variante]
+            else:
+                suppressions.setdefault(variante, set()).add(identifiant)
+
+def indexer(entree, ligne, identifiant=None, trier=True):
+    """
+    Ajoute une ligne (contact) dans une entrée d'index et renvoie son identifiant.
+    Si 'identifiant' est fourni, le contact garde sa place (cas d'une modification).
+    Avec trier=False (chargement complet), les noms sont ajoutés en vrac : l'appelant trie une seule fois à la fin.
+    """
+    if identifiant is None:
+        identifiant = entree["prochain_id"]
+        entree["prochain_id"] += 1
+    minuscules = tuple((ligne.get(champ) or "").lower() for champ in CHAMPS_RECHERCHE)
+
+    entree["contacts"][identifiant] = ligne
+    entree["minuscules"][identifiant] = minuscules
+    entree["cles"][(ligne.get("Nom"), ligne.get("Prenom"))] = identifiant
+    for champ in minuscules:
+        for trigramme in trigrammes(champ):
+            entree["trigrammes"].setdefault(trigramme, set()).add(identifiant)
+    for nom in noms_autocompletion(ligne, identifiant):
+        if trier:
+            insort(entree["noms_tries"], nom) # Insertion dichotomique : la liste reste triée
+        else:
+            entree["noms_tries"].append(nom)
+    if trier:
+        insort(entree["ordre_nom"], (minuscules[0], minuscules[1], identifiant))
+    else:
+        entree["ordre_nom"].append((minuscules[0], minuscules[1], identifiant))
+    if entree["suppressions"] is not None:
+        indexer_suppressions(entree, identifiant)
+    return identifiant
+
+def desindexer(entree, identifiant, garder_place=False):
+    """
+    Retire un contact d'une entrée d'index (l'inverse de indexer).
+    Avec 'garder_place', la ligne reste dans 'contacts' pour être remplacée à la même position (modification).
+    """
+    if garder_place:
+        ligne = entree["contacts"][identifiant]
+    else:
+        ligne = entree["contacts"].pop(identifiant)
+    if entree["suppressions"] is not None:
+        indexer_suppressions(entree, identifiant, retirer=True)
+    minuscules = entree["minuscules"].pop(identifiant)
+    cle = (ligne.get("Nom"), ligne.get("Prenom"))
+    if entree["cles"].get(cle) == identifiant:
+        del entree["cles"][cle]
+    for champ in minuscules:
+        for trigramme in trigrammes(champ):
+            posting = entree["trigrammes"].get(trigramme)
+            if posting is not None:
+                posting.discard(identifiant)
+                if not posting:
+                    del entree["trigrammes"][trigramme]
+    noms_tries = entree["noms_tries"]
+    for nom in noms_autocompletion(ligne, identifiant):
+        position = bisect_left(noms_tries, nom)
+        if position < len(noms_tries) and noms_tries[position] == nom:
+            del noms_tries[position]
+    cle_tri = (minuscules[0], minuscules[1], identifiant)
+    position = bisect_left(entree["ordre_nom"], cle_tri)
+    if position < len(entree["ordre_nom"]) and entree["ordre_nom"][position] == cle_tri:
+        del entree["ordre_nom"][position]
+
+def retirer_entree(chemin):
+    """
+    Supprime l'entrée d'index d'un annuaire (et ses colonnes). Son index des téléphones est gardé :
+    il vérifie lui-même la signature du fichier (voir telephones_annuaire).
+    """
+    INDEX.pop(chemin, None)
+    colonnes_annuaire.oublier(chemin)
+
+def charger(path):
+    """
+    Renvoie l'entrée d'index d'un annuaire, en la (re)construisant si le fichier a changé sur le disque.
+
+    Args:
+        path (Path): Chemin du fichier annuaire_X.csv.
+
+    Returns:
+        dict: L'entrée d'index, ou None si le fichier n'existe pas.
+    """
+    signature = signature_fichier(path)
+    courante = generation(path)
+    entree = INDEX.get(str(path))
+    if entree is not None and entree["signature"] == signature and entree["generation"] == courante:
+        return entree
+    with VERROU_CHARGEMENT:
+        entree = INDEX.get(str(path))
+        if entree is not None and entree["signature"] == signature and entree["generation"] == courante:
+            return entree # Reconstruite entre-temps par un autre thread
+        return reconstruire(path, signature, courante)
+
+def reconstruire(path, signature, courante):
+    """
+    (Re)construit l'entrée d'index d'un annuaire depuis le fichier (appelée par charger, verrou pris).
+    """
+    retirer_entree(str(path))
+    if signature[1] is None:
+        return None
+
+    entree = {"signature": signature, "entete": list(CHAMPS_RECHERCHE), "contacts": {}, "minuscules": {},
+              "cles": {}, "trigrammes": {}, "noms_tries": [], "ordre_nom": [], "suppressions": None,
+              "version": next(VERSIONS), "generation": courante, "chemin": str(path), "prochain_id": 0}
+    with mesure_es.ouvrir(path, "r", encoding="utf-8") as fichier:
+        reader = csv.DictReader(fichier)
+        for ligne in reader:
+            indexer(entree, ligne, trier=False)
+        entree["entete"] = reader.fieldnames or entree["entete"]
+    # Tri complet une seule fois au chargement ; ensuite les listes restent triées par insertion dichotomique.
+    entree["noms_tries"].sort()
+    entree["ordre_nom"].sort()
+    INDEX[str(path)] = entree
+    return entree
+
+def marquer_modifiee(entree, path):
+    """
+    Enregistre la nouvelle signature du fichier et change la version de l'annuaire après une écriture.
+    """
+    entree["signature"] = signature_fichier(path)
+    entree["version"] = next(VERSIONS)
+
+def version_annuaire(path):
+    """
+    Renvoie la version de l'annuaire dans l'index, sans accéder au disque (None s'il n'est pas chargé).
+    Le serveur étant le seul à écrire les annuaires, elle change à chaque Ajout / Modification / Suppression.
+    """
+    entree = INDEX.get(str(path))
+    return None if entree is None else entree["version"]
+
+def etiquette_annuaire(path):
+    """
+    Renvoie l'étiquette de version d'un annuaire (type ETag) envoyée aux clients avec les listes,
+    après avoir rechargé l'index si le fichier a changé sur le disque.
+    En mode multi-processus, elle ne dépend que du fichier (signature + génération partagée) : tous les processus
+    donnent la même pour un annuaire inchangé, même après avoir reconstruit leur index.
+
+    Returns:
+        str|None: "<mtime>-<taille>-<génération>" (multi-processus) ou "<instance>-<version>",
+                  ou None si l'annuaire n'existe pas.
+    """
+    entree = charger(path)
+    if entree is None:
+        return None
+    if entree["generation"] is None:
+        return f"{INSTANCE}-{entree['version']}"
+    _, mtime, taille = entree["signature"]
+    return f"{mtime:x}-{taille:x}-{entree['generation']}"
+
+def entree_a_jour(path, signature_avant):
+    """
+    Renvoie l'entrée d'index si elle correspondait bien au fichier AVANT l'écriture du serveur
+    (on peut alors lui appliquer la modification).
+    Sinon (annuaire jamais chargé, ou modifié par quelqu'un d'autre), l'index est reconstruit
+    depuis le fichier déjà écrit et None est renvoyé : il n'y a plus rien à appliquer.
+    Ainsi, après chaque écriture du serveur, l'annuaire est toujours présent et à jour dans l'index.
+    """
+    # Le serveur vient d'écrire le fichier : son index des téléphones sera relu (la signature peut ne pas avoir changé).
+    TELEPHONES.pop(str(path), None)
+    entree = INDEX.get(str(path))
+    if entree is None or entree["signature"] != signature_avant or entree["generation"] != generation(path):
+        charger(path)
+        return None
+    return entree
+
+def apres_ajout(path, signature_avant, contact):
+    """
+    Met à jour l'index après l'ajout d'un contact dans le fichier (appelé par le serveur après écriture).
+    """
+    entree = entree_a_jour(path, signature_avant)
+    if entree is None:
+        return
+    indexer(entree, {champ: contact.get(champ, "") for champ in entree["entete"]})
+    marquer_modifiee(entree, path)
+
+def apres_modification(path, signature_avant, contact):
+    """
+    Met à jour l'index après la modification d'un contact (identifié par Nom + Prénom).
+    """
+    entree = entree_a_jour(path, signature_avant)
+    if entree is None:
+        return
+    identifiant = entree["cles"].get((contact.get("Nom"), contact.get("Prenom")))
+    if identifiant is not None:
+        desindexer(entree, identifiant, garder_place=True)
+        indexer(entree, {champ: contact.get(champ, "") for champ in entree["entete"]}, identifiant)
+    marquer_modifiee(entree, path)
+
+def apres_suppression(path, signature_avant, contact):
+    """
+    Met à jour l'index après la suppression d'un contact (identifié par Nom + Prénom).
+    """
+    entree = entree_a_jour(path, signature_avant)
+    if entree is None:
+        return
+    identifiant = entree["cles"].get((contact.get("Nom"), contact.get("Prenom")))
+    if identifiant is not None:
+        desindexer(entree, identifiant)
+    marquer_modifiee(entree, path)
+
+def apres_lot(path, signature_avant, operations):
+    """
+    Met à jour l'index après un lot d'opérations écrit en une seule fois (LOT_CONTACTS).
+
+    Args:
+        operations (list): Liste de (type, contact) avec type "ajout", "modif" ou "suppr", dans l'ordre d'application.
+    """
+    entree = entree_a_jour(path, signature_avant)
+    if entree is None:
+        return
+    for type_op, contact in operations:
+        identifiant = entree["cles"].get((contact.get("Nom"), contact.get("Prenom")))
+        ligne = {champ: contact.get(champ, "") for champ in entree["entete"]}
+        if type_op == "ajout":
+            indexer(entree, ligne)
+        elif type_op == "modif" and identifiant is not None:
+            desindexer(entree, identifiant, garder_place=True)
+            indexer(entree, ligne, identifiant)
+        elif type_op == "suppr" and identifiant is not None:
+            desindexer(entree, identifiant)
+    marquer_modifiee(entree, path)
+
+def oublier(path):
+    """
+    Supprime l'index d'un annuaire (ex: suppression du compte).
+    """
+    retirer_entree(str(path))
+    TELEPHONES.pop(str(path), None)
+
+def lister_page(path, tri, decroissant, debut, taille):
+    """
+    Renvoie une page de contacts d'un annuaire, sans trier ni copier tout l'annuaire :
+    seuls les 'taille' contacts de la page sont lus dans l'ordre déjà maintenu (coût O(page)).
+
+    Args:
+        path (Path): Chemin du fichier annuaire.
+        tri (str): "fichier" (ordre du fichier) ou "nom" (Nom puis Prénom, sans tenir compte de la casse).
+        decroissant (bool): Parcours en sens inverse.
+        debut (int): Position du premier contact de la page (0 pour le début).
+        taille (int|None): Nombre de contacts de la page (None : jusqu'à la fin).
+
+    Returns:
+        tuple: (copies des contacts de la page, nombre total de contacts), ou None si l'annuaire n'existe pas.
+    """
+    entree = charger(path)
+    if entree is None:
+        return None
+    total = len(entree["contacts"])
+    fin = total if taille is None else min(total, debut + taille)
+    if tri == "nom":
+        ordre_nom = entree["ordre_nom"]
+        positions = range(total - 1 - debut, total - 1 - fin, -1) if decroissant else range(debut, fin)
+        identifiants = [ordre_nom[position][2] for position in positions]
+    else:
+        ordre = reversed(entree["contacts"]) if decroissant else iter(entree["contacts"])
+        identifiants = list(itertools.islice(ordre, debut, fin))
+    return [dict(entree["contacts"][identifiant]) for identifiant in identifiants], total
+
+def rechercher(path, terme):
+    """
+    Recherche par sous-chaîne dans les 5 champs d'un annuaire, en passant par l'index de trigrammes.
+    Même résultat (et même ordre) qu'un parcours complet du fichier avec 'terme in champ.lower()'.
+
+    Args:
+        path (Path): Chemin du fichier annuaire.
+        terme (str): Terme recherché, déjà en minuscules.
+
+    Returns:
+        list: Les contacts correspondants (copies des lignes CSV), ou [] si l'annuaire n'existe pas.
+    """
+    return rechercher_filtres(path, [terme], [], None)
+
+def rechercher_filtres(path, termes, filtres, limite):
+    """
+    Recherche multi-critères : tous les termes (n'importe quel champ) ET tous les filtres (un champ précis)
+    doivent correspondre. Les résultats sont dans l'ordre du fichier.
+
+    Args:
+        path (Path): Chemin du fichier annuaire.
+        termes (list): Termes libres, déjà en minuscules.
+        filtres (list): Tuples (champ, operateur, valeur en minuscules), opérateur de OPERATEURS_FILTRE.
+        limite (int|None): Nombre maximum de résultats (None : pas de limite).
+
+    Returns:
+        list: Les contacts correspondants (copies des lignes CSV), ou [] si l'annuaire n'existe pas.
+    """
+    entree = charger(path)
+    if entree is None:
+        return []
+    return [dict(entree["contacts"][identifiant]) for identifiant in identifiants_filtres(entree, termes, filtres, limite)]
+
+def compter(path, termes, filtres):
+    """
+    Compte les contacts correspondant à une recherche multi-critères, sans copier les contacts.
+    """
+    entree = charger(path)
+    if entree is None:
+        return 0
+    return len(identifiants_filtres(entree, termes, filtres, None))
+
+def identifiants_filtres(entree, termes, filtres, limite):
+    """
+    Identifiants (ordre du fichier) des contacts d'une entrée d'index correspondant à tous les termes et filtres.
+
+    1. Chaque terme ou valeur de filtre d'au moins 3 caractères est forcément une sous-chaîne de la ligne :
+       ses trigrammes donnent des listes de contacts (postings), intersectées en commençant par la plus courte.
+    2. Sans aucune valeur d'au moins 3 caractères, tous les contacts sont candidats. Pour un gros annuaire,
+       le plus long terme court est alors cherché colonne par colonne (colonnes_annuaire), et n'a plus à être vérifié.
+    3. Les candidats sont vérifiés avec les tests exacts, le moins coûteux d'abord (filtres sur un champ,
+       du plus long au plus court, puis les termes libres qui regardent les 5 champs).
+    4. Le parcours s'arrête dès que 'limite' identifiants sont trouvés.
+    """
+    termes = sorted((terme for terme in termes if terme), key=len, reverse=True)
+    postings = []
+    for valeur in termes + [valeur for _, _, valeur in filtres]:
+        for trigramme in trigrammes(valeur):
+            posting = entree["trigrammes"].get(trigramme)
+            if not posting:
+                return [] # Un trigramme absent de tout l'annuaire : aucun résultat possible
+            postings.append(posting)
+    candidats = None
+    if postings:
+        postings.sort(key=len)
+        candidats = sorted(set.intersection(*postings))
+    elif termes and len(entree["contacts"]) >= colonnes_annuaire.SEUIL_COLONNES:
+        candidats = colonnes_annuaire.lignes_contenant(entree, termes[0])
+        if candidats is not None:
+            termes = termes[1:]
+    if candidats is None:
+        candidats = entree["contacts"]
+
+    ordre_operateurs = list(OPERATEURS_FILTRE)
+    tests = [(CHAMPS_RECHERCHE.index(champ), OPERATEURS_FILTRE[operateur], valeur)
+             for champ, operateur, valeur in sorted(filtres, key=lambda f: (ordre_operateurs.index(f[1]), -len(f[2])))]
+    if not tests and not termes:
+        return list(itertools.islice(candidats, limite))
+
+    minuscules = entree["minuscules"]
+    resultats = []
+    for identifiant in candidats:
+        if limite is not None and len(resultats) >= limite:
+            break
+        ligne = minuscules[identifiant]
+        if all(test(ligne[position], valeur) for position, test, valeur in tests) \
+                and all(any(terme in champ for champ in ligne) for terme in termes):
+            resultats.append(identifiant)
+    return resultats
+
+def rechercher_approx(path, terme, distance_max):
+    """
+    Recherche approximative (fautes de frappe) sur le Nom et le Prénom des contacts d'un annuaire.
+    Les variantes par suppression du terme sont cherchées dans l'index des suppressions : seuls les contacts
+    partageant une variante sont comparés au terme (distance d'édition exacte), pas tout l'annuaire.
+
+    Args:
+        path (Path): Chemin du fichier annuaire.
+        terme (str): Terme recherché, déjà en minuscules.
+        distance_max (int): Nombre de fautes tolérées (1 ou 2).
+
+    Returns:
+        list: Copies des contacts trouvés, avec une clé 'Distance', triés par distance puis ordre du fichier.
+    """
+    entree = charger(path)
+    if entree is None or not terme:
+        return []
+    distance_max = max(0, min(distance_max, DISTANCE_MAX))
+    if entree["suppressions"] is None:
+        # Construit à la première recherche approximative, puis tenu à jour par indexer/desindexer.
+        # (construit à part puis publié d'un coup : une autre lecture ne voit jamais un index à moitié rempli)
+        with VERROU_CHARGEMENT:
+            if entree["suppressions"] is None:
+                suppressions = {}
+                for identifiant in entree["contacts"]:
+                    indexer_suppressions(entree, identifiant, suppressions=suppressions)
+                entree["suppressions"] = suppressions
+
+    candidats = set()
+    for variante in variantes_suppression(terme, distance_max):
+        candidats.update(entree["suppressions"].get(variante, ()))
+
+    trouves = []
+    for identifiant in candidats:
+        distance = min(distance_edition(terme, mot, distance_max) for mot in entree["minuscules"][identifiant][:2])
+        if distance <= distance_max:
+            trouves.append((distance, identifiant))
+    trouves.sort()
+    return [dict(entree["contacts"][identifiant], Distance=distance) for distance, identifiant in trouves]
+
+def autocompleter(path, prefixe, limite):
+    """
+    Suggère des noms/prénoms de contacts commençant par 'prefixe' (insensible à la casse).
+
+    Args:
+        path (Path): Chemin du fichier annuaire.
+        prefixe (str): Début du mot tapé par l'utilisateur.
+        limite (int): Nombre maximum de suggestions.
+
+    Returns:
+        list: Valeurs distinctes (Nom ou Prénom) dans l'ordre alphabétique, ou [] si l'annuaire n'existe pas.
+    """
+    entree = charger(path)
+    if entree is None:
+        return []
+    return prefixe_trie(entree["noms_tries"], prefixe.lower(), limite)
+
+def telephones_annuaire(path):
+    """
+    Renvoie l'index des téléphones d'un annuaire, reconstruit seulement si le fichier a changé
+    (signature, ou génération du fichier en mode multi-processus). Une seule lecture du fichier,
+    sans construire l'index complet de l'annuaire.
+
+    Returns:
+        dict: {numéro normalisé: [ligne, ...]} (partagé, ne pas modifier), vide si le fichier n'existe pas.
+    """
+    signature = signature_fichier(path)
+    courante = generation(path)
+    entree = TELEPHONES.get(str(path))
+    if entree is not None and entree["signature"] == signature and entree["generation"] == courante:
+        return entree["numeros"]
+    numeros = {}
+    if signature[1] is not None:
+        with mesure_es.ouvrir(path, "r", encoding="utf-8") as fichier:
+            for ligne in csv.DictReader(fichier):
+                telephone = normaliser_telephone(ligne.get("Telephone"))
+                if telephone:
+                    numeros.setdefault(telephone, []).append(ligne)
+    # Publiée d'un coup : une lecture concurrente voit l'ancienne ou la nouvelle, jamais un index à moitié rempli
+    TELEPHONES[str(path)] = {"signature": signature, "generation": courante, "numeros": numeros}
+    return numeros
+
+def chercher_telephone(path, numero):
+    """
+    Recherche inversée dans un annuaire : quels contacts ont ce numéro ?
+    Accès direct par le numéro normalisé (O(1)), quelle que soit la taille de l'annuaire.
+
+    Args:
+        path (Path): Chemin du fichier annuaire.
+        numero (str): Le numéro, sous n'importe quel format (espaces, points, +33...).
+
+    Returns:
+        list: Copies des lignes des contacts qui ont ce numéro, dans l'ordre du fichier.
+    """
+    return [dict(ligne) for ligne in telephones_annuaire(path).get(normaliser_telephone(numero), [])]
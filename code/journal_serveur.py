@@ -0,0 +1,134 @@
+"""
+Journal Serveur
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+from datetime import datetime
+
+"""
+Journal des requêtes du serveur, sans ralentir le traitement :
+    - recevoir_pdu ne fait que déposer un petit dictionnaire dans une file (journaliser, jamais bloquant) ;
+    - un thread d'arrière-plan vide la file, écrit une ligne JSON par requête dans un fichier tournant
+      (requetes.jsonl -> requetes.jsonl.1 -> ... au-delà de TAILLE_MAX_JOURNAL), et affiche éventuellement
+      la ligne colorée habituelle dans la console.
+    Si la console (ou le disque) est trop lente et que la file est pleine, les enregistrements en trop sont
+    comptés puis abandonnés : le serveur n'attend jamais le journal.
+
+Enregistrement (une ligne du fichier) :
+    {"horodatage": 1760000000.12, "action": "AJOUT_CONTACT", "utilisateur": "Abasse", "cible": null,
+     "trace": "9f8e7d6c5b4a3210", "status": 200, "message": "Contact ajouté",
+     "es": {"fichiers": 2, "octets_lus": 18234, "octets_ecrits": 96, "fsync": 0}}
+"""
+
+TAILLE_FILE_JOURNAL = 10000
+TAILLE_MAX_JOURNAL = 5 * 1024 * 1024 # Octets avant rotation du fichier
+NB_ARCHIVES_JOURNAL = 3
+
+FILE_JOURNAL = queue.Queue(maxsize=TAILLE_FILE_JOURNAL)
+FIN = None # Sentinelle : arrête le thread d'écriture
+
+# État du journal en cours : {"thread", "fichier", "console", "taille_max", "nb_archives", "perdus"}
+JOURNAL = {"thread": None, "perdus": 0}
+
+def journaliser(enregistrement):
+    """
+    Dépose un enregistrement dans la file du journal (appelé pour chaque requête : ne bloque jamais).
+    """
+    try:
+        FILE_JOURNAL.put_nowait(enregistrement)
+    except queue.Full:
+        JOURNAL["perdus"] += 1
+
+def ligne_console(enregistrement):
+    """
+    Met en forme un enregistrement comme l'ancien affichage console : QUI a fait QUOI, sur QUI, et le RÉSULTAT.
+    """
+    date = datetime.fromtimestamp(enregistrement["horodatage"]).strftime("%d-%m-%Y %H:%M:%S")
+    # Code couleur pour lecture rapide (Vert = OK, Rouge = Problème)
+    if enregistrement.get("status") in [200, 201, 304]:
+        tag = "\033[92m[SUCCÈS]\033[0m" # Vert
+    else:
+        tag = "\033[91m[ERREUR]\033[0m" # Rouge
+    entete = f"{date} {tag} Action: {enregistrement.get('action')} | User: {enregistrement.get('utilisateur')} "
+    if enregistrement.get("cible") is not None:
+        entete += f"| Cible: {enregistrement['cible']}"
+    return f"{entete}\n\t\t\t└── message: {enregistrement.get('message')}"
+
+def tourner(fichier, nb_archives):
+    """
+    Rotation : requetes.jsonl devient requetes.jsonl.1, l'ancien .1 devient .2, etc. (le plus ancien est supprimé).
+    """
+    for numero in range(nb_archives - 1, 0, -1):
+        archive = fichier.with_name(f"{fichier.name}.{numero}")
+        if archive.exists():
+            os.replace(archive, fichier.with_name(f"{fichier.name}.{numero + 1}"))
+    if fichier.exists():
+        os.replace(fichier, fichier.with_name(f"{fichier.name}.1"))
+
+def ecrire_en_continu():
+    """
+    Boucle du thread d'écriture : prend les enregistrements par paquets, les écrit, puis recommence.
+    """
+    fichier = JOURNAL["fichier"]
+    sortie = open(fichier, "a", encoding="utf-8")
+    try:
+        while True:
+            paquet = [FILE_JOURNAL.get()]
+            while len(paquet) < 500: # Tout ce qui est déjà en attente part avec le même paquet
+                try:
+                    paquet.append(FILE_JOURNAL.get_nowait())
+                except queue.Empty:
+                    break
+            arret = FIN in paquet
+            enregistrements = [enregistrement for enregistrement in paquet if enregistrement is not FIN]
+
+            for enregistrement in enregistrements:
+                sortie.write(json.dumps(enregistrement, ensure_ascii=False) + "\n")
+            if JOURNAL["perdus"]:
+                sortie.write(json.dumps({"horodatage": time.time(), "perdus": JOURNAL["perdus"]}) + "\n")
+                JOURNAL["perdus"] = 0
+            sortie.flush()
+            if sortie.tell() > JOURNAL["taille_max"]:
+                sortie.close()
+                tourner(fichier, JOURNAL["nb_archives"])
+                sortie = open(fichier, "a", encoding="utf-8")
+
+            if JOURNAL["console"]:
+                for enregistrement in enregistrements:
+                    print(ligne_console(enregistrement))
+            if arret:
+                return
+    finally:
+        sortie.close()
+
+def demarrer_journal(fichier, console=True, taille_max=TAILLE_MAX_JOURNAL, nb_archives=NB_ARCHIVES_JOURNAL):
+    """
+    Démarre le thread d'écriture du journal (une seule fois par processus).
+
+    Args:
+        fichier (Path): Fichier JSON-lines du journal (ex: donnee_serveur/journal/requetes.jsonl).
+        console (bool): Affiche aussi chaque requête dans la console.
+        taille_max (int): Taille (octets) au-delà de laquelle le fichier est archivé.
+        nb_archives (int): Nombre de fichiers archivés conservés.
+    """
+    if JOURNAL["thread"] is not None:
+        return
+    Path(fichier).parent.mkdir(parents=True, exist_ok=True)
+    JOURNAL.update({"fichier": Path(fichier), "console": console, "taille_max": taille_max, "nb_archives": nb_archives})
+    JOURNAL["thread"] = threading.Thread(target=ecrire_en_continu, name="journal", daemon=True)
+    JOURNAL["thread"].start()
+
+def arreter_journal():
+    """
+    Écrit ce qui reste dans la file, puis arrête le thread d'écriture.
+    """
+    if JOURNAL["thread"] is None:
+        return
+    FILE_JOURNAL.put(FIN)
+    JOURNAL["thread"].join()
+    JOURNAL["thread"] = None
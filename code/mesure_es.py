@@ -0,0 +1,116 @@
+"""
+Mesure ES
+"""
+
+import threading
+import requetes_lentes
+from contextlib import contextmanager
+
+"""
+Comptage des entrées/sorties fichier de chaque requête du serveur (fichiers ouverts, octets lus, octets écrits, fsync).
+Le serveur ne force aujourd'hui aucune écriture sur le disque (pas d'os.fsync) : le compteur "fsync" reste à 0,
+il est gardé dans le journal et les métriques pour qu'un futur appel apparaisse (ajouter(fsync=1)).
+
+Le serveur ouvre ses fichiers CSV avec ouvrir() au lieu de open() : à la fermeture, le nombre d'octets réellement
+lus ou écrits sur le disque est ajouté aux compteurs de la requête en cours du thread (une seule mesure de position
+par fichier, rien par ligne lue). recevoir_pdu appelle debut() puis fin() autour de chaque action ; le résultat
+part dans le journal et dans les métriques par action (metriques).
+Les fichiers ouverts en écriture par la requête sont aussi notés (fichiers_ecrits) : en mode multi-processus,
+le serveur incrémente leur génération après l'écriture.
+Le travail confié à un autre thread (ex: recherche globale sur POOL_RECHERCHE) est rattaché à la requête
+en passant la fonction par transmettre().
+
+Compteurs d'une requête :
+    {"fichiers": 3, "octets_lus": 18234, "octets_ecrits": 412, "fsync": 0}
+"""
+
+CHAMPS_ES = ["fichiers", "octets_lus", "octets_ecrits", "fsync"]
+
+COURANT = threading.local() # COURANT.compteurs / COURANT.ecrits : compteurs et fichiers écrits de la requête du thread
+VERROU_ES = threading.Lock() # Plusieurs threads peuvent alimenter les compteurs d'une même requête
+
+def debut():
+    """
+    Commence le comptage d'une nouvelle requête dans ce thread.
+    """
+    COURANT.compteurs = dict.fromkeys(CHAMPS_ES, 0)
+    COURANT.ecrits = set()
+
+def fin():
+    """
+    Termine le comptage de la requête de ce thread.
+
+    Returns:
+        dict: Les compteurs de la requête ({"fichiers", "octets_lus", "octets_ecrits", "fsync"}).
+    """
+    compteurs = getattr(COURANT, "compteurs", None)
+    COURANT.compteurs = None
+    return compteurs or dict.fromkeys(CHAMPS_ES, 0)
+
+def ajouter(**valeurs):
+    """
+    Ajoute des valeurs aux compteurs de la requête en cours (rien si aucune requête n'est mesurée dans ce thread).
+    """
+    compteurs = getattr(COURANT, "compteurs", None)
+    if compteurs is None:
+        return
+    with VERROU_ES:
+        for champ, valeur in valeurs.items():
+            compteurs[champ] += valeur
+
+@contextmanager
+def ouvrir(chemin, mode="r", **options):
+    """
+    Remplace open() dans un bloc 'with' : ouvre le fichier et, à la fermeture, compte le fichier ouvert
+    et les octets lus ou écrits (position du fichier brut, tampons compris).
+    Le temps passé dans le bloc compte dans la phase "stockage" de la requête (requetes_lentes).
+    """
+    ecriture = any(lettre in mode for lettre in "wax+")
+    fichier = open(chemin, mode, **options)
+    if ecriture and getattr(COURANT, "ecrits", None) is not None:
+        COURANT.ecrits.add(str(chemin))
+    try:
+        brut = fichier.buffer.raw if hasattr(fichier, "buffer") else fichier.raw
+        depart = brut.tell() # En mode "a", le fichier est déjà positionné à la fin
+    except (AttributeError, OSError):
+        brut, depart = None, 0
+    try:
+        with requetes_lentes.phase("stockage"):
+            yield fichier
+    finally:
+        deplacement = 0
+        if not fichier.closed:
+            if ecriture:
+                fichier.flush()
+            if brut is not None:
+                deplacement = brut.tell() - depart
+            fichier.close()
+        ajouter(fichiers=1, **{"octets_ecrits" if ecriture else "octets_lus": deplacement})
+
+def fichiers_ecrits():
+    """
+    Renvoie (et oublie) les fichiers ouverts en écriture par la requête de ce thread depuis debut().
+
+    Returns:
+        set: Chemins (str) des fichiers écrits.
+    """
+    ecrits = getattr(COURANT, "ecrits", None) or set()
+    COURANT.ecrits = set()
+    return ecrits
+
+def transmettre(fonction):
+    """
+    Rattache à la requête en cours le travail de 'fonction' exécutée dans un autre thread (pool).
+
+    Returns:
+        callable: La fonction enveloppée, à soumettre au pool à la place de 'fonction'.
+    """
+    compteurs = getattr(COURANT, "compteurs", None)
+    def executer(*args, **kwargs):
+        precedents = getattr(COURANT, "compteurs", None)
+        COURANT.compteurs = compteurs
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            COURANT.compteurs = precedents
+    return executer
@@ -0,0 +1,148 @@
+"""
+Metriques
+"""
+
+import math
+import threading
+import mesure_es
+
+"""
+Métriques des requêtes du serveur, tenues en mémoire par recevoir_pdu (une mise à jour par requête) :
+    - nombre de requêtes par action, et nombre de réponses par code "status" ;
+    - histogramme des durées de traitement par action (seaux à bornes fixes, en secondes),
+      d'où l'on estime la médiane (p50), p95 et p99 sans garder chaque mesure ;
+    - entrées/sorties fichier cumulées par action (voir mesure_es) : fichiers ouverts, octets lus / écrits, fsync.
+Elles sont remises à zéro au démarrage du processus. En mode multi-processus (pre-fork),
+chaque processus tient ses propres métriques : l'action METRIQUES renvoie celles du processus qui la traite.
+
+Structure :
+METRIQUES = {
+    "AJOUT_CONTACT": {
+        "nombre": 42,                   # Requêtes traitées
+        "status": {200: 40, 400: 2},    # Réponses par code
+        "somme": 0.052,                 # Durée totale (secondes)
+        "seaux": [0, 3, 30, 9, ...],    # Requêtes par seau (même ordre que BORNES_SEAUX)
+        "es": {"fichiers": 84, "octets_lus": 765828, "octets_ecrits": 4032, "fsync": 0}
+    }
+}
+"""
+
+# Bornes supérieures des seaux de l'histogramme (secondes), de 0,1 ms à 10 s, puis +infini
+BORNES_SEAUX = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                math.inf]
+CENTILES = [50, 95, 99]
+
+METRIQUES = {}
+VERROU_METRIQUES = threading.Lock()
+
+def enregistrer(action, status, duree, es=None):
+    """
+    Compte une requête traitée.
+
+    Args:
+        action (str): Nom de l'action (ex: "AJOUT_CONTACT").
+        status (int): Code de la réponse.
+        duree (float): Durée de traitement en secondes.
+        es (dict|None): Entrées/sorties fichier de la requête (mesure_es.fin()).
+    """
+    seau = next(numero for numero, borne in enumerate(BORNES_SEAUX) if duree <= borne)
+    with VERROU_METRIQUES:
+        mesure = METRIQUES.get(action)
+        if mesure is None:
+            mesure = METRIQUES[action] = {"nombre": 0, "status": {}, "somme": 0.0, "seaux": [0] * len(BORNES_SEAUX),
+                                          "es": dict.fromkeys(mesure_es.CHAMPS_ES, 0)}
+        mesure["nombre"] += 1
+        mesure["status"][status] = mesure["status"].get(status, 0) + 1
+        mesure["somme"] += duree
+        mesure["seaux"][seau] += 1
+        for champ, valeur in (es or {}).items():
+            mesure["es"][champ] += valeur
+
+def centile(seaux, nombre, pourcentage):
+    """
+    Estime un centile à partir de l'histogramme (interpolation linéaire à l'intérieur du seau concerné).
+
+    Returns:
+        float: La durée estimée en secondes (la borne du dernier seau fini si le centile tombe dans +infini).
+    """
+    rang = nombre * pourcentage / 100
+    cumul = 0
+    for numero, effectif in enumerate(seaux):
+        if effectif and cumul + effectif >= rang:
+            borne_basse = BORNES_SEAUX[numero - 1] if numero else 0.0
+            borne_haute = BORNES_SEAUX[numero]
+            if math.isinf(borne_haute):
+                return borne_basse
+            return borne_basse + (borne_haute - borne_basse) * (rang - cumul) / effectif
+        cumul += effectif
+    return 0.0
+
+def resume():
+    """
+    Renvoie les métriques par action, prêtes à être envoyées au client (durées en millisecondes).
+
+    Returns:
+        list: [{"Action", "Nombre", "Erreurs", "Status", "Moyenne_ms", "p50_ms", "p95_ms", "p99_ms",
+               "ES", "ES_par_requete"}, ...],
+              triée par durée totale décroissante (les actions qui coûtent le plus au serveur d'abord).
+    """
+    with VERROU_METRIQUES:
+        copie = {action: {"nombre": mesure["nombre"], "status": dict(mesure["status"]), "somme": mesure["somme"],
+                          "seaux": list(mesure["seaux"]), "es": dict(mesure["es"])} for action, mesure in METRIQUES.items()}
+
+    lignes = []
+    for action, mesure in sorted(copie.items(), key=lambda element: -element[1]["somme"]):
+        ligne = {
+            "Action": action,
+            "Nombre": mesure["nombre"],
+            "Erreurs": sum(effectif for status, effectif in mesure["status"].items() if status not in (200, 201, 304)),
+            # Clés en texte : le résumé passe par un fichier JSON
+            "Status": {str(status): effectif for status, effectif in sorted(mesure["status"].items(), key=str)},
+            "Moyenne_ms": round(mesure["somme"] / mesure["nombre"] * 1000, 3)
+        }
+        for pourcentage in CENTILES:
+            ligne[f"p{pourcentage}_ms"] = round(centile(mesure["seaux"], mesure["nombre"], pourcentage) * 1000, 3)
+        # Totaux et moyennes par requête : une action qui relit tous les annuaires ressort par ses octets lus
+        ligne["ES"] = mesure["es"]
+        ligne["ES_par_requete"] = {champ: round(valeur / mesure["nombre"], 1) for champ, valeur in mesure["es"].items()}
+        lignes.append(ligne)
+    return lignes
+
+def texte_prometheus():
+    """
+    Renvoie les métriques au format texte de Prometheus (compteurs, histogramme cumulatif et entrées/sorties par action).
+    """
+    with VERROU_METRIQUES:
+        copie = {action: {"status": dict(mesure["status"]), "somme": mesure["somme"], "nombre": mesure["nombre"],
+                          "seaux": list(mesure["seaux"]), "es": dict(mesure["es"])} for action, mesure in METRIQUES.items()}
+
+    lignes = ["# HELP annuaire_requetes_total Requetes traitees par action et par status.",
+              "# TYPE annuaire_requetes_total counter"]
+    for action, mesure in sorted(copie.items()):
+        for status, effectif in sorted(mesure["status"].items(), key=str):
+            lignes.append(f'annuaire_requetes_total{{action="{action}",status="{status}"}} {effectif}')
+
+    lignes += ["# HELP annuaire_duree_requete_secondes Duree de traitement des requetes par action.",
+               "# TYPE annuaire_duree_requete_secondes histogram"]
+    for action, mesure in sorted(copie.items()):
+        cumul = 0
+        for borne, effectif in zip(BORNES_SEAUX, mesure["seaux"]):
+            cumul += effectif
+            le = "+Inf" if math.isinf(borne) else repr(borne)
+            lignes.append(f'annuaire_duree_requete_secondes_bucket{{action="{action}",le="{le}"}} {cumul}')
+        lignes.append(f'annuaire_duree_requete_secondes_sum{{action="{action}"}} {mesure["somme"]}')
+        lignes.append(f'annuaire_duree_requete_secondes_count{{action="{action}"}} {mesure["nombre"]}')
+
+    lignes += ["# HELP annuaire_entrees_sorties_total Entrees/sorties fichier par action (fichiers, octets lus/ecrits, fsync).",
+               "# TYPE annuaire_entrees_sorties_total counter"]
+    for action, mesure in sorted(copie.items()):
+        for champ, valeur in mesure["es"].items():
+            lignes.append(f'annuaire_entrees_sorties_total{{action="{action}",type="{champ}"}} {valeur}')
+    return "\n".join(lignes) + "\n"
+
+def remettre_a_zero():
+    """
+    Efface toutes les métriques.
+    """
+    with VERROU_METRIQUES:
+        METRIQUES.clear()
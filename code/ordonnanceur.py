@@ -0,0 +1,336 @@
+"""
+Ordonnanceur
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError: # Windows : pas de verrou de fichier partagé, le mode multi-processus n'est pas disponible
+    fcntl = None
+
+"""
+Ordonnanceur des requêtes du serveur (lecteurs / écrivains sur un pool de threads) :
+    - Les actions en lecture (LISTE_CONTACTS, RECHERCHE_CONTACT, ...) s'exécutent en parallèle sur le pool.
+    - Les actions qui écrivent passent par une file par ressource (ex: "annuaire_X", "comptes") : les écritures
+      d'une ressource partent dans l'ordre d'arrivée (celle qui attend derrière une autre ne prend pas de thread).
+      Les écritures ne tournent pas en parallèle, même sur des ressources différentes : une seule à la fois
+      pour tout le serveur, et aucune lecture pendant ce temps (verrou lecteurs / écrivain global).
+      Une écriture touche souvent plusieurs fichiers (ex: suppression d'un compte : comptes, annuaire, permissions,
+      groupes) et modifie les index mémoire partagés par toutes les actions.
+    - Les requêtes d'un même client sont traitées l'une après l'autre, dans l'ordre d'arrivée.
+    - Équité entre utilisateurs : les requêtes prêtes sont rangées par utilisateur et les threads libres
+      les prennent à tour de rôle (un utilisateur qui envoie une rafale n'affame pas les autres).
+    - Contrôle d'admission : au-delà de 'taille_max' requêtes en attente (ou 'max_par_utilisateur' pour un même
+      utilisateur), soumettre() refuse la requête ; le serveur répond alors tout de suite 503 avec un délai conseillé
+      (delai_conseille) au lieu de laisser la file, et donc la latence, grossir sans limite.
+    - En mode multi-processus (pre-fork), un verrou de fichier (fcntl) étend la règle à tous les processus :
+      lecture = verrou partagé, écriture = verrou exclusif. Après chaque écriture, 'apres_ecriture' est appelée
+      verrou exclusif encore pris (le serveur y incrémente la génération partagée que vérifient ses index).
+
+Structure d'un ordonnanceur :
+    {
+        "pool": ThreadPoolExecutor,
+        "traiter": fonction(requete) -> reponse,
+        "classer": fonction(requete) -> (lecture: bool, ressource: str),
+        "repondre": fonction(requete, reponse),
+        "utilisateur": fonction(requete) -> str | None,  # Pour l'équité (par défaut : le client)
+        "mutex": Lock,                               # Protège les files ci-dessous
+        "clients": {client: deque([requete, ...])},  # Requêtes en attente, par client
+        "clients_actifs": set(),                     # Clients dont une requête est en cours
+        "pretes": {utilisateur: deque([...])},       # Requêtes prêtes à partir, par utilisateur
+        "tour": deque([utilisateur, ...]),           # Ordre de passage des utilisateurs (tourniquet)
+        "ressources": {ressource: deque([...])},     # Écritures en attente, par ressource
+        "ressources_actives": set(),                 # Ressources dont l'écrivain tourne
+        "nb_threads": 8, "occupes": 0,               # Threads du pool, et threads occupés
+        "taille_max": 200, "max_par_utilisateur": 50,
+        "en_attente": 0,                             # Requêtes admises et pas encore terminées
+        "par_utilisateur": {utilisateur: 0},         # Idem, par utilisateur
+        "duree_moyenne": 0.01,                       # Durée moyenne d'une requête (moyenne glissante, secondes)
+        "verrou": {...},                             # Verrou lecteurs / écrivain (voir creer_verrou_lecture_ecriture)
+        "fichier_verrou": Path | None,               # Verrou entre processus (mode pre-fork), sinon None
+        "apres_ecriture": fonction() | None          # Appelée après chaque écriture sous le verrou exclusif (pre-fork)
+    }
+"""
+
+NB_THREADS_DEFAUT = 8
+# Délai conseillé à un client refusé (secondes), et poids d'une nouvelle mesure dans la durée moyenne
+DELAI_MIN = 0.5
+DELAI_MAX = 10.0
+DUREE_MOYENNE_INITIALE = 0.01
+POIDS_MOYENNE = 0.1
+
+def creer_verrou_lecture_ecriture():
+    """
+    Verrou partagé : plusieurs lecteurs en même temps, ou un seul écrivain.
+    Un écrivain en attente bloque les nouveaux lecteurs (les écritures ne sont jamais affamées).
+    """
+    return {"condition": threading.Condition(), "lecteurs": 0, "ecrivain": False, "ecrivains_en_attente": 0}
+
+def debut_lecture(verrou):
+    """
+    Prend le verrou en lecture (attend la fin de l'écriture en cours ou en attente).
+    """
+    with verrou["condition"]:
+        while verrou["ecrivain"] or verrou["ecrivains_en_attente"]:
+            verrou["condition"].wait()
+        verrou["lecteurs"] += 1
+
+def fin_lecture(verrou):
+    """
+    Rend le verrou en lecture.
+    """
+    with verrou["condition"]:
+        verrou["lecteurs"] -= 1
+        if verrou["lecteurs"] == 0:
+            verrou["condition"].notify_all()
+
+def debut_ecriture(verrou):
+    """
+    Prend le verrou en écriture (attend que plus aucun lecteur ni écrivain ne tourne).
+    """
+    with verrou["condition"]:
+        verrou["ecrivains_en_attente"] += 1
+        while verrou["ecrivain"] or verrou["lecteurs"]:
+            verrou["condition"].wait()
+        verrou["ecrivains_en_attente"] -= 1
+        verrou["ecrivain"] = True
+
+def fin_ecriture(verrou):
+    """
+    Rend le verrou en écriture.
+    """
+    with verrou["condition"]:
+        verrou["ecrivain"] = False
+        verrou["condition"].notify_all()
+
+@contextmanager
+def verrou_inter_processus(ordonnanceur, exclusif):
+    """
+    Prend le verrou de fichier partagé entre les processus du serveur (rien à faire en mode un seul processus).
+    Chaque prise ouvre son propre descripteur : plusieurs threads peuvent tenir le verrou partagé en même temps.
+    """
+    if ordonnanceur["fichier_verrou"] is None:
+        yield
+        return
+    with open(ordonnanceur["fichier_verrou"], "a") as fichier:
+        fcntl.flock(fichier, fcntl.LOCK_EX if exclusif else fcntl.LOCK_SH)
+        try:
+            yield
+            if exclusif and ordonnanceur["apres_ecriture"] is not None:
+                ordonnanceur["apres_ecriture"]()
+        finally:
+            fcntl.flock(fichier, fcntl.LOCK_UN)
+
+def creer_ordonnanceur(traiter, classer, repondre, nb_threads=NB_THREADS_DEFAUT, fichier_verrou=None, utilisateur=None,
+                       taille_max=None, max_par_utilisateur=None, apres_ecriture=None):
+    """
+    Crée un ordonnanceur.
+
+    Args:
+        traiter (callable): Exécute une requête et renvoie la réponse (ex: serveur.recevoir_pdu).
+        classer (callable): Renvoie (lecture, ressource) pour une requête.
+        repondre (callable): Reçoit (requete, reponse) une fois la requête traitée (ex: écriture du fichier réponse).
+        nb_threads (int): Taille du pool (nombre de lectures en parallèle).
+        fichier_verrou (Path|None): Fichier de verrou commun à tous les processus (mode pre-fork, nécessite fcntl).
+        utilisateur (callable|None): Renvoie l'utilisateur d'une requête (partage équitable des threads) ;
+                                     par défaut, chaque client compte comme un utilisateur.
+        taille_max (int|None): Nombre maximal de requêtes en attente (None : pas de limite).
+        max_par_utilisateur (int|None): Nombre maximal de requêtes en attente pour un même utilisateur.
+        apres_ecriture (callable|None): Appelée sans argument à la fin de chaque écriture, verrou exclusif
+                                        inter-processus encore pris (uniquement avec fichier_verrou).
+
+    Returns:
+        dict: L'ordonnanceur, à passer à soumettre() puis arreter().
+    """
+    return {
+        "pool": ThreadPoolExecutor(max_workers=nb_threads, thread_name_prefix="ordonnanceur"),
+        "traiter": traiter,
+        "classer": classer,
+        "repondre": repondre,
+        "utilisateur": utilisateur,
+        "mutex": threading.Lock(),
+        "clients": {},
+        "clients_actifs": set(),
+        "pretes": {},
+        "tour": deque(),
+        "ressources": {},
+        "ressources_actives": set(),
+        "nb_threads": nb_threads,
+        "occupes": 0,
+        "taille_max": taille_max,
+        "max_par_utilisateur": max_par_utilisateur,
+        "en_attente": 0,
+        "par_utilisateur": {},
+        "duree_moyenne": DUREE_MOYENNE_INITIALE,
+        "verrou": creer_verrou_lecture_ecriture(),
+        "fichier_verrou": fichier_verrou,
+        "apres_ecriture": apres_ecriture
+    }
+
+def soumettre(ordonnanceur, client, requete):
+    """
+    Confie une requête à l'ordonnanceur (ne bloque pas).
+    Elle ne démarre qu'une fois les requêtes précédentes du même client terminées.
+
+    Returns:
+        bool: False si la requête est refusée (file pleine, au total ou pour cet utilisateur) : rien n'est exécuté.
+    """
+    utilisateur = ordonnanceur["utilisateur"](requete) if ordonnanceur["utilisateur"] else client
+    with ordonnanceur["mutex"]:
+        if ordonnanceur["taille_max"] is not None and ordonnanceur["en_attente"] >= ordonnanceur["taille_max"]:
+            return False
+        if (ordonnanceur["max_par_utilisateur"] is not None
+                and ordonnanceur["par_utilisateur"].get(utilisateur, 0) >= ordonnanceur["max_par_utilisateur"]):
+            return False
+        ordonnanceur["en_attente"] += 1
+        ordonnanceur["par_utilisateur"][utilisateur] = ordonnanceur["par_utilisateur"].get(utilisateur, 0) + 1
+
+        ordonnanceur["clients"].setdefault(client, deque()).append((utilisateur, requete))
+        if client in ordonnanceur["clients_actifs"]:
+            return True
+        ordonnanceur["clients_actifs"].add(client)
+        lancer_suivante(ordonnanceur, client)
+        distribuer(ordonnanceur)
+    return True
+
+def delai_conseille(ordonnanceur):
+    """
+    Estime dans combien de secondes une requête refusée a des chances d'être acceptée
+    (temps pour écouler la file actuelle avec tous les threads), borné entre DELAI_MIN et DELAI_MAX.
+    """
+    with ordonnanceur["mutex"]:
+        estimation = ordonnanceur["en_attente"] * ordonnanceur["duree_moyenne"] / ordonnanceur["nb_threads"]
+    return round(min(DELAI_MAX, max(DELAI_MIN, estimation)), 1)
+
+def lancer_suivante(ordonnanceur, client):
+    """
+    Range la prochaine requête d'un client parmi les requêtes prêtes de son utilisateur (appelée avec le mutex pris).
+    """
+    file_client = ordonnanceur["clients"][client]
+    if not file_client:
+        del ordonnanceur["clients"][client]
+        ordonnanceur["clients_actifs"].discard(client)
+        return
+    utilisateur, requete = file_client.popleft()
+    if utilisateur not in ordonnanceur["pretes"]:
+        ordonnanceur["pretes"][utilisateur] = deque()
+        ordonnanceur["tour"].append(utilisateur)
+    ordonnanceur["pretes"][utilisateur].append((client, utilisateur, requete))
+
+def distribuer(ordonnanceur):
+    """
+    Donne les requêtes prêtes aux threads libres, un utilisateur après l'autre (appelée avec le mutex pris).
+    Une écriture dont la ressource est déjà en cours d'écriture rejoint la file de cette ressource sans prendre de thread.
+    """
+    while ordonnanceur["tour"] and ordonnanceur["occupes"] < ordonnanceur["nb_threads"]:
+        utilisateur = ordonnanceur["tour"].popleft()
+        file_utilisateur = ordonnanceur["pretes"][utilisateur]
+        client, _, requete = element = file_utilisateur.popleft()
+        if file_utilisateur:
+            ordonnanceur["tour"].append(utilisateur) # Il repasse après les autres utilisateurs
+        else:
+            del ordonnanceur["pretes"][utilisateur]
+
+        lecture, ressource = ordonnanceur["classer"](requete)
+        if lecture:
+            ordonnanceur["occupes"] += 1
+            ordonnanceur["pool"].submit(executer_lecture, ordonnanceur, element)
+            continue
+        ordonnanceur["ressources"].setdefault(ressource, deque()).append(element)
+        if ressource not in ordonnanceur["ressources_actives"]:
+            ordonnanceur["ressources_actives"].add(ressource)
+            ordonnanceur["occupes"] += 1
+            ordonnanceur["pool"].submit(executer_ecritures, ordonnanceur, ressource)
+
+def traiter_et_repondre(ordonnanceur, requete):
+    """
+    Traite une requête et transmet sa réponse ; une exception devient une réponse 500 (le pool ne doit pas s'arrêter).
+
+    Returns:
+        float: Durée du traitement (secondes).
+    """
+    debut = time.perf_counter()
+    try:
+        reponse = ordonnanceur["traiter"](requete)
+    except Exception as e:
+        print(f"[ERREUR] {e}")
+        reponse = {"status": 500, "message": f"Erreur interne : {e}"}
+    try:
+        ordonnanceur["repondre"](requete, reponse)
+    except Exception as e:
+        print(f"[ERREUR] Réponse non envoyée : {e}")
+    return time.perf_counter() - debut
+
+def terminer(ordonnanceur, element, duree):
+    """
+    Une requête du client est terminée : on libère sa place dans la file et on passe à sa suivante.
+    """
+    client, utilisateur, _ = element
+    with ordonnanceur["mutex"]:
+        ordonnanceur["en_attente"] -= 1
+        ordonnanceur["par_utilisateur"][utilisateur] -= 1
+        if not ordonnanceur["par_utilisateur"][utilisateur]:
+            del ordonnanceur["par_utilisateur"][utilisateur]
+        ordonnanceur["duree_moyenne"] += POIDS_MOYENNE * (duree - ordonnanceur["duree_moyenne"])
+        lancer_suivante(ordonnanceur, client)
+        distribuer(ordonnanceur)
+
+def liberer_thread(ordonnanceur):
+    """
+    Un thread du pool a fini sa tâche : il peut prendre la requête prête suivante.
+    """
+    with ordonnanceur["mutex"]:
+        ordonnanceur["occupes"] -= 1
+        distribuer(ordonnanceur)
+
+def executer_lecture(ordonnanceur, element):
+    """
+    Exécute une lecture (en parallèle des autres lectures).
+    """
+    debut_lecture(ordonnanceur["verrou"])
+    try:
+        with verrou_inter_processus(ordonnanceur, exclusif=False):
+            duree = traiter_et_repondre(ordonnanceur, element[2])
+    finally:
+        fin_lecture(ordonnanceur["verrou"])
+    liberer_thread(ordonnanceur)
+    terminer(ordonnanceur, element, duree)
+
+def executer_ecritures(ordonnanceur, ressource):
+    """
+    Écrivain unique d'une ressource : vide sa file, une écriture à la fois, dans l'ordre d'arrivée.
+    Chaque écriture prend le verrou global en écriture : elle attend la fin de celles des autres ressources.
+    """
+    while True:
+        with ordonnanceur["mutex"]:
+            file_ressource = ordonnanceur["ressources"][ressource]
+            if not file_ressource:
+                del ordonnanceur["ressources"][ressource]
+                ordonnanceur["ressources_actives"].discard(ressource)
+                ordonnanceur["occupes"] -= 1
+                distribuer(ordonnanceur)
+                return
+            element = file_ressource.popleft()
+        debut_ecriture(ordonnanceur["verrou"])
+        try:
+            with verrou_inter_processus(ordonnanceur, exclusif=True):
+                duree = traiter_et_repondre(ordonnanceur, element[2])
+        finally:
+            fin_ecriture(ordonnanceur["verrou"])
+        terminer(ordonnanceur, element, duree)
+
+def arreter(ordonnanceur):
+    """
+    Attend la fin des requêtes en cours et en attente, puis arrête le pool.
+    """
+    while True:
+        with ordonnanceur["mutex"]:
+            if not ordonnanceur["clients_actifs"]:
+                break
+        time.sleep(0.05)
+    ordonnanceur["pool"].shutdown(wait=True)
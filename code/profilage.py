@@ -0,0 +1,216 @@
+"""
+Profilage
+"""
+
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from pathlib import Path
+
+"""
+Profilage à la demande du serveur, sans le redémarrer (piloté par l'action admin PROFILAGE) :
+    - "cprofile" : depuis Python 3.12, cProfile passe par sys.monitoring, commun à tout le processus : un seul
+      profileur peut être actif à la fois. Il est donc activé une fois pour la session et couvre tous les threads.
+      Avant 3.12, chaque requête couverte tourne sous son propre cProfile, une seule à la fois (les requêtes
+      simultanées passent sans profileur). Les profils sont écrits dans un fichier .pstats ;
+    - "tracemalloc" : suit les allocations mémoire de tout le processus pendant la session,
+      et enregistre un instantané au début et à la fin (fichiers .snapshot).
+Une session couvre les N prochaines requêtes, ou toutes celles qui commencent dans les T prochaines secondes.
+À la fin, les fichiers sont écrits dans le dossier de la session (donnee_serveur/profilage/) et un résumé
+des lignes les plus coûteuses est gardé pour être renvoyé au client.
+En mode multi-processus, seul le processus qui reçoit l'action est profilé.
+
+Lecture des fichiers :
+    python -m pstats donnee_serveur/profilage/profil_<date>.pstats
+    tracemalloc.Snapshot.load("donnee_serveur/profilage/memoire_<date>_fin.snapshot")
+"""
+
+OUTILS = ["cprofile", "tracemalloc"]
+TOP_DEFAUT = 15
+NB_CADRES_MEMOIRE = 5 # Profondeur des piles gardées par tracemalloc
+# Python >= 3.12 : un profileur activé une fois couvre tous les threads (et un second lèverait ValueError)
+PROFILEUR_GLOBAL = sys.version_info >= (3, 12)
+
+# État de la session : {"actif", "dossier", "outil", "restant", "fin", "top", "en_cours", "profils", "profileur",
+#                       "occupe", "nb_profilees", "depart", "nom", "resultat", ...}
+PROFILAGE = {"actif": False, "resultat": None}
+VERROU_PROFILAGE = threading.Lock()
+
+def demarrer(dossier, outil, nb_requetes=None, duree=None, top=TOP_DEFAUT):
+    """
+    Ouvre une session de profilage.
+
+    Args:
+        dossier (Path): Dossier où écrire les fichiers .pstats / .snapshot.
+        outil (str): "cprofile" ou "tracemalloc".
+        nb_requetes (int|None): Nombre de requêtes à profiler.
+        duree (float|None): Durée de la session en secondes (au moins une des deux limites est obligatoire).
+        top (int): Nombre de lignes du résumé.
+
+    Returns:
+        str|None: Un message d'erreur, ou None si la session a démarré.
+    """
+    if outil not in OUTILS:
+        return f"Outil '{outil}' inconnu ({' ou '.join(OUTILS)})"
+    if nb_requetes is None and duree is None:
+        return "Indiquez un nombre de requêtes ou une durée"
+    with VERROU_PROFILAGE:
+        if PROFILAGE["actif"]:
+            return f"Un profilage ({PROFILAGE['outil']}) est déjà en cours"
+        PROFILAGE.update({
+            "actif": True,
+            "dossier": Path(dossier),
+            "outil": outil,
+            "restant": nb_requetes,
+            "fin": time.monotonic() + duree if duree is not None else None,
+            "top": top,
+            "en_cours": 0,
+            "profils": [],
+            "profileur": None, # Profileur de toute la session (PROFILEUR_GLOBAL)
+            "occupe": False, # Une requête tourne déjà sous son propre profileur (avant 3.12)
+            "nb_profilees": 0,
+            "nom": time.strftime("%Y%m%d_%H%M%S"),
+            "resultat": None
+        })
+        if outil == "tracemalloc":
+            PROFILAGE["deja_actif"] = tracemalloc.is_tracing()
+            if not PROFILAGE["deja_actif"]:
+                tracemalloc.start(NB_CADRES_MEMOIRE)
+            PROFILAGE["depart"] = tracemalloc.take_snapshot()
+        elif PROFILEUR_GLOBAL:
+            profileur = cProfile.Profile()
+            try:
+                profileur.enable()
+            except ValueError: # Un autre outil de profilage est déjà actif dans le processus
+                PROFILAGE["actif"] = False
+                return "Un autre outil de profilage est déjà actif dans le processus"
+            PROFILAGE["profileur"] = profileur
+    return None
+
+def executer(fonction, *args):
+    """
+    Appelle fonction(*args), sous le profileur si une session en cours doit couvrir cette requête.
+    """
+    if not PROFILAGE["actif"]: # Cas courant : aucun coût hors session
+        return fonction(*args)
+    with VERROU_PROFILAGE:
+        par_requete = PROFILAGE["outil"] == "cprofile" and not PROFILEUR_GLOBAL
+        couverte = (PROFILAGE["actif"] and PROFILAGE["restant"] != 0
+                    and (PROFILAGE["fin"] is None or time.monotonic() < PROFILAGE["fin"])
+                    and not (par_requete and PROFILAGE["occupe"]))
+        if couverte:
+            PROFILAGE["en_cours"] += 1
+            PROFILAGE["nb_profilees"] += 1
+            PROFILAGE["occupe"] = par_requete
+            if PROFILAGE["restant"] is not None:
+                PROFILAGE["restant"] -= 1
+    if not couverte:
+        verifier_fin()
+        return fonction(*args)
+
+    profil = cProfile.Profile() if par_requete else None
+    try:
+        return profil.runcall(fonction, *args) if profil else fonction(*args)
+    finally:
+        with VERROU_PROFILAGE:
+            if profil:
+                PROFILAGE["profils"].append(profil)
+                PROFILAGE["occupe"] = False
+            PROFILAGE["en_cours"] -= 1
+        verifier_fin()
+
+def verifier_fin():
+    """
+    Termine la session si sa limite est atteinte et que plus aucune requête profilée ne tourne.
+    """
+    with VERROU_PROFILAGE:
+        if not PROFILAGE["actif"] or PROFILAGE["en_cours"]:
+            return
+        if PROFILAGE["restant"] == 0 or (PROFILAGE["fin"] is not None and time.monotonic() >= PROFILAGE["fin"]):
+            terminer()
+
+def arreter():
+    """
+    Arrête la session en cours dès que ses requêtes profilées sont terminées.
+    """
+    with VERROU_PROFILAGE:
+        if PROFILAGE["actif"]:
+            PROFILAGE["restant"] = 0
+    verifier_fin()
+
+def terminer():
+    """
+    Écrit les fichiers de la session et prépare son résumé (appelée avec VERROU_PROFILAGE pris).
+    """
+    dossier = PROFILAGE["dossier"]
+    dossier.mkdir(parents=True, exist_ok=True)
+    top = PROFILAGE["top"]
+    if PROFILAGE["outil"] == "cprofile":
+        profils = PROFILAGE["profils"]
+        if PROFILAGE["profileur"] is not None:
+            PROFILAGE["profileur"].disable()
+            profils = [PROFILAGE["profileur"]]
+        fichier = dossier / f"profil_{PROFILAGE['nom']}.pstats"
+        statistiques = pstats.Stats(*profils) if profils else pstats.Stats()
+        statistiques.dump_stats(fichier)
+        fichiers = [str(fichier)]
+        lignes = resume_cprofile(statistiques, top)
+        nb_requetes = PROFILAGE["nb_profilees"]
+    else:
+        fin = tracemalloc.take_snapshot()
+        if not PROFILAGE["deja_actif"]:
+            tracemalloc.stop()
+        fichiers = []
+        for suffixe, instantane in [("debut", PROFILAGE["depart"]), ("fin", fin)]:
+            fichier = dossier / f"memoire_{PROFILAGE['nom']}_{suffixe}.snapshot"
+            instantane.dump(fichier)
+            fichiers.append(str(fichier))
+        lignes = resume_tracemalloc(PROFILAGE["depart"], fin, top)
+        nb_requetes = None
+
+    PROFILAGE["resultat"] = {"Outil": PROFILAGE["outil"], "Nb_Requetes": nb_requetes, "Fichiers": fichiers, "Top": lignes}
+    PROFILAGE.update({"actif": False, "profils": [], "profileur": None, "occupe": False, "depart": None})
+
+def resume_cprofile(statistiques, top):
+    """
+    Les 'top' fonctions au temps cumulé le plus long (temps en millisecondes).
+    """
+    lignes = []
+    for (fichier, numero, fonction), (_, appels, propre, cumule, _) in statistiques.stats.items():
+        lignes.append({
+            "Fonction": f"{Path(fichier).name}:{numero}({fonction})",
+            "Appels": appels,
+            "Propre_ms": round(propre * 1000, 3),
+            "Cumule_ms": round(cumule * 1000, 3)
+        })
+    lignes.sort(key=lambda ligne: -ligne["Cumule_ms"])
+    return lignes[:top]
+
+def resume_tracemalloc(depart, fin, top):
+    """
+    Les 'top' lignes de code dont la mémoire allouée a le plus augmenté pendant la session.
+    """
+    filtres = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    differences = fin.filter_traces(filtres).compare_to(depart.filter_traces(filtres), "lineno")
+    return [{
+        "Emplacement": f"{Path(difference.traceback[0].filename).name}:{difference.traceback[0].lineno}",
+        "Difference_ko": round(difference.size_diff / 1024, 1),
+        "Taille_ko": round(difference.size / 1024, 1),
+        "Blocs": difference.count_diff
+    } for difference in differences[:top]]
+
+def etat():
+    """
+    Renvoie l'état de la session (en cours ou non) et le résumé de la dernière session terminée.
+    """
+    verifier_fin()
+    with VERROU_PROFILAGE:
+        en_cours = None
+        if PROFILAGE["actif"]:
+            en_cours = {"Outil": PROFILAGE["outil"], "Restant": PROFILAGE["restant"],
+                        "Secondes_restantes": None if PROFILAGE["fin"] is None
+                        else round(max(0.0, PROFILAGE["fin"] - time.monotonic()), 1)}
+        return {"En_cours": en_cours, "Resultat": PROFILAGE["resultat"]}
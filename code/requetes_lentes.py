@@ -0,0 +1,147 @@
+"""
+Requetes Lentes
+"""
+
+import json
+import time
+import threading
+import functools
+from pathlib import Path
+from contextlib import contextmanager
+
+"""
+Journal des requêtes lentes : seules les requêtes dont le traitement complet dépasse un seuil y sont écrites,
+avec le détail du temps passé dans chaque phase, pour comprendre les latences extrêmes sans tout journaliser.
+
+Phases d'une requête (en millisecondes) :
+    - "lecture_requete"  : lecture et décodage du fichier requête ;
+    - "attente"          : temps passé dans la file de l'ordonnanceur ;
+    - "controle_droits"  : contrôles du schéma, du rôle et des permissions (Verification_Droit) ;
+    - "stockage"         : temps passé dans les fichiers CSV (blocs mesure_es.ouvrir) ;
+    - "traitement"       : le reste du travail de l'action (index mémoire, tris, ...) ;
+    - "serialisation"    : conversion de la réponse en JSON ;
+    - "ecriture_reponse" : écriture du fichier réponse.
+Les phases imbriquées sont exclusives : le temps du stockage lu pendant un contrôle de droits
+n'est compté qu'une fois, dans "stockage".
+
+Les champs sensibles du corps (mdp, mot_de_passe, nouveau_mdp, ...) sont masqués avant l'écriture.
+
+Enregistrement (une ligne du fichier) :
+    {"horodatage": 1760000000.12, "action": "INFOS_ADMIN", "demandeur": "aoun", "client": "a1b2c3d4",
+     "trace": "9f8e7d6c5b4a3210", "status": 200, "duree_ms": 812.4, "taille_corps": 2, "corps": {},
+     "phases_ms": {"lecture_requete": 0.2, "attente": 0.1, "controle_droits": 0.4, "stockage": 780.1, ...}}
+"""
+
+MOTS_SENSIBLES = ["mdp", "mot_de_passe"] # Toute clé qui contient un de ces mots est masquée
+MASQUE = "***"
+TAILLE_MAX_CORPS = 16 * 1024 # Au-delà (en octets), le corps n'est pas recopié dans le journal
+
+COURANT = threading.local() # COURANT.phases / COURANT.pile : phases de la requête traitée par ce thread
+VERROU_FICHIER = threading.Lock()
+
+def debut(phases=None):
+    """
+    Commence la mesure des phases d'une requête dans ce thread.
+
+    Args:
+        phases (dict|None): Phases déjà mesurées ailleurs (ex: lecture de la requête), en secondes.
+    """
+    COURANT.phases = dict(phases or {})
+    COURANT.pile = []
+
+def fin():
+    """
+    Termine la mesure et renvoie les phases de la requête ({phase: secondes}).
+    """
+    phases = getattr(COURANT, "phases", None)
+    COURANT.phases = None
+    return phases or {}
+
+def ajouter(nom, duree):
+    """
+    Ajoute une durée (secondes) à une phase de la requête en cours, et la retire de la phase englobante.
+    """
+    phases = getattr(COURANT, "phases", None)
+    if phases is None:
+        return
+    phases[nom] = phases.get(nom, 0.0) + duree
+    if COURANT.pile:
+        COURANT.pile[-1][1] += duree
+
+@contextmanager
+def phase(nom):
+    """
+    Mesure le bloc 'with' comme une phase de la requête en cours (rien si aucune requête n'est mesurée).
+    """
+    if getattr(COURANT, "phases", None) is None:
+        yield
+        return
+    cadre = [nom, 0.0] # [phase, durée des phases imbriquées]
+    COURANT.pile.append(cadre)
+    depart = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - depart
+        COURANT.pile.pop()
+        ajouter(nom, duree - cadre[1])
+        if COURANT.pile: # La phase englobante ne doit pas compter ce temps, mais le parent de celle-ci oui
+            COURANT.pile[-1][1] += cadre[1]
+
+def chronometre(nom):
+    """
+    Décorateur : chaque appel de la fonction est mesuré comme la phase 'nom'.
+    """
+    def decorer(fonction):
+        @functools.wraps(fonction)
+        def appel(*args, **kwargs):
+            with phase(nom):
+                return fonction(*args, **kwargs)
+        return appel
+    return decorer
+
+def masquer(valeur):
+    """
+    Copie d'un corps de requête où les champs sensibles (mots de passe) sont remplacés par MASQUE.
+    """
+    if isinstance(valeur, dict):
+        return {cle: MASQUE if any(mot in str(cle).lower() for mot in MOTS_SENSIBLES) else masquer(sous_valeur)
+                for cle, sous_valeur in valeur.items()}
+    if isinstance(valeur, list):
+        return [masquer(element) for element in valeur]
+    return valeur
+
+def enregistrer(fichier, requete, reponse, duree, phases, demandeur=None):
+    """
+    Écrit une requête lente dans le journal dédié (appelé après l'envoi de la réponse : le client n'attend pas).
+
+    Args:
+        fichier (Path): Fichier JSON-lines du journal des requêtes lentes.
+        requete (dict): Le PDU reçu.
+        reponse (dict): La réponse envoyée.
+        duree (float): Durée totale en secondes.
+        phases (dict): {phase: secondes}.
+        demandeur (str|None): Nom donné par la session de la requête (pas celui annoncé par le client).
+
+    Returns:
+        dict: L'enregistrement écrit.
+    """
+    corps = requete.get("corps", {})
+    taille_corps = len(json.dumps(corps, ensure_ascii=False).encode("utf-8")) # Taille du corps en octets (JSON)
+    enregistrement = {
+        "horodatage": time.time(),
+        "action": requete.get("action"),
+        "demandeur": demandeur,
+        "client": requete.get("client"),
+        "trace": requete.get("trace"),
+        "status": reponse.get("status"),
+        "duree_ms": round(duree * 1000, 3),
+        "taille_corps": taille_corps,
+        "corps": masquer(corps) if taille_corps <= TAILLE_MAX_CORPS else {"tronque": True},
+        "phases_ms": {nom: round(valeur * 1000, 3) for nom, valeur in phases.items()}
+    }
+    Path(fichier).parent.mkdir(parents=True, exist_ok=True)
+    with VERROU_FICHIER:
+        with open(fichier, "a", encoding="utf-8") as sortie:
+            sortie.write(json.dumps(enregistrement, ensure_ascii=False) + "\n")
+    return enregistrement
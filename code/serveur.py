@@ -7,35 +7,106 @@ import csv
 import time
 import json
 import shutil
+import hashlib
+import secrets
+import threading
+import multiprocessing
 import mes_fonctions
+import ordonnanceur
+import mesure_es
+import requetes_lentes
+import metriques
+import profilage
+import journal_serveur
+import index_annuaire
 from pathlib import Path
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import connexion_ClientServeur as reseau
 
 DOSSIER_DATA = Path("donnee_serveur")
 FICHIER_COMPTES = DOSSIER_DATA / "comptes.csv"
 FICHIER_PERMISSIONS = DOSSIER_DATA / "permissions.csv"
+FICHIER_GROUPES = DOSSIER_DATA / "groupes.csv"
 DOSSIER_ANNUAIRES = DOSSIER_DATA / "annuaires"
+DOSSIER_JOURNAL = DOSSIER_DATA / "journal"
+DOSSIER_PROFILAGE = DOSSIER_DATA / "profilage"
+DOSSIER_SESSIONS = DOSSIER_DATA / "sessions"
+
+CHAMPS_CONTACT = ["Nom", "Prenom", "Telephone", "Adresse", "Email"]
+
+# Codage des bénéficiaires dans la colonne Utilisateur_Autorise de permissions.csv
+PREFIXE_GROUPE = "@" # "@compta" : tous les membres du groupe 'compta'
+TOUT_LE_MONDE = "*" # Annuaire public : tous les utilisateurs connectés
+
+# Index mémoire des droits (voir index_droits). Reconstruit seulement si permissions.csv ou groupes.csv change.
+INDEX_DROITS = {}
+# Index mémoire des comptes (voir index_comptes). Reconstruit seulement si comptes.csv change.
+INDEX_COMPTES = {}
+# Sessions ouvertes par CONNEXION : jeton -> {"nom", "role", "expire"} (voir ouvrir_session).
+# Chaque PDU est authentifié par son jeton (une recherche dans ce dictionnaire) : le serveur ne croit plus
+# le "demandeur" annoncé par le client, et le rôle gardé dans la session évite de relire comptes.csv.
+SESSIONS = {}
+VERROU_SESSIONS = threading.Lock()
+DUREE_SESSION = 8 * 3600 # Secondes ; au-delà, le client doit se reconnecter
+
+# Pool de threads pour la recherche globale (un annuaire par tâche)
+NB_THREADS_RECHERCHE = 4
+POOL_RECHERCHE = ThreadPoolExecutor(max_workers=NB_THREADS_RECHERCHE, thread_name_prefix="recherche")
+# Cache des résultats de RECHERCHE_CONTACT : (annuaire, version, requête normalisée) -> contacts.
+# Les moins récemment utilisés sont évincés au-delà de TAILLE_CACHE_RECHERCHES entrées, ou de CONTACTS_CACHE_MAX
+# contacts mémorisés au total (quelques recherches larges sur de gros annuaires ne doivent pas remplir la mémoire).
+# Une recherche de plus de CONTACTS_PAR_RECHERCHE_MAX résultats n'est pas mise en cache.
+CACHE_RECHERCHES = OrderedDict()
+TAILLE_CACHE_RECHERCHES = 512
+CONTACTS_CACHE_MAX = 20000
+CONTACTS_PAR_RECHERCHE_MAX = 1000
+TAILLE_CACHE = {"contacts": 0} # Nombre de contacts mémorisés dans CACHE_RECHERCHES
+VERROU_CACHE = threading.Lock()
+
+# Taille du pool de l'ordonnanceur (nombre de lectures traitées en parallèle)
+NB_THREADS_SERVEUR = 8
+# Contrôle d'admission : au-delà de ce nombre de requêtes en attente (au total, puis pour un même utilisateur),
+# le serveur répond tout de suite 503 avec un délai conseillé ("reessayer_dans") au lieu d'allonger la file.
+TAILLE_FILE_SERVEUR = 200
+MAX_REQUETES_PAR_UTILISATEUR = 50
+# Mode multi-processus (pre-fork) : nombre de processus serveur qui se partagent le dossier des requêtes
+NB_PROCESSUS_SERVEUR = os.cpu_count() or 2
+# Au-delà de cette durée (secondes, de la lecture de la requête à l'écriture de la réponse), la requête est écrite
+# dans le journal des requêtes lentes (donnee_serveur/journal/requetes_lentes.jsonl). None : journal désactivé.
+SEUIL_REQUETE_LENTE = 0.5
+# Échéance ("echeance" du PDU, heure time.time() au-delà de laquelle le client n'attend plus) de la requête
+# traitée par ce thread : les traitements longs la vérifient entre leurs étapes (voir echeance_depassee).
+CONTEXTE_REQUETE = threading.local()
+# Vrai dans les processus du mode pre-fork : un autre processus a pu modifier un annuaire,
+# le cache des recherches revérifie donc le fichier (date/taille) avant de servir un résultat.
+MULTI_PROCESSUS = False
 
 """
 Présentation des "status" :
     Succès :
         - 200 (Succès) : Connexion réussie, contact ajouté, liste de contacts récupérée.
         - 201 (Créé) : Uniquement lors de la Création de Compte.
+        - 304 (Non Modifié) : LISTE_CONTACTS avec 'si_version' : l'annuaire n'a pas changé, la liste n'est pas renvoyée.
         
     Erreur :
         - 400 (Mauvaise Requête) : L'utilisateur a oublié de taper le Nom ou le Prénom d'un contact, ou l'action demandée n'existe pas.
-        - 401 (Non Autorisé) : Mauvais mot de passe lors du login, ou tentative d'ajout de contact sans être connecté.
+        - 401 (Non Autorisé) : Mauvais mot de passe lors du login, ou requête sans jeton de session valide (absent, inconnu ou expiré).
         - 403 (Interdit) : C'est le code des Permissions. Si un utilisateur essaie de voir l'annuaire d'un autre mais que celui ci ne lui a pas donné la permission, le serveur renvoie 403.
         - 404 (Non Trouvé) : Utilisé si on cherche l'annuaire d'un utilisateur qui n'existe pas (le fichier .csv est introuvable).
         - 409 (Conflit) : Utilisé lors de la création de compte si le nom d'utilisateur existe déjà. On ne peut pas écraser un compte existant.
         - 500 (Erreur Interne) : Le fichier de réponse JSON est vide, illisible, ou le client n'est pas connecté via connecter_serveur().
+        - 503 (Indisponible) : Serveur hors ligne, ou surchargé (file d'attente pleine) : "reessayer_dans" donne le délai conseillé en secondes.
+        - 504 (Délai dépassé) : L'échéance de la requête est passée (le client n'attend plus) : elle est abandonnée.
 
 Client -> Serveur (Requete) :
     PDU :
         {
             "action": "NOM_DE_L_ACTION",
             "demandeur": "Nom_Utilisateur_Connecté",
+            "jeton": "jeton de session reçu à la CONNEXION (c'est lui qui identifie le demandeur)",
+            "trace": "identifiant de trace du client",
+            "echeance": heure_limite_time_time,
             "corps":{
                 "parametre_1": "valeur",
                 "parametre_2": "valeur"
@@ -47,10 +118,19 @@ Serveur -> Client (Reponse) :
         {
             "status": code_status,
             "message": "Texte explicatif pour l'humain",
-            "donnee": [ ... ]
+            "donnee": [ ... ],
+            "trace": {"id": "identifiant de trace", "recu": ..., "debut": ..., "fin": ...}
         }
 """
 
+def nom_compte_valide(nom):
+    """
+    Vrai si 'nom' peut servir de nom de compte : une chaîne non vide, sans espace autour, et utilisable
+    telle quelle dans le nom du fichier annuaire_<nom>.csv (pas de séparateur de dossier ni de caractère de contrôle).
+    """
+    return (isinstance(nom, str) and nom != "" and nom == nom.strip() and nom not in (".", "..")
+            and not any(caractere in "/\\" or not caractere.isprintable() for caractere in nom))
+
 def Creation_Compte(donnee):
     """
     Crée un nouvel utilisateur dans le fichier CSV des comptes et initialise son fichier annuaire.
@@ -59,24 +139,27 @@ def Creation_Compte(donnee):
         donnee (dict): Contient 'nom', 'mot_de_passe' et 'statut'.
         
     Returns:
-        dict: Réponse PDU avec status 201 (Succès) ou 409 (Compte existant).
+        dict: Réponse PDU avec status 201 (Succès), 400 (Nom invalide) ou 409 (Compte existant).
     """
     nom = donnee.get("nom")
     mdp = donnee.get("mot_de_passe")
     statut = donnee.get("statut")
+    if not nom_compte_valide(nom):
+        return {"status": 400, "message": "Nom de compte invalide"}
     annuaire = DOSSIER_ANNUAIRES / f"annuaire_{nom}.csv"
 
     if FICHIER_COMPTES.exists():
-        with open(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
+        with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
             for ligne in csv.DictReader(fichier):
                 if ligne["Nom"] == nom:
                     return {"status": 409, "message": f"Le compte '{nom}' existe déjà"}
 
-    with open(FICHIER_COMPTES, "a", newline="", encoding="utf-8") as fichier:
+    with mesure_es.ouvrir(FICHIER_COMPTES, "a", newline="", encoding="utf-8") as fichier:
         csv.writer(fichier).writerow([nom, statut, mdp])
 
-    with open(annuaire, "w", encoding="utf-8") as fichier:
+    with mesure_es.ouvrir(annuaire, "w", encoding="utf-8") as fichier:
         fichier.write("Nom,Prenom,Telephone,Adresse,Email\n")
+    invalider_index_comptes()
         
     return {"status": 201, "message": "Compte créé avec succès"}
 
@@ -100,10 +183,11 @@ def Ajout_Contact(donnee, demandeur):
     path = DOSSIER_ANNUAIRES / f"annuaire_{demandeur}.csv"
     # Vérification d'existence du fichier annuaire
     if not path.exists(): return {"status": 404, "message": "Annuaire introuvable"}
+    signature_avant = index_annuaire.signature_fichier(path)
 
     lignes = []
     # Vérification de doublon : On doit lire le fichier avant d'écrire
-    with open(path, "r", encoding="utf-8") as f:
+    with mesure_es.ouvrir(path, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         lignes = list(reader)
         for ligne in lignes:
@@ -111,22 +195,65 @@ def Ajout_Contact(donnee, demandeur):
                  return {"status": 409, "message": "Ce contact existe déjà"}
     
     # ÉCRITURE : Mode "a" (Append). On ajoute juste une ligne à la fin.
-    with open(path, "a", newline="", encoding="utf-8") as fichier:
-        w = csv.DictWriter(fichier, fieldnames=["Nom", "Prenom", "Telephone", "Adresse", "Email"])
+    with mesure_es.ouvrir(path, "a", newline="", encoding="utf-8") as fichier:
+        w = csv.DictWriter(fichier, fieldnames=CHAMPS_CONTACT)
         w.writerow(contact)
+    # L'index de recherche est mis à jour directement (pas de relecture du fichier).
+    index_annuaire.apres_ajout(path, signature_avant, contact)
     return {"status": 200, "message": "Contact ajouté"}
 
+def resultats_en_cache(path, version, requete):
+    """
+    Renvoie une copie des résultats d'une recherche déjà faite sur cette version de l'annuaire, ou None.
+    """
+    if version is None:
+        return None
+    cle = (str(path), version, requete)
+    with VERROU_CACHE:
+        resultats = CACHE_RECHERCHES.get(cle)
+        if resultats is None:
+            return None
+        CACHE_RECHERCHES.move_to_end(cle)
+    return [dict(contact) for contact in resultats]
+
+def mettre_en_cache(path, version, requete, resultats):
+    """
+    Mémorise les résultats d'une recherche sous la version de l'annuaire lue avant de chercher
+    (les entrées des anciennes versions ne sont plus jamais lues et finissent évincées).
+    """
+    if version is None or len(resultats) > CONTACTS_PAR_RECHERCHE_MAX:
+        return
+    cle = (str(path), version, requete)
+    with VERROU_CACHE:
+        ancienne = CACHE_RECHERCHES.pop(cle, None)
+        if ancienne is not None:
+            TAILLE_CACHE["contacts"] -= len(ancienne)
+        CACHE_RECHERCHES[cle] = [dict(contact) for contact in resultats]
+        TAILLE_CACHE["contacts"] += len(resultats)
+        while len(CACHE_RECHERCHES) > TAILLE_CACHE_RECHERCHES or TAILLE_CACHE["contacts"] > CONTACTS_CACHE_MAX:
+            _, evincee = CACHE_RECHERCHES.popitem(last=False)
+            TAILLE_CACHE["contacts"] -= len(evincee)
+
 def Recherche_Contact(donnee, demandeur):
     """
     Effectue une recherche par mot-clé dans l'annuaire d'un utilisateur cible.
     Vérifie d'abord si le demandeur a le droit d'accès.
+    En mode 'approximatif', le terme est comparé au Nom et au Prénom en tolérant des fautes de frappe
+    (résultats triés du plus proche au plus éloigné, avec une clé 'Distance').
     
     Args:
-        donnee (dict): Contient 'proprietaire_cible' et 'recherche' (le terme).
+        donnee (dict): Contient 'proprietaire_cible' et 'recherche' (le terme), et optionnellement :
+                       - 'termes' : autres termes libres, tous obligatoires (ET) ;
+                       - 'filtres' : [{"champ": "Email", "operateur": "finit_par", "valeur": "@mail.com"}, ...]
+                         (opérateurs : egal, commence_par, finit_par, contient) ;
+                       - 'limite' : nombre maximum de résultats ;
+                       - 'champs' : champs à renvoyer pour chaque contact (ex: ["Nom", "Telephone"]) ;
+                       - 'compter' (booléen) : ne renvoie que le nombre de contacts trouvés ({"Total": n}) ;
+                       - 'approximatif' (booléen) et 'distance_max' (1 ou 2, 2 par défaut).
         demandeur (str): Nom de l'utilisateur qui effectue la recherche.
         
     Returns:
-        dict: Liste des contacts correspondants ou code d'erreur (403).
+        dict: Liste des contacts correspondants ou code d'erreur (403, 400).
     """
     cible = donnee.get("proprietaire_cible")
     terme = donnee.get("recherche", "").lower()
@@ -134,37 +261,106 @@ def Recherche_Contact(donnee, demandeur):
     if not Verification_Droit(demandeur, cible):
         return {"status": 403, "message": "Accès refusé"}
 
+    limite = donnee.get("limite")
+    if limite is not None and (not isinstance(limite, int) or isinstance(limite, bool) or limite < 1):
+        return {"status": 400, "message": "Limite invalide"}
+    champs = donnee.get("champs")
+    if champs is not None and (not isinstance(champs, list) or any(champ not in CHAMPS_CONTACT for champ in champs)):
+        return {"status": 400, "message": "Champs invalides"}
+    autres_termes = donnee.get("termes", [])
+    if not isinstance(autres_termes, list) or any(not isinstance(autre, str) for autre in autres_termes):
+        return {"status": 400, "message": "Termes invalides"}
+    filtres_demandes = donnee.get("filtres", [])
+    if not isinstance(filtres_demandes, list) or any(not isinstance(filtre, dict) for filtre in filtres_demandes):
+        return {"status": 400, "message": "Filtres invalides"}
+
     path = DOSSIER_ANNUAIRES / f"annuaire_{cible}.csv"
-    resultats = []
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as fichier:
-            for ligne in csv.DictReader(fichier):
-                if terme in ligne["Nom"].lower() or terme in ligne["Prenom"].lower() or terme in ligne["Telephone"].lower() or terme in ligne["Adresse"].lower() or terme in ligne["Email"].lower():
-                    resultats.append(ligne)
+    if donnee.get("approximatif"):
+        try:
+            distance_max = int(donnee.get("distance_max", 2))
+        except (TypeError, ValueError):
+            return {"status": 400, "message": "Distance invalide"}
+        requete = ("approximatif", terme.strip(), distance_max, limite)
+    else:
+        termes = [terme] + [autre.lower() for autre in autres_termes]
+        filtres = []
+        for filtre in filtres_demandes:
+            champ = filtre.get("champ")
+            operateur = filtre.get("operateur", "contient")
+            if champ not in CHAMPS_CONTACT or operateur not in index_annuaire.OPERATEURS_FILTRE:
+                return {"status": 400, "message": f"Filtre invalide : {champ} {operateur}"}
+            filtres.append((champ, operateur, str(filtre.get("valeur", "")).lower()))
+        # Requête normalisée : l'ordre et les doublons des termes / filtres ne changent pas le résultat (ET).
+        requete = ("filtres", tuple(sorted({t for t in termes if t})), tuple(sorted(set(filtres))), limite)
+        if donnee.get("compter"):
+            return {"status": 200, "donnee": {"Total": index_annuaire.compter(path, list(requete[1]), list(requete[2]))}}
+
+    # Version de l'annuaire prise avant de chercher, après revérification du fichier (il a pu être modifié hors
+    # du serveur, ou par un autre processus) : un résultat n'est jamais rangé sous une version plus récente.
+    entree = index_annuaire.charger(path)
+    version = None if entree is None else entree["version"]
+    resultats = resultats_en_cache(path, version, requete)
+    if resultats is None:
+        if requete[0] == "approximatif":
+            resultats = index_annuaire.rechercher_approx(path, requete[1], requete[2])[:limite]
+        else:
+            # Passe par l'index de trigrammes : seuls les contacts candidats sont vérifiés (plus de parcours complet du fichier).
+            resultats = index_annuaire.rechercher_filtres(path, list(requete[1]), list(requete[2]), limite)
+        mettre_en_cache(path, version, requete, resultats)
+
+    if champs is not None:
+        resultats = [{champ: contact[champ] for champ in champs + ["Distance"] if champ in contact} for contact in resultats]
     return {"status": 200, "donnee": resultats}
 
 def Liste_Contacts(donnee, demandeur):
     """
-    Récupère l'intégralité de l'annuaire d'un utilisateur cible.
+    Récupère l'intégralité de l'annuaire d'un utilisateur cible (ou une page), éventuellement triée.
     Nécessite une vérification des droits d'accès.
     
     Args:
-        donnee (dict): Contient 'proprietaire_cible'.
+        donnee (dict): Contient 'proprietaire_cible', et optionnellement :
+                       - 'tri' : "fichier" (par défaut) ou "nom" (ordre alphabétique Nom puis Prénom) ;
+                       - 'ordre' : "asc" (par défaut) ou "desc" ;
+                       - 'page' (à partir de 1) et 'taille_page' : pagination (la réponse contient alors 'total') ;
+                       - 'si_version' : la 'version' reçue avec une liste précédente.
         demandeur (str): Nom de l'utilisateur qui demande la liste.
         
     Returns:
-        dict: Liste complète des dictionnaires de contacts trouvés.
+        dict: Liste des dictionnaires de contacts trouvés avec la 'version' de l'annuaire,
+              304 sans liste si l'annuaire n'a pas changé depuis 'si_version', ou code d'erreur (403, 404, 400).
     """
     cible = donnee.get("proprietaire_cible")
     if not Verification_Droit(demandeur, cible):
         return {"status": 403, "message": "Accès refusé"}
 
+    tri = donnee.get("tri", "fichier")
+    ordre = donnee.get("ordre", "asc")
+    page = donnee.get("page", 1)
+    taille_page = donnee.get("taille_page")
+    if tri not in ("fichier", "nom") or ordre not in ("asc", "desc"):
+        return {"status": 400, "message": "Tri invalide (tri : fichier/nom, ordre : asc/desc)"}
+    if not isinstance(page, int) or page < 1 or (taille_page is not None and (not isinstance(taille_page, int) or taille_page < 1)):
+        return {"status": 400, "message": "Pagination invalide"}
+
     path = DOSSIER_ANNUAIRES / f"annuaire_{cible}.csv"
-    if not path.exists():
+    # Version lue avant la liste : si une écriture passe entre les deux, le client aura une liste plus récente
+    # que sa version, et la redemandera simplement la prochaine fois (jamais l'inverse).
+    version = index_annuaire.etiquette_annuaire(path)
+    if version is None:
         return {"status": 404, "message": "L'annuaire est Introuvable"}
-    
-    with open(path, "r", encoding="utf-8") as fichier:
-        return {"status": 200, "message": "Liste des contacts transférée au client","donnee": list(csv.DictReader(fichier))}
+    if donnee.get("si_version") == version:
+        return {"status": 304, "message": "Annuaire inchangé depuis la dernière liste", "version": version}
+
+    # Servi depuis l'index mémoire (ordre alphabétique déjà maintenu) : le CSV n'est relu que s'il a changé sur le disque.
+    debut = 0 if taille_page is None else (page - 1) * taille_page
+    resultat = index_annuaire.lister_page(path, tri, ordre == "desc", debut, taille_page)
+    if resultat is None:
+        return {"status": 404, "message": "L'annuaire est Introuvable"}
+    contacts, total = resultat
+    reponse = {"status": 200, "message": "Liste des contacts transférée au client","donnee": contacts, "version": version}
+    if taille_page is not None:
+        reponse["total"] = total
+    return reponse
 """
 --------------------------------------------------------------------------------------------------------
 """
@@ -186,10 +382,11 @@ def Modification_Contact(donnee, demandeur):
     if not path.exists():
         return {"status": 404, "message": "Annuaire introuvable"}
     
+    signature_avant = index_annuaire.signature_fichier(path)
     contacts = []
     modifie = False
     # ÉTAPE 1 : LECTURE
-    with open(path, "r", encoding = "utf-8") as fichier:
+    with mesure_es.ouvrir(path, "r", encoding = "utf-8") as fichier:
         contenu = csv.DictReader(fichier)
         entete = contenu.fieldnames # On sauvegarde les noms de colonnes
         for ligne in contenu:
@@ -204,10 +401,11 @@ def Modification_Contact(donnee, demandeur):
         return {"status": 404, "message": "Contact à modifier non trouvé"}
     # ÉTAPE 2 : ÉCRITURE (Écrasement)
     # Mode "w" (Write) : Efface tout le contenu précédent du fichier !
-    with open(path, "w", newline="", encoding = "utf-8") as fichier:
+    with mesure_es.ouvrir(path, "w", newline="", encoding = "utf-8") as fichier:
         writer = csv.DictWriter(fichier, fieldnames = entete)
         writer.writeheader() # Réécrire les en-têtes (Nom, Prenom...)
         writer.writerows(contacts) # Réécrire toutes les données
+    index_annuaire.apres_modification(path, signature_avant, contact_modifie)
         
     return {"status": 200, "message": "Contact mis à jour"}
 
@@ -228,10 +426,11 @@ def Suppression_Contact(donnee, demandeur):
     if not path.exists():
         return {"status": 404, "message": "Annuaire introuvable"}
     
+    signature_avant = index_annuaire.signature_fichier(path)
     contacts_restants = []
     trouve = False
     
-    with open(path, "r", encoding="utf-8") as f:
+    with mesure_es.ouvrir(path, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames
         for ligne in reader:
@@ -243,17 +442,18 @@ def Suppression_Contact(donnee, demandeur):
     if not trouve:
         return {"status": 404, "message": "Contact introuvable"}
     
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    with mesure_es.ouvrir(path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(contacts_restants)
+    index_annuaire.apres_suppression(path, signature_avant, cible)
         
     return {"status": 200, "message": "Contact supprimé avec succès"}
 
 def Suppression_Compte(donnee):
     """ 3
     Fonction administrative : Supprime un compte utilisateur, son fichier annuaire associé
-    et nettoie toutes les permissions liées (données ou reçues) dans le fichier permissions.
+    et nettoie toutes les permissions liées (données ou reçues) dans le fichier permissions, ainsi que ses appartenances aux groupes.
     
     Args:
         donnee (dict): Contient 'nom_compte' à supprimer.
@@ -267,7 +467,7 @@ def Suppression_Compte(donnee):
     trouve = False
     
     if FICHIER_COMPTES.exists():
-        with open(FICHIER_COMPTES, "r", encoding="utf-8") as f:
+        with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
             fieldnames = reader.fieldnames
             for ligne in reader:
@@ -279,17 +479,20 @@ def Suppression_Compte(donnee):
     if not trouve:
         return {"status": 404, "message": "Compte introuvable"}
 
-    with open(FICHIER_COMPTES, "w", newline="", encoding="utf-8") as f:
+    with mesure_es.ouvrir(FICHIER_COMPTES, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(comptes_restants)
+    invalider_index_comptes()
+    fermer_sessions_compte(cible)
 
     path_annuaire = DOSSIER_ANNUAIRES / f"annuaire_{cible}.csv"
     path_annuaire.unlink(missing_ok=True)
+    index_annuaire.oublier(path_annuaire)
 
     perms_restantes = []
     if FICHIER_PERMISSIONS.exists():
-        with open(FICHIER_PERMISSIONS, "r", encoding="utf-8") as f:
+        with mesure_es.ouvrir(FICHIER_PERMISSIONS, "r", encoding="utf-8") as f:
             reader = csv.reader(f)
             entete = next(reader, None)
             if entete:
@@ -300,10 +503,23 @@ def Suppression_Compte(donnee):
                 if len(ligne) >= 2 and ligne[0] != cible and ligne[1] != cible:
                     perms_restantes.append(ligne)
         
-        with open(FICHIER_PERMISSIONS, "w", newline="", encoding="utf-8") as f:
+        with mesure_es.ouvrir(FICHIER_PERMISSIONS, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             writer.writerows(perms_restantes)
 
+    # Le compte supprimé quitte aussi tous ses groupes.
+    # L'en-tête est réécrit à part : un compte nommé "Membre" ne doit pas l'emporter avec lui.
+    if FICHIER_GROUPES.exists():
+        with mesure_es.ouvrir(FICHIER_GROUPES, "r", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            groupes_restants = [ligne for ligne in reader if len(ligne) >= 2 and ligne[1] != cible]
+        with mesure_es.ouvrir(FICHIER_GROUPES, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Groupe", "Membre"])
+            writer.writerows(groupes_restants)
+
+    invalider_index_droits()
     return {"status": 200, "message": f"Compte {cible} et données supprimés"}
 
 def Modification_Compte(donnee):
@@ -326,7 +542,7 @@ def Modification_Compte(donnee):
     comptes = []
     modifie = False
 
-    with open(FICHIER_COMPTES, "r", encoding="utf-8") as f:
+    with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames
         for ligne in reader:
@@ -341,10 +557,13 @@ def Modification_Compte(donnee):
     if not modifie:
         return {"status": 404, "message": f"Compte '{cible}' introuvable"}
 
-    with open(FICHIER_COMPTES, "w", newline="", encoding="utf-8") as f:
+    with mesure_es.ouvrir(FICHIER_COMPTES, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(comptes)
+    invalider_index_comptes()
+    if nouveau_mdp or nouveau_statut:
+        fermer_sessions_compte(cible) # Le rôle gardé en session n'est plus le bon : reconnexion obligatoire
 
     return {"status": 200, "message": f"Compte '{cible}' mis à jour avec succès"}
 
@@ -358,26 +577,21 @@ def Infos_Admin():
         dict: Liste de dictionnaires contenant les statistiques.
     """
     stats = []
-    nbr_annuaires_consultables = {}
-    if FICHIER_PERMISSIONS.exists():
-        with open(FICHIER_PERMISSIONS, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for ligne in reader:
-                user = ligne.get("Utilisateur_Autorise")
-                if user:
-                    nbr_annuaires_consultables[user] = nbr_annuaires_consultables.get(user, 0) + 1
 
     if FICHIER_COMPTES.exists():
-        with open(FICHIER_COMPTES, "r", encoding="utf-8") as f:
+        with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
             for compte in reader:
+                # Une étape par compte (un annuaire relu à chaque fois) : inutile de continuer si le client est parti.
+                if echeance_depassee():
+                    return reponse_echeance()
                 nom = compte["Nom"]
                 
                 path_cible = DOSSIER_ANNUAIRES / f"annuaire_{nom}.csv"
                 nb_contacts = 0
                 
                 if path_cible.exists():
-                    with open(path_cible, "r", encoding="utf-8") as fa:
+                    with mesure_es.ouvrir(path_cible, "r", encoding="utf-8") as fa:
                         total_lignes = sum(1 for _ in fa)
                         nb_contacts = max(0, total_lignes - 1)
                 
@@ -385,35 +599,86 @@ def Infos_Admin():
                     "Nom": nom,
                     "Statut": compte["Statut"],
                     "Nb_Contacts": nb_contacts,
-                    "Nb_Annuaires": nbr_annuaires_consultables.get(nom, 0)
+                    # Résolu via l'index des droits : compte aussi les accès par groupe et les annuaires publics.
+                    "Nb_Annuaires": len(Verification_Droit(nom))
                 })
                 
     return {"status": 200, "message": "Tableau récapitulatif des données Serveur", "donnee": stats}
 
-def Liste_Proprio(demandeur):
+def Metriques(donnee):
+    """
+    Fonction administrative : renvoie les métriques des requêtes traitées par ce processus serveur
+    (nombre, erreurs par status, durées p50/p95/p99 par action).
+
+    Args:
+        donnee (dict): {"format": "json" (défaut) ou "prometheus"}.
+
+    Returns:
+        dict: Le résumé par action, ou le texte au format Prometheus.
+    """
+    format_sortie = donnee.get("format", "json")
+    if format_sortie == "prometheus":
+        return {"status": 200, "message": "Métriques au format Prometheus", "donnee": metriques.texte_prometheus()}
+    if format_sortie != "json":
+        return {"status": 400, "message": f"Format '{format_sortie}' inconnu (json ou prometheus)"}
+    return {"status": 200, "message": "Métriques des requêtes du serveur", "donnee": metriques.resume()}
+
+def Profilage(donnee):
+    """
+    Fonction administrative : profilage à la demande des prochaines requêtes (voir profilage.py).
+
+    Args:
+        donnee (dict): {"type": "demarrer", "outil": "cprofile"|"tracemalloc", "nb_requetes": N, "duree": T, "top": 15},
+                       {"type": "arreter"} ou {"type": "etat"}.
+
+    Returns:
+        dict: L'état de la session et le résumé (top) de la dernière session terminée.
+    """
+    type_action = donnee.get("type", "etat")
+    if type_action == "demarrer":
+        limites = [donnee.get("nb_requetes"), donnee.get("duree"), donnee.get("top", profilage.TOP_DEFAUT)]
+        if any(limite is not None and (not isinstance(limite, (int, float)) or isinstance(limite, bool) or limite <= 0) for limite in limites):
+            return {"status": 400, "message": "nb_requetes, duree et top doivent être des nombres positifs"}
+        nb_requetes, duree, top = limites
+        if profilage.etat()["En_cours"]:
+            return {"status": 409, "message": "Un profilage est déjà en cours"}
+        erreur = profilage.demarrer(DOSSIER_PROFILAGE, donnee.get("outil", "cprofile"),
+                                    int(nb_requetes) if nb_requetes is not None else None, duree, int(top))
+        if erreur:
+            return {"status": 400, "message": erreur}
+        return {"status": 200, "message": "Profilage démarré", "donnee": profilage.etat()}
+    if type_action == "arreter":
+        profilage.arreter()
+        return {"status": 200, "message": "Profilage arrêté", "donnee": profilage.etat()}
+    if type_action == "etat":
+        return {"status": 200, "message": "État du profilage", "donnee": profilage.etat()}
+    return {"status": 400, "message": "Type inconnu (demarrer, arreter ou etat)"}
+
+def Liste_Proprio(demandeur, compte=None):
     """ 6
     Renvoie la liste des propriétaires d'annuaires que le demandeur a le droit de consulter.
     Utilise Verification_Droit en mode liste.
+    Un administrateur peut demander la liste d'un autre compte ('compte').
     
     Returns:
-        dict: Liste de noms d'utilisateurs.
+        dict: Liste de noms d'utilisateurs, ou 403 si un non-administrateur demande celle d'un autre compte.
     """
+    if compte and compte != demandeur:
+        if role_session() != "administrateur":
+            return {"status": 403, "message": "Action réservée aux administrateurs"}
+        demandeur = compte
     liste = Verification_Droit(demandeur)
     return {"status": 200, "message": "Affichage de la liste des propriétaires", "donnee": liste}
 
 def Liste_Droit(demandeur):
     """ 7
     Renvoie la liste des utilisateurs à qui le demandeur a donné la permission de voir son annuaire.
+    Les groupes apparaissent sous la forme "@groupe" et un annuaire public sous la forme "*".
     
     Returns:
         dict: Liste de noms d'utilisateurs.
     """
-    liste = []
-    if FICHIER_PERMISSIONS.exists():
-        with open(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
-            for ligne in csv.DictReader(fichier):
-                if ligne["Proprietaire"] == demandeur:
-                    liste.append(ligne["Utilisateur_Autorise"])
+    liste = list(index_droits()["autorises"].get(demandeur, []))
     return {"status": 200, "message": "Liste des utilisteurs à qui vous avez donné l'accès à votre annuaire", "donnee": liste}
 
 def Verification_Connexion(donnee):
@@ -424,66 +689,212 @@ def Verification_Connexion(donnee):
         donnee (dict): Identifiants de connexion.
         
     Returns:
-        dict: Status 200 avec le rôle de l'utilisateur si valide, sinon 401.
+        dict: Status 200 avec le rôle de l'utilisateur et son jeton de session si valide, sinon 401.
     """
     if FICHIER_COMPTES.exists():
-        with open(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
+        with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
             for ligne in csv.DictReader(fichier):
                 if ligne["Nom"] == donnee["nom"] and ligne["Mot_de_passe"] == donnee["mdp"]:
-                    return {"status": 200, "message": "Connexion Établie", "role": ligne["Statut"]}
+                    return {"status": 200, "message": "Connexion Établie", "role": ligne["Statut"],
+                            "jeton": ouvrir_session(ligne["Nom"], ligne["Statut"])}
     return {"status": 401, "message": "Connexion Échouée"}
 
+def Deconnexion():
+    """
+    Ferme la session de la requête en cours : son jeton n'est plus accepté.
+    """
+    fermer_session(getattr(CONTEXTE_REQUETE, "jeton", None))
+    return {"status": 200, "message": "Déconnexion effectuée"}
+
+@requetes_lentes.chronometre("controle_droits")
 def Verification_Droit(demandeur, cible=None):
     """ 9
     Vérifie les permissions d'accès aux annuaires.
-    
+    Un accès peut être donné à un utilisateur, à un groupe (dont le demandeur est membre) ou à tout le monde (public).
+
     Modes:
     1. Si 'cible' est fourni : Vérifie si 'demandeur' a le droit de voir l'annuaire de 'cible' (Retourne booléen).
     2. Si 'cible' est None : Retourne la liste de tous les propriétaires que 'demandeur' peut consulter (Retourne liste).
     
     Le propriétaire a toujours accès à son propre annuaire.
     """
+    # Les droits sont résolus via l'index mémoire (accès directs, groupes, annuaires publics)
+    # au lieu de relire permissions.csv à chaque appel.
+    index = index_droits()
+    groupes = index["groupes_par_membre"].get(demandeur, {})
+
     # --- Mode 1 : Vérification d'un accès spécifique ---
     # On a toujours le droit de voir notre propre annuaire.
     if cible is not None:
-        if demandeur == cible: 
+        if demandeur == cible:
+            return True
+        # Annuaire public, accès direct, ou accès via un des groupes du demandeur.
+        if demandeur and cible in index["publics"]:
             return True
-        # Si on regarde chez quelqu'un d'autre, on check le fichier permissions.csv
-        if FICHIER_PERMISSIONS.exists():
-            with open(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
-                for ligne in csv.DictReader(fichier):
-                    # On cherche la ligne exacte : Proprietaire=Cible ET Autorisé=Demandeur
-                    if ligne["Proprietaire"] == cible and ligne["Utilisateur_Autorise"] == demandeur:
-                        return True
+        if cible in index["directs"].get(demandeur, {}):
+            return True
+        for groupe in groupes:
+            if cible in index["par_groupe"].get(groupe, {}):
+                return True
         return False # Si rien trouvé, accès refusé par défaut
 
     # --- Mode 2 : Récupération de tous les droits ---
     else:
-        liste = []
-        if FICHIER_PERMISSIONS.exists():
-            with open(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
-                for ligne in csv.DictReader(fichier):
-                    if ligne["Utilisateur_Autorise"] == demandeur:
-                        liste.append(ligne["Proprietaire"])
-        return liste
+        # Dictionnaire utilisé comme ensemble ordonné : pas de doublon si un annuaire est accessible de plusieurs façons.
+        proprietaires = dict(index["directs"].get(demandeur, {}))
+        for groupe in groupes:
+            proprietaires.update(index["par_groupe"].get(groupe, {}))
+        if demandeur:
+            proprietaires.update(index["publics"])
+        proprietaires.pop(demandeur, None)
+        return list(proprietaires)
+
+def index_droits():
+    """
+    Renvoie l'index mémoire des droits d'accès, reconstruit uniquement si permissions.csv
+    ou groupes.csv a changé depuis la dernière construction.
+    
+    Contenu de l'index (dictionnaires utilisés comme ensembles ordonnés) :
+        - directs : {utilisateur: {proprietaire: None}}  (accès donnés nominativement)
+        - par_groupe : {groupe: {proprietaire: None}}    (accès donnés à un groupe)
+        - publics : {proprietaire: None}                  (annuaires ouverts à tous)
+        - autorises : {proprietaire: [beneficiaires]}    (lignes brutes, pour Liste_Droit)
+        - membres_par_groupe : {groupe: {membre: None}}
+        - groupes_par_membre : {membre: {groupe: None}}
+    
+    Returns:
+        dict: L'index (partagé, ne pas modifier).
+    """
+    signature = (index_annuaire.signature_fichier(FICHIER_PERMISSIONS), index_annuaire.signature_fichier(FICHIER_GROUPES))
+    generations = {str(chemin): index_annuaire.generation(chemin) for chemin in (FICHIER_PERMISSIONS, FICHIER_GROUPES)}
+    if INDEX_DROITS.get("signature") == signature and INDEX_DROITS.get("generations") == generations:
+        return INDEX_DROITS
+
+    directs, par_groupe, publics, autorises = {}, {}, {}, {}
+    if FICHIER_PERMISSIONS.exists():
+        with mesure_es.ouvrir(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
+            for ligne in csv.DictReader(fichier):
+                proprietaire = ligne.get("Proprietaire")
+                autorise = ligne.get("Utilisateur_Autorise")
+                if not proprietaire or not autorise:
+                    continue
+                autorises.setdefault(proprietaire, []).append(autorise)
+                if autorise == TOUT_LE_MONDE:
+                    publics[proprietaire] = None
+                elif autorise.startswith(PREFIXE_GROUPE):
+                    par_groupe.setdefault(autorise[len(PREFIXE_GROUPE):], {})[proprietaire] = None
+                else:
+                    directs.setdefault(autorise, {})[proprietaire] = None
+
+    membres_par_groupe, groupes_par_membre = {}, {}
+    if FICHIER_GROUPES.exists():
+        with mesure_es.ouvrir(FICHIER_GROUPES, "r", encoding="utf-8") as fichier:
+            for ligne in csv.DictReader(fichier):
+                groupe = ligne.get("Groupe")
+                membre = ligne.get("Membre")
+                if groupe and membre:
+                    membres_par_groupe.setdefault(groupe, {})[membre] = None
+                    groupes_par_membre.setdefault(membre, {})[groupe] = None
+
+    # update (sans clear) : un lecteur concurrent ne voit jamais l'index vide
+    INDEX_DROITS.update({
+        "signature": signature,
+        "generations": generations,
+        "directs": directs,
+        "par_groupe": par_groupe,
+        "publics": publics,
+        "autorises": autorises,
+        "membres_par_groupe": membres_par_groupe,
+        "groupes_par_membre": groupes_par_membre
+    })
+    return INDEX_DROITS
+
+def invalider_index_droits():
+    """
+    Force la reconstruction de l'index des droits au prochain appel.
+    À appeler après chaque écriture dans permissions.csv ou groupes.csv (la date de modification
+    d'un fichier n'est pas toujours assez précise pour détecter deux écritures rapprochées).
+    """
+    INDEX_DROITS.clear()
+
+def index_comptes():
+    """
+    Renvoie l'index mémoire des comptes, reconstruit uniquement si comptes.csv a changé.
+    
+    Contenu de l'index :
+        - statuts : {nom: statut}
+        - noms_tries : [(nom en minuscules, nom)] trié, pour l'autocomplétion par préfixe
+    
+    Returns:
+        dict: L'index (partagé, ne pas modifier).
+    """
+    signature = index_annuaire.signature_fichier(FICHIER_COMPTES)
+    generations = {str(FICHIER_COMPTES): index_annuaire.generation(FICHIER_COMPTES)}
+    if INDEX_COMPTES.get("signature") == signature and INDEX_COMPTES.get("generations") == generations:
+        return INDEX_COMPTES
+
+    statuts = {}
+    if FICHIER_COMPTES.exists():
+        with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
+            for ligne in csv.DictReader(fichier):
+                statuts[ligne["Nom"]] = ligne["Statut"]
+
+    # update (sans clear) : un lecteur concurrent ne voit jamais l'index vide
+    INDEX_COMPTES.update({
+        "signature": signature,
+        "generations": generations,
+        "statuts": statuts,
+        "noms_tries": sorted((nom.lower(), nom) for nom in statuts)
+    })
+    return INDEX_COMPTES
+
+def invalider_index_comptes():
+    """
+    Force la reconstruction de l'index des comptes au prochain appel (après une écriture dans comptes.csv).
+    """
+    INDEX_COMPTES.clear()
+
+def apres_ecriture():
+    """
+    Mode multi-processus : appelée par l'ordonnanceur à la fin de chaque écriture, verrou exclusif encore pris.
+    Incrémente la génération de chaque fichier écrit par la requête, pour que les autres processus reconstruisent
+    leurs index de ce fichier (et de lui seul) même si sa signature (mtime, taille) n'a pas changé.
+    Les index de ce processus ont suivi l'écriture : ceux qui étaient à jour le restent, à la nouvelle génération.
+    """
+    for chemin in mesure_es.fichiers_ecrits():
+        ancienne = index_annuaire.generation(chemin)
+        nouvelle = ancienne + 1
+        reseau.ecrire_fichier(index_annuaire.fichier_generation(chemin), str(nouvelle))
+        index_annuaire.avancer_generation(chemin, ancienne, nouvelle)
+        for index in (INDEX_COMPTES, INDEX_DROITS):
+            generations = index.get("generations", {})
+            if generations.get(chemin) == ancienne:
+                generations[chemin] = nouvelle
 
 def Gestion_Permission(donnee, demandeur):
     """ 10
     Ajoute ou retire une permission d'accès dans le fichier 'permissions.csv'.
     Empêche un utilisateur de se cibler lui-même.
-    
+    La colonne Utilisateur_Autorise contient un nom d'utilisateur, "@groupe" pour un groupe, ou "*" pour un annuaire public.
+
     Args:
-        donnee (dict): Contient 'utilisateur_cible' et le type d'action ('donner' ou autre pour retirer).
+        donnee (dict): Contient 'utilisateur_cible', ou 'groupe_cible', ou 'public' (booléen),
+                       et le type d'action ('donner' ou autre pour retirer).
         demandeur (str): L'utilisateur qui gère ses permissions.
-        
+
     Returns:
         dict: Confirmation de l'action.
     """
-    cible = donnee.get("utilisateur_cible")
+    if donnee.get("public"):
+        cible = TOUT_LE_MONDE
+    elif donnee.get("groupe_cible"):
+        cible = PREFIXE_GROUPE + donnee.get("groupe_cible")
+    else:
+        cible = donnee.get("utilisateur_cible")
     action = donnee.get("type")
     colonnes = []
     if FICHIER_PERMISSIONS.exists():
-        with open(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
+        with mesure_es.ouvrir(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
             colonnes = list(csv.reader(fichier))
     
     nouveau = [ligne for ligne in colonnes if not (ligne[0] == demandeur and ligne[1] == cible)]
@@ -493,8 +904,9 @@ def Gestion_Permission(donnee, demandeur):
     else:
         return {"status": 401, "message": "Vous n’avez pas le droit de vous cibler vous-même"}
     
-    with open(FICHIER_PERMISSIONS, "w", newline="", encoding="utf-8") as fichier:
+    with mesure_es.ouvrir(FICHIER_PERMISSIONS, "w", newline="", encoding="utf-8") as fichier:
         csv.writer(fichier).writerows(nouveau)
+    invalider_index_droits()
     return {"status": 200, "message": "Modification Effectuée"}
 
 def Liste_Comptes():
@@ -504,158 +916,898 @@ def Liste_Comptes():
     Returns:
         dict: Liste de chaînes de caractères (noms).
     """
-    comptes = []
-    if FICHIER_COMPTES.exists():
-        with open(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
-            reader = csv.DictReader(fichier)
-            for ligne in reader:
-                comptes.append(ligne["Nom"])
+    comptes = list(index_comptes()["statuts"])
     return {"status": 200, "message": "Affichage de la liste des comptes existants", "donnee": comptes}
 
+def Lot_Contacts(donnee, demandeur):
+    """ 12
+    Applique une liste d'opérations (ajout, modification, suppression) sur l'annuaire du demandeur.
+    Le fichier CSV est lu une seule fois, les opérations sont appliquées en mémoire,
+    puis le fichier est réécrit une seule fois (au lieu d'une réécriture par contact).
+
+    Args:
+        donnee (dict): Contient 'operations', une liste de {"type": "ajout"|"modif"|"suppr", "contact": {...}}.
+        demandeur (str): Nom du propriétaire de l'annuaire.
+
+    Returns:
+        dict: Status 200 avec le résultat de chaque opération dans 'donnee', ou erreur 400/404.
+              Une opération répétant une opération précédente du lot (même type, même Nom/Prénom)
+              n'est pas appliquée : elle est signalée en 409 avec le numéro de la première.
+    """
+    operations = donnee.get("operations")
+    if not isinstance(operations, list):
+        return {"status": 400, "message": "Liste d'opérations requise"}
+
+    path = DOSSIER_ANNUAIRES / f"annuaire_{demandeur}.csv"
+    if not path.exists():
+        return {"status": 404, "message": "Annuaire introuvable"}
+
+    signature_avant = index_annuaire.signature_fichier(path)
+    # ÉTAPE 1 : LECTURE UNIQUE
+    # Les contacts sont indexés par (Nom, Prenom) : chaque opération coûte O(1) au lieu d'un parcours du fichier.
+    with mesure_es.ouvrir(path, "r", encoding="utf-8") as fichier:
+        reader = csv.DictReader(fichier)
+        entete = reader.fieldnames or CHAMPS_CONTACT
+        contacts = {(ligne["Nom"], ligne["Prenom"]): ligne for ligne in reader}
+
+    # ÉTAPE 2 : APPLICATION EN MÉMOIRE
+    resultats = []
+    appliquees = [] # (type, contact) des opérations réussies, pour mettre à jour l'index de recherche
+    premieres = {} # (type, Nom, Prenom) -> numéro de la première opération du lot sur ce contact
+    for numero, operation in enumerate(operations):
+        type_op = operation.get("type") if isinstance(operation, dict) else None
+        contact = (operation.get("contact") if isinstance(operation, dict) else None) or {}
+        cle = (contact.get("Nom"), contact.get("Prenom"))
+        doublon = premieres.setdefault((type_op, *cle), numero) if type_op in ("ajout", "modif", "suppr") else numero
+
+        if doublon != numero:
+            resultat = {"status": 409, "message": f"Opération en double dans le lot (voir opération {doublon})"}
+        elif type_op == "ajout":
+            if not (contact.get("Nom") and contact.get("Prenom") and contact.get("Email")):
+                resultat = {"status": 400, "message": "Nom/Prénom/Email requis"}
+            elif cle in contacts:
+                resultat = {"status": 409, "message": "Ce contact existe déjà"}
+            else:
+                contacts[cle] = {champ: contact.get(champ, "") for champ in entete}
+                resultat = {"status": 200, "message": "Contact ajouté"}
+        elif type_op == "modif":
+            if cle not in contacts:
+                resultat = {"status": 404, "message": "Contact à modifier non trouvé"}
+            else:
+                contacts[cle] = {champ: contact.get(champ, "") for champ in entete}
+                resultat = {"status": 200, "message": "Contact mis à jour"}
+        elif type_op == "suppr":
+            if contacts.pop(cle, None) is None:
+                resultat = {"status": 404, "message": "Contact introuvable"}
+            else:
+                resultat = {"status": 200, "message": "Contact supprimé avec succès"}
+        else:
+            resultat = {"status": 400, "message": "Type d'opération inconnu"}
+
+        if resultat["status"] == 200:
+            appliquees.append((type_op, contacts.get(cle, contact)))
+        resultat["numero"] = numero
+        resultats.append(resultat)
+
+    # ÉTAPE 3 : ÉCRITURE UNIQUE (seulement si quelque chose a changé)
+    if appliquees:
+        with mesure_es.ouvrir(path, "w", newline="", encoding="utf-8") as fichier:
+            writer = csv.DictWriter(fichier, fieldnames=entete)
+            writer.writeheader()
+            writer.writerows(contacts.values())
+        index_annuaire.apres_lot(path, signature_avant, appliquees)
+
+    return {"status": 200, "message": f"{len(appliquees)}/{len(operations)} opération(s) appliquée(s)", "donnee": resultats}
+
+def Creation_Comptes_Lot(donnee):
+    """ 13
+    Fonction administrative : Crée plusieurs comptes en une seule requête (import d'une liste d'utilisateurs).
+    Le fichier des comptes est lu une seule fois pour construire l'index des noms existants, tous les comptes
+    du lot sont vérifiés, puis les annuaires vides sont créés et les nouvelles lignes ajoutées en une seule écriture.
+    Un compte n'est inscrit dans comptes.csv que si son annuaire a pu être créé.
+
+    Args:
+        donnee (dict): Contient 'comptes', une liste de {"nom", "mot_de_passe", "statut"}.
+
+    Returns:
+        dict: Status 201 si au moins un compte a été créé (200 sinon), avec le résultat de chaque compte dans 'donnee'
+              (201, 400 nom/statut invalide, 409 compte existant ou en double dans le lot, 500 annuaire non créé).
+    """
+    comptes = donnee.get("comptes")
+    if not isinstance(comptes, list):
+        return {"status": 400, "message": "Liste de comptes requise"}
+
+    # Index des noms déjà pris : une seule lecture de comptes.csv pour tout le lot.
+    noms_pris = set()
+    if FICHIER_COMPTES.exists():
+        with mesure_es.ouvrir(FICHIER_COMPTES, "r", encoding="utf-8") as fichier:
+            noms_pris = {ligne["Nom"] for ligne in csv.DictReader(fichier)}
+
+    # 1. Vérification de tout le lot avant d'écrire quoi que ce soit
+    resultats = []
+    valides = [] # (resultat, ligne de comptes.csv)
+    noms_du_lot = set()
+    for compte in comptes:
+        compte = compte if isinstance(compte, dict) else {}
+        nom = compte.get("nom")
+        mdp = compte.get("mot_de_passe")
+        statut = compte.get("statut") or "utilisateur"
+
+        if not nom or not mdp:
+            resultat = {"status": 400, "message": "Nom et mot de passe requis"}
+        elif not nom_compte_valide(nom):
+            resultat = {"status": 400, "message": "Nom de compte invalide"}
+        elif statut not in ["administrateur", "utilisateur"]:
+            resultat = {"status": 400, "message": f"Statut '{statut}' invalide"}
+        elif nom in noms_du_lot:
+            resultat = {"status": 409, "message": f"Le compte '{nom}' est en double dans le lot"}
+        elif nom in noms_pris:
+            resultat = {"status": 409, "message": f"Le compte '{nom}' existe déjà"}
+        else:
+            noms_du_lot.add(nom)
+            resultat = {"status": 201, "message": "Compte créé avec succès"}
+            valides.append((resultat, [nom, statut, mdp]))
+        resultat["nom"] = nom
+        resultats.append(resultat)
+
+    # 2. Annuaires vides d'abord : un compte dont l'annuaire n'a pas pu être créé n'est pas inscrit
+    entete = ",".join(CHAMPS_CONTACT) + "\n"
+    nouvelles_lignes = []
+    for resultat, ligne in valides:
+        try:
+            with mesure_es.ouvrir(DOSSIER_ANNUAIRES / f"annuaire_{ligne[0]}.csv", "w", encoding="utf-8") as fichier:
+                fichier.write(entete)
+        except OSError as e:
+            resultat.update({"status": 500, "message": f"Annuaire non créé : {e}"})
+            continue
+        nouvelles_lignes.append(ligne)
+
+    # 3. Inscription des comptes en une seule écriture (en cas d'échec, les annuaires créés sont retirés)
+    if nouvelles_lignes:
+        try:
+            with mesure_es.ouvrir(FICHIER_COMPTES, "a", newline="", encoding="utf-8") as fichier:
+                csv.writer(fichier).writerows(nouvelles_lignes)
+        except OSError:
+            for ligne in nouvelles_lignes:
+                (DOSSIER_ANNUAIRES / f"annuaire_{ligne[0]}.csv").unlink(missing_ok=True)
+            raise
+        finally:
+            invalider_index_comptes()
+
+    status = 201 if nouvelles_lignes else 200
+    return {"status": status, "message": f"{len(nouvelles_lignes)}/{len(comptes)} compte(s) créé(s)", "donnee": resultats}
+
+def Gestion_Groupe(donnee):
+    """ 14
+    Fonction administrative : Gère les groupes de partage (ex: un service, une promo).
+    Un groupe existe tant qu'il a au moins un membre. Partager son annuaire avec "@groupe"
+    remplace une ligne de permissions.csv par membre.
+    
+    Args:
+        donnee (dict): Contient 'groupe', 'membre' et 'type' ('ajouter', 'retirer' ou 'supprimer').
+        
+    Returns:
+        dict: Confirmation de l'action, ou erreur 400/404.
+    """
+    groupe = donnee.get("groupe")
+    membre = donnee.get("membre")
+    action = donnee.get("type")
+
+    if not groupe or PREFIXE_GROUPE in groupe or groupe == TOUT_LE_MONDE:
+        return {"status": 400, "message": "Nom de groupe invalide"}
+    if action in ["ajouter", "retirer"] and not membre:
+        return {"status": 400, "message": "Membre requis"}
+    if action not in ["ajouter", "retirer", "supprimer"]:
+        return {"status": 400, "message": "Type d'action inconnu"}
+
+    if action == "ajouter" and membre not in Liste_Comptes()["donnee"]:
+        return {"status": 404, "message": f"Compte '{membre}' introuvable"}
+
+    lignes = []
+    if FICHIER_GROUPES.exists():
+        with mesure_es.ouvrir(FICHIER_GROUPES, "r", encoding="utf-8") as fichier:
+            # On saute l'en-tête, et les lignes vides ou incomplètes
+            lignes = [ligne for ligne in list(csv.reader(fichier))[1:] if len(ligne) >= 2]
+
+    if action == "supprimer":
+        nouveau = [ligne for ligne in lignes if ligne[0] != groupe]
+    else:
+        nouveau = [ligne for ligne in lignes if not (ligne[0] == groupe and ligne[1] == membre)]
+        if action == "ajouter":
+            nouveau.append([groupe, membre])
+
+    if len(nouveau) == len(lignes) and action != "ajouter":
+        return {"status": 404, "message": "Groupe ou membre introuvable"}
+
+    with mesure_es.ouvrir(FICHIER_GROUPES, "w", newline="", encoding="utf-8") as fichier:
+        writer = csv.writer(fichier)
+        writer.writerow(["Groupe", "Membre"])
+        writer.writerows(nouveau)
+
+    # Supprimer un groupe retire aussi les accès qui lui avaient été donnés.
+    if action == "supprimer" and FICHIER_PERMISSIONS.exists():
+        with mesure_es.ouvrir(FICHIER_PERMISSIONS, "r", encoding="utf-8") as fichier:
+            perms = [ligne for ligne in csv.reader(fichier) if len(ligne) < 2 or ligne[1] != PREFIXE_GROUPE + groupe]
+        with mesure_es.ouvrir(FICHIER_PERMISSIONS, "w", newline="", encoding="utf-8") as fichier:
+            csv.writer(fichier).writerows(perms)
+
+    invalider_index_droits()
+    return {"status": 200, "message": f"Groupe '{groupe}' mis à jour"}
+
+def Liste_Groupes():
+    """ 15
+    Renvoie tous les groupes de partage et leurs membres (servi depuis l'index des droits).
+    
+    Returns:
+        dict: Liste de {"Groupe": nom, "Membres": [noms]}.
+    """
+    groupes = [{"Groupe": groupe, "Membres": list(membres)} for groupe, membres in index_droits()["membres_par_groupe"].items()]
+    return {"status": 200, "message": "Affichage de la liste des groupes", "donnee": groupes}
+
+def Recherche_Globale(donnee, demandeur):
+    """ 17
+    Recherche un mot-clé dans TOUS les annuaires que le demandeur peut consulter (le sien compris),
+    en une seule requête. Les annuaires sont parcourus en parallèle sur le pool de threads
+    (chacun via son index de trigrammes), puis les résultats sont fusionnés.
+    
+    Args:
+        donnee (dict): Contient 'recherche' (le terme) et 'limite' (optionnel, 100 par défaut).
+        demandeur (str): Nom de l'utilisateur qui effectue la recherche.
+        
+    Returns:
+        dict: Liste des contacts trouvés, chacun avec une clé 'Proprietaire' (l'annuaire d'origine).
+    """
+    terme = (donnee.get("recherche") or "").lower()
+    try:
+        limite = max(1, int(donnee.get("limite", 100)))
+    except (TypeError, ValueError):
+        return {"status": 400, "message": "Limite invalide"}
+
+    # Résolution des annuaires accessibles : le sien + Verification_Droit en mode liste.
+    proprietaires = [demandeur] + [nom for nom in Verification_Droit(demandeur) if nom != demandeur]
+    taches = [(proprietaire, POOL_RECHERCHE.submit(mesure_es.transmettre(index_annuaire.rechercher), DOSSIER_ANNUAIRES / f"annuaire_{proprietaire}.csv", terme))
+              for proprietaire in proprietaires]
+
+    resultats = []
+    tronque = False
+    # Fusion dans l'ordre des propriétaires (résultat stable d'une requête à l'autre).
+    for proprietaire, tache in taches:
+        if tronque or echeance_depassee():
+            tache.cancel() # Inutile de finir les annuaires restants : la limite (ou l'échéance) est atteinte
+            continue
+        for contact in tache.result():
+            if len(resultats) >= limite:
+                tronque = True
+                break
+            contact["Proprietaire"] = proprietaire
+            resultats.append(contact)
+
+    if echeance_depassee():
+        return reponse_echeance()
+    message = f"{len(resultats)} contact(s) trouvé(s) dans {len(proprietaires)} annuaire(s)"
+    if tronque:
+        message += f" (limité à {limite})"
+    return {"status": 200, "message": message, "donnee": resultats}
+
+def Recherche_Telephone(donnee, demandeur):
+    """ 18
+    Recherche inversée par numéro de téléphone ("À qui est ce numéro ?") dans tous les annuaires consultables.
+    Le numéro est normalisé (espaces, points, +33 / 0) puis cherché directement dans l'index des téléphones
+    de chaque annuaire autorisé (le sien + Verification_Droit en mode liste) : pas de parcours des contacts.
+    Un annuaire modifié depuis la dernière recherche est relu ; l'échéance est vérifiée entre deux annuaires.
+    
+    Args:
+        donnee (dict): Contient 'telephone'.
+        demandeur (str): Nom de l'utilisateur qui effectue la recherche.
+        
+    Returns:
+        dict: Liste des contacts ayant ce numéro, chacun avec une clé 'Proprietaire'.
+    """
+    telephone = donnee.get("telephone") or ""
+    if not index_annuaire.normaliser_telephone(telephone):
+        return {"status": 400, "message": "Numéro de téléphone requis"}
+
+    resultats = []
+    for proprietaire in [demandeur] + Verification_Droit(demandeur):
+        if echeance_depassee():
+            return reponse_echeance()
+        for contact in index_annuaire.chercher_telephone(DOSSIER_ANNUAIRES / f"annuaire_{proprietaire}.csv", telephone):
+            contact["Proprietaire"] = proprietaire
+            resultats.append(contact)
+    return {"status": 200, "message": f"{len(resultats)} contact(s) avec ce numéro", "donnee": resultats}
+
+def Autocompletion(donnee, demandeur):
+    """ 16
+    Suggère les noms commençant par un préfixe, pendant que l'utilisateur tape.
+    Servi depuis des listes triées tenues à jour en mémoire (recherche dichotomique, pas de lecture de fichier).
+    
+    Args:
+        donnee (dict): Contient 'prefixe', 'type' ('contacts' ou 'comptes'), 'limite' (optionnel, 10 par défaut)
+                       et 'proprietaire_cible' pour les contacts (par défaut : le demandeur).
+        demandeur (str): Nom de l'utilisateur connecté.
+        
+    Returns:
+        dict: Liste des suggestions (ordre alphabétique), ou 403 si l'annuaire n'est pas consultable.
+    """
+    prefixe = donnee.get("prefixe") or ""
+    try:
+        limite = max(1, min(int(donnee.get("limite", 10)), 50))
+    except (TypeError, ValueError):
+        return {"status": 400, "message": "Limite invalide"}
+
+    if donnee.get("type") == "comptes":
+        suggestions = index_annuaire.prefixe_trie(index_comptes()["noms_tries"], prefixe.lower(), limite)
+        return {"status": 200, "message": "Suggestions de comptes", "donnee": suggestions}
+
+    cible = donnee.get("proprietaire_cible") or demandeur
+    if not Verification_Droit(demandeur, cible):
+        return {"status": 403, "message": "Accès refusé"}
+    path = DOSSIER_ANNUAIRES / f"annuaire_{cible}.csv"
+    return {"status": 200, "message": "Suggestions de contacts", "donnee": index_annuaire.autocompleter(path, prefixe, limite)}
+
 """
 ---------------------------------------------------------------------------------------------------------
 """
 
-def recevoir_pdu(requete):
+def ouvrir_session(nom, role):
+    """
+    Ouvre une session pour un utilisateur authentifié, valable DUREE_SESSION secondes.
+    En mode multi-processus, la session est aussi écrite dans DOSSIER_SESSIONS pour les autres processus.
+
+    Args:
+        nom (str): Nom du compte.
+        role (str): Statut du compte (ex: "administrateur"), gardé pour les contrôles de rôle.
+
+    Returns:
+        str: Le jeton de session, à joindre à chaque PDU.
+    """
+    jeton = secrets.token_hex(16)
+    maintenant = time.time()
+    session = {"nom": nom, "role": role, "expire": maintenant + DUREE_SESSION}
+    with VERROU_SESSIONS:
+        # Les sessions expirées sont purgées ici (à la connexion) : la validation d'un PDU reste une simple recherche.
+        for ancien in [cle for cle, valeur in SESSIONS.items() if valeur["expire"] <= maintenant]:
+            del SESSIONS[ancien]
+        SESSIONS[jeton] = session
+    if MULTI_PROCESSUS:
+        DOSSIER_SESSIONS.mkdir(parents=True, exist_ok=True)
+        reseau.ecrire_json(fichier_session(jeton), session)
+    return jeton
+
+def fichier_session(jeton):
+    """
+    Fichier d'une session en mode multi-processus. Il est nommé par l'empreinte SHA-256 du jeton, jamais par le jeton :
+    lister donnee_serveur/sessions/ (accessible aux clients) ne doit pas suffire à reprendre une session.
+    """
+    return DOSSIER_SESSIONS / f"{hashlib.sha256(jeton.encode()).hexdigest()}.json"
+
+def session_valide(jeton):
+    """
+    Renvoie la session d'un jeton, ou None s'il est absent, inconnu ou expiré.
+    En mode multi-processus, le fichier de la session fait foi : elle a pu être ouverte ou fermée par un autre processus.
+    """
+    if not isinstance(jeton, str) or not jeton.isalnum():
+        return None
+    session = SESSIONS.get(jeton)
+    if MULTI_PROCESSUS:
+        fichier = fichier_session(jeton)
+        if session is None:
+            try:
+                with open(fichier, "r", encoding="utf-8") as f:
+                    session = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with VERROU_SESSIONS:
+                SESSIONS[jeton] = session
+        elif not fichier.exists():
+            with VERROU_SESSIONS:
+                SESSIONS.pop(jeton, None)
+            return None
+    if session is None:
+        return None
+    if session["expire"] <= time.time():
+        fermer_session(jeton)
+        return None
+    return session
+
+def fermer_session(jeton):
+    """
+    Ferme une session (déconnexion ou expiration).
+    """
+    if not isinstance(jeton, str) or not jeton.isalnum():
+        return
+    with VERROU_SESSIONS:
+        SESSIONS.pop(jeton, None)
+    fichier_session(jeton).unlink(missing_ok=True)
+
+def fermer_sessions_compte(nom):
+    """
+    Ferme toutes les sessions d'un compte (compte supprimé, mot de passe ou rôle modifié).
+    """
+    with VERROU_SESSIONS:
+        for jeton in [cle for cle, valeur in SESSIONS.items() if valeur["nom"] == nom]:
+            del SESSIONS[jeton]
+    if DOSSIER_SESSIONS.exists():
+        for fichier in DOSSIER_SESSIONS.glob("*.json"):
+            try:
+                with open(fichier, "r", encoding="utf-8") as f:
+                    proprietaire = json.load(f).get("nom")
+            except (OSError, ValueError):
+                continue
+            if proprietaire == nom:
+                fichier.unlink(missing_ok=True)
+
+def effacer_sessions():
+    """
+    Ferme toutes les sessions (au démarrage du serveur : les jetons d'une exécution précédente ne valent plus rien).
+    """
+    with VERROU_SESSIONS:
+        SESSIONS.clear()
+    shutil.rmtree(DOSSIER_SESSIONS, ignore_errors=True)
+
+def session_depot(depot):
+    """
+    Session d'une requête déposée, résolue une seule fois (par ecouter, à la lecture) puis gardée dans le dépôt.
+    """
+    if "session" not in depot:
+        depot["session"] = session_valide(depot["requete"].get("jeton"))
+    return depot["session"]
+
+def demandeur_depot(depot):
+    """
+    Nom de l'utilisateur authentifié d'une requête déposée, ou None (jamais le "demandeur" annoncé par le client).
+    """
+    session = session_depot(depot)
+    return session["nom"] if session else None
+
+def role_session():
+    """
+    Rôle gardé dans la session de la requête traitée par ce thread (None sans session).
+    """
+    session = getattr(CONTEXTE_REQUETE, "session", None)
+    return session["role"] if session else None
+
+def echeance_requete(requete):
+    """
+    Renvoie l'échéance d'un PDU (heure time.time()), ou None s'il n'en a pas.
+    """
+    echeance = requete.get("echeance")
+    return echeance if isinstance(echeance, (int, float)) and not isinstance(echeance, bool) else None
+
+def echeance_depassee(requete=None):
+    """
+    Vrai si l'échéance d'une requête est passée : celle du PDU donné, ou à défaut celle de la requête traitée par ce thread.
+    """
+    echeance = echeance_requete(requete) if requete is not None else getattr(CONTEXTE_REQUETE, "echeance", None)
+    return echeance is not None and time.time() > echeance
+
+def reponse_echeance():
+    """
+    Réponse d'une requête abandonnée parce que son échéance est passée (elle n'est pas envoyée au client).
+    """
+    return {"status": 504, "message": "Échéance dépassée : requête abandonnée"}
+
+# Registre des actions du routeur : action -> {"fonction", "role", "schema", "cible", "identifiant", "middlewares",
+#                                              "lecture", "ressource", "session"}
+# (rempli par enregistrer_action, voir plus bas). Une action absente du registre est refusée directement.
+ACTIONS = {}
+# Middlewares appliqués à toutes les actions, dans l'ordre (le premier est le plus extérieur)
+MIDDLEWARES_GLOBAUX = []
+
+def enregistrer_action(action, fonction, role=None, schema=None, cible=None, identifiant=None, middlewares=None,
+                       lecture=False, ressource="serveur", session=True):
+    """
+    Ajoute (ou remplace) une action dans le registre du routeur.
+    Une nouvelle action s'ajoute ici, sans toucher à recevoir_pdu.
+
+    Args:
+        action (str): Nom de l'action dans le PDU (ex: "AJOUT_CONTACT").
+        fonction (callable): Appelée avec (corps, demandeur), renvoie le dictionnaire réponse.
+        role (str|None): Statut exigé du demandeur (ex: "administrateur"), None si tout le monde peut l'appeler.
+        schema (dict|None): Champs obligatoires du corps et leur type (ex: {"contact": dict}).
+        cible (str|None): Champ du corps affiché comme "Cible" dans les logs.
+        identifiant (callable|None): Calcule, à partir du corps, le nom affiché dans les logs (par défaut : le demandeur).
+        middlewares (list|None): Middlewares propres à l'action, exécutés après les middlewares globaux.
+        lecture (bool): True si l'action ne modifie rien (elle peut alors tourner en parallèle d'autres lectures).
+        ressource (str|callable): Pour une écriture, ce qu'elle modifie (ex: "comptes"), ou une fonction
+                                  (corps, demandeur) -> ressource. Les écritures d'une même ressource passent dans l'ordre
+                                  d'arrivée (et toutes les écritures du serveur une par une).
+        session (bool): False si l'action s'appelle sans jeton de session (CONNEXION).
+    """
+    ACTIONS[action] = {
+        "nom": action,
+        "fonction": fonction,
+        "role": role,
+        "schema": schema or {},
+        "cible": cible,
+        "identifiant": identifiant,
+        "middlewares": list(middlewares or []),
+        "lecture": lecture,
+        "ressource": ressource,
+        "session": session
+    }
+
+def ajouter_middleware(middleware, action=None):
+    """
+    Branche un middleware sur une action précise, ou sur toutes les actions si 'action' est None.
+    Un middleware est une fonction (entree_action, corps, demandeur, suivant) -> réponse, qui appelle
+    suivant(corps, demandeur) pour continuer (ou renvoie directement une réponse pour court-circuiter).
+    """
+    if action is None:
+        MIDDLEWARES_GLOBAUX.append(middleware)
+    else:
+        ACTIONS[action]["middlewares"].append(middleware)
+
+def controle_schema(entree_action, corps, demandeur, suivant):
+    """
+    Middleware : refuse (400) un corps auquel il manque un champ obligatoire, ou de mauvais type.
+    """
+    with requetes_lentes.phase("controle_droits"):
+        if not isinstance(corps, dict):
+            return {"status": 400, "message": "Corps de requête invalide"}
+        for champ, type_attendu in entree_action["schema"].items():
+            if not isinstance(corps.get(champ), type_attendu):
+                return {"status": 400, "message": f"Champ '{champ}' manquant ou invalide"}
+    return suivant(corps, demandeur)
+
+def controle_role(entree_action, corps, demandeur, suivant):
+    """
+    Middleware : refuse (403) une action réservée à un rôle si le demandeur n'a pas ce statut.
+    Le rôle vient de la session (voir role_session) : ni le client ni comptes.csv ne sont consultés.
+    """
+    role = entree_action["role"]
+    with requetes_lentes.phase("controle_droits"):
+        refuse = role is not None and role_session() != role
+    if refuse:
+        return {"status": 403, "message": "Action réservée aux administrateurs"}
+    return suivant(corps, demandeur)
+
+def executer_action(entree_action, corps, demandeur):
+    """
+    Appelle la fonction d'une action à travers ses middlewares (globaux puis propres à l'action).
+    """
+    def chainer(middleware, suivant):
+        return lambda corps, demandeur: middleware(entree_action, corps, demandeur, suivant)
+
+    appel = entree_action["fonction"]
+    for middleware in reversed(MIDDLEWARES_GLOBAUX + entree_action["middlewares"]):
+        appel = chainer(middleware, appel)
+    return appel(corps, demandeur)
+
+# Contrôles communs à toutes les actions : d'abord le schéma du corps, puis le rôle.
+ajouter_middleware(controle_schema)
+ajouter_middleware(controle_role)
+
+def ressource_annuaire(corps, demandeur):
+    """
+    Ressource modifiée par les actions sur les contacts : l'annuaire du demandeur.
+    """
+    return f"annuaire_{demandeur}"
+
+def classer_requete(requete, demandeur=None):
+    """
+    Indique à l'ordonnanceur si une requête est une lecture, et sinon quelle ressource elle modifie.
+    'demandeur' est le nom donné par la session (voir demandeur_depot).
+
+    Returns:
+        tuple: (lecture (bool), ressource (str|None)).
+    """
+    entree_action = ACTIONS.get(requete.get("action"))
+    if entree_action is None or entree_action["lecture"]:
+        return True, None # Une action inconnue est refusée sans rien modifier
+    ressource = entree_action["ressource"]
+    if callable(ressource):
+        ressource = ressource(requete.get("corps", {}), demandeur)
+    return False, ressource
+
+# --- Enregistrement des actions ---
+# Vérifie login/mdp dans comptes.csv
+enregistrer_action("CONNEXION", lambda corps, demandeur: Verification_Connexion(corps),
+                   schema={"nom": str, "mdp": str}, identifiant=lambda corps: corps.get("nom", "Inconnu"), lecture=True,
+                   session=False)
+# Ferme la session du client (son jeton n'est plus accepté)
+enregistrer_action("DECONNEXION", lambda corps, demandeur: Deconnexion(), lecture=True)
+# Crée une ligne dans comptes.csv + un fichier vide annuaire_X.csv
+enregistrer_action("CREATION_COMPTE", lambda corps, demandeur: Creation_Compte(corps),
+                   role="administrateur", identifiant=lambda corps: corps.get("nom", "Nouveau Compte"), ressource="comptes")
+# Import de plusieurs comptes d'un coup (onboarding).
+# Une lecture de comptes.csv, une écriture groupée, puis création des annuaires vides.
+enregistrer_action("CREATION_COMPTES_LOT", lambda corps, demandeur: Creation_Comptes_Lot(corps),
+                   role="administrateur", schema={"comptes": list}, ressource="comptes")
+# Ajoute une ligne dans annuaire_demandeur.csv
+enregistrer_action("AJOUT_CONTACT", Ajout_Contact, schema={"contact": dict}, ressource=ressource_annuaire)
+# Lit annuaire_cible.csv et filtre les résultats
+# Note : demandeur est passé en paramètre pour vérifier les droits d'abord !
+enregistrer_action("RECHERCHE_CONTACT", Recherche_Contact, schema={"proprietaire_cible": str}, cible="proprietaire_cible",
+                   lecture=True)
+# Recherche dans tous les annuaires consultables en une seule requête (en parallèle).
+enregistrer_action("RECHERCHE_GLOBALE", Recherche_Globale, lecture=True)
+# "À qui est ce numéro ?" : recherche inversée via l'index des téléphones.
+enregistrer_action("RECHERCHE_TELEPHONE", Recherche_Telephone, lecture=True)
+# Suggestions de noms (contacts d'un annuaire consultable, ou comptes) pour un début de mot.
+enregistrer_action("AUTOCOMPLETE", Autocompletion, cible="proprietaire_cible", lecture=True)
+# Le client veut lister un annuaire entier.
+# Note : On passe 'demandeur' à la fonction pour vérifier s'il a le droit
+enregistrer_action("LISTE_CONTACTS", Liste_Contacts, schema={"proprietaire_cible": str}, cible="proprietaire_cible",
+                   lecture=True)
+# Action de partage : Donner ou retirer le droit de voir son annuaire.
+# C'est une modification du fichier 'permissions.csv'.
+enregistrer_action("GERER_PERMISSION", Gestion_Permission, ressource="permissions")
+# Demande de mise à jour d'un contact existant (ex: changement de numéro).
+# Le serveur va réécrire le fichier CSV de l'utilisateur.
+enregistrer_action("MODIF_CONTACT", Modification_Contact, schema={"contact": dict}, ressource=ressource_annuaire)
+# Demande de suppression.
+# Le serveur va chercher le contact et réécrire le fichier sans lui.
+enregistrer_action("SUPPR_CONTACT", Suppression_Contact, schema={"contact": dict}, ressource=ressource_annuaire)
+# Plusieurs ajouts/modifications/suppressions en une seule requête.
+# Le fichier CSV n'est lu et réécrit qu'une seule fois pour tout le lot.
+enregistrer_action("LOT_CONTACTS", Lot_Contacts, schema={"operations": list}, ressource=ressource_annuaire)
+# "Qui ai-je le droit de regarder ?"
+# Sert à remplir le menu "Annuaire Consultable" côté client (et, pour un admin, à voir les accès d'un autre compte).
+enregistrer_action("LISTE_PROPRIO", lambda corps, demandeur: Liste_Proprio(demandeur, corps.get("compte")), lecture=True)
+# "Qui existe sur ce serveur ?"
+# Sert à l'autocomplétion ou pour choisir à qui donner une permission.
+enregistrer_action("LISTE_COMPTES", lambda corps, demandeur: Liste_Comptes(), lecture=True)
+# Admin : ajoute/retire un membre d'un groupe de partage, ou supprime le groupe.
+enregistrer_action("GERER_GROUPE", lambda corps, demandeur: Gestion_Groupe(corps), role="administrateur", ressource="groupes")
+# "Quels groupes existent ?" Sert à choisir un groupe avec qui partager son annuaire.
+enregistrer_action("LISTE_GROUPES", lambda corps, demandeur: Liste_Groupes(), lecture=True)
+# "Qui a le droit de me regarder ?"
+# Sert à afficher la liste dans le menu "Gérer Permissions" -> "Retirer".
+enregistrer_action("LISTE_DROIT", lambda corps, demandeur: Liste_Droit(demandeur), lecture=True)
+# DANGER : Supprime une ligne dans comptes.csv, supprime le fichier annuaire_X.csv
+# et nettoie permissions.csv. Irréversible.
+enregistrer_action("SUPPRESSION_COMPTE", lambda corps, demandeur: Suppression_Compte(corps),
+                   role="administrateur", schema={"nom_compte": str}, ressource="comptes")
+# Changement de mot de passe ou de rôle (Admin/User).
+# Appel la fonction qui modifie 'comptes.csv'.
+enregistrer_action("MODIF_COMPTE", lambda corps, demandeur: Modification_Compte(corps),
+                   role="administrateur", ressource="comptes")
+# Demande de statistiques globales (Tableau de bord).
+enregistrer_action("INFOS_ADMIN", lambda corps, demandeur: Infos_Admin(), role="administrateur", lecture=True)
+# Métriques des requêtes (compteurs, erreurs, latences par action), en tableau ou au format Prometheus.
+enregistrer_action("METRIQUES", lambda corps, demandeur: Metriques(corps), role="administrateur", lecture=True)
+# Profilage à la demande (cProfile ou tracemalloc) des N prochaines requêtes ou des T prochaines secondes.
+enregistrer_action("PROFILAGE", lambda corps, demandeur: Profilage(corps), role="administrateur", lecture=True)
+
+def recevoir_pdu(requete, session=False):
     """
     Fonction centrale de routage.
-    Analyse l'action demandée dans le PDU, appelle la fonction correspondante,
-    et formate la réponse JSON. Gère aussi l'affichage des logs côté serveur.
+    Cherche l'action demandée dans le registre ACTIONS, l'exécute à travers ses middlewares,
+    et formate la réponse JSON. Transmet aussi chaque requête au journal (journal_serveur)
+    et mesure sa durée de traitement et ses entrées/sorties fichier (metriques, mesure_es).
     
     Args:
         requete (dict): Le PDU reçu (Action, Demandeur, Corps).
+        session (dict|None|False): Session du jeton déjà résolue par ecouter (None : jeton invalide),
+                                   False si elle reste à résoudre ici.
         
     Returns:
         dict: Le PDU de réponse (Status, Message, Donnée).
     """
     # 1. Extraction des métadonnées de la requête
     # On note l'heure pour les logs serveur (traçabilité).
-    date = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+    horodatage = time.time()
+    debut = time.perf_counter()
+    mesure_es.debut()
     action = requete.get("action") # Quoi faire ? (ex: "AJOUT_CONTACT")
-    demandeur = requete.get("demandeur") # Qui demande ? (ex: "Abasse")
+    demandeur = None # Qui demande ? (ex: "Abasse") : donné par la session du jeton, pas par le client
     corps = requete.get("corps", {}) # Avec quelles données ? (ex: {"Nom": "Ayyub", ...})
-    
-    # Réponse par défaut si l'action n'est pas reconnue
-    reponse = {"status": 400, "message": "Action inconnue"}
+    CONTEXTE_REQUETE.echeance = echeance_requete(requete) # Jusqu'à quand le client attend-il ?
 
     cible = None
-    
-    # 2. Aiguillage (Routing)
-    # On compare le mot-clé 'action' et on dirige vers la fonction métier correspondante.
-    if action == "CONNEXION":
-        # Vérifie login/mdp dans comptes.csv
-        reponse = Verification_Connexion(corps)
-        identifiant = corps.get("nom", "Inconnu")
-        
-    elif action == "CREATION_COMPTE":
-        # Crée une ligne dans comptes.csv + un fichier vide annuaire_X.csv
-        reponse = Creation_Compte(corps)
-        identifiant = corps.get("nom", "Nouveau Compte")
-        
-    elif action == "AJOUT_CONTACT":
-        # Ajoute une ligne dans annuaire_demandeur.csv
-        reponse = Ajout_Contact(corps, demandeur)
-        identifiant = demandeur
-
-    elif action == "RECHERCHE_CONTACT":
-        # Lit annuaire_cible.csv et filtre les résultats
-        # Note : demandeur est passé en paramètre pour vérifier les droits d'abord !
-        reponse = Recherche_Contact(corps, demandeur)
-        identifiant = demandeur
-        cible = corps.get("proprietaire_cible", None)
-
-    elif action == "LISTE_CONTACTS":
-        # Le client veut lister un annuaire entier.
-        # Note : On passe 'demandeur' à la fonction pour vérifier s'il a le droit
-        reponse = Liste_Contacts(corps, demandeur)
-        identifiant = demandeur
-        cible = corps.get("proprietaire_cible", None)
-
-    elif action == "GERER_PERMISSION":
-        # Action de partage : Donner ou retirer le droit de voir son annuaire.
-        # C'est une modification du fichier 'permissions.csv'.
-        reponse = Gestion_Permission(corps, demandeur)
-        identifiant = demandeur
-
-    elif action == "MODIF_CONTACT":
-        # Demande de mise à jour d'un contact existant (ex: changement de numéro).
-        # Le serveur va réécrire le fichier CSV de l'utilisateur.
-        reponse = Modification_Contact(corps, demandeur)
-        identifiant = demandeur
-
-    elif action == "SUPPR_CONTACT":
-        # Demande de suppression.
-        # Le serveur va chercher le contact et réécrire le fichier sans lui.
-        reponse = Suppression_Contact(corps, demandeur)
-        identifiant = demandeur
-
-    elif action == "LISTE_PROPRIO":
-        # "Qui ai-je le droit de regarder ?"
-        # Sert à remplir le menu "Annuaire Consultable" côté client.
-        reponse = Liste_Proprio(demandeur)
-        identifiant = demandeur
-
-    elif action == "LISTE_COMPTES":
-        # "Qui existe sur ce serveur ?"
-        # Sert à l'autocomplétion ou pour choisir à qui donner une permission.
-        reponse = Liste_Comptes() # Pas besoin d'arguments, c'est public/global.
-        identifiant = demandeur
-
-    elif action == "LISTE_DROIT":
-        # "Qui a le droit de me regarder ?"
-        # Sert à afficher la liste dans le menu "Gérer Permissions" -> "Retirer".
-        reponse = Liste_Droit(demandeur)
-        identifiant = demandeur
-
-    elif action == "SUPPRESSION_COMPTE":
-        # DANGER : Supprime une ligne dans comptes.csv, supprime le fichier annuaire_X.csv 
-        # et nettoie permissions.csv. Irréversible.
-        reponse = Suppression_Compte(corps)
-        identifiant = demandeur
-
-    elif action == "MODIF_COMPTE":
-        # Changement de mot de passe ou de rôle (Admin/User).
-        # Appel la fonction qui modifie 'comptes.csv'.
-        reponse = Modification_Compte(corps)
-        identifiant = demandeur
-
-    elif action == "INFOS_ADMIN":
-        # Demande de statistiques globales (Tableau de bord).
-        # Le serveur scanne tous les fichiers pour compter les lignes.
-        reponse = Infos_Admin()
-        identifiant = demandeur
-    
-    else:
-        # Si l'action n'est dans aucun des 'elif', on ne sait pas quoi faire.
-        identifiant = "Inconnu"
 
-    # 3. Logging (Journalisation)
-    # Le serveur doit garder une trace de ce qu'il fait dans sa propre console.
-    status = reponse.get("status")
-    message = reponse.get("message")
-    # Code couleur pour lecture rapide (Vert = OK, Rouge = Problème)
-    if status in [200, 201]:
-        tag = "\033[92m[SUCCÈS]\033[0m" # Vert
-    else:
-        tag = "\033[91m[ERREUR]\033[0m" # Rouge
-    # Affichage formaté : QUI a fait QUOI, sur QUI, et quel est le RÉSULTAT.
-    if cible == None:
-        print(f"{date} {tag} Action: {action} | User: {identifiant} ")
-        print(f"\t\t\t└── message: {message}")
+    # 2. Aiguillage (Routing) : une seule recherche dans le registre.
+    entree_action = ACTIONS.get(action)
+    if entree_action is None:
+        # Action inconnue : refusée sans rien exécuter.
+        reponse = {"status": 400, "message": "Action inconnue"}
+        identifiant = "Inconnu"
     else:
-        print(f"{date} {tag} Action: {action} | User: {identifiant} | Cible: {cible}")
-        print(f"\t\t\t└── message: {message}")
-    # 4. Retour
+        # Authentification : une recherche du jeton dans la table des sessions (déjà faite par ecouter,
+        # on vérifie seulement que la session n'a pas expiré ou été fermée pendant l'attente dans la file).
+        if not entree_action["session"]:
+            session = None
+        elif session is False:
+            session = session_valide(requete.get("jeton"))
+        elif session and (session["expire"] <= time.time() or SESSIONS.get(requete.get("jeton")) is not session):
+            session = None
+        if session:
+            demandeur = session["nom"]
+        CONTEXTE_REQUETE.session = session
+        CONTEXTE_REQUETE.jeton = requete.get("jeton")
+        if entree_action["session"] and session is None:
+            reponse = {"status": 401, "message": "Session invalide ou expirée : reconnectez-vous"}
+        elif echeance_depassee():
+            # Le client a déjà abandonné : aucun travail pour une réponse que personne ne lira.
+            reponse = reponse_echeance()
+        elif action == "PROFILAGE": # Piloter le profilage ne compte pas comme une requête profilée
+            reponse = executer_action(entree_action, corps, demandeur)
+        else:
+            reponse = profilage.executer(executer_action, entree_action, corps, demandeur)
+        corps_lisible = corps if isinstance(corps, dict) else {}
+        # Sans session valide, le journal garde le nom annoncé par le client
+        identifiant = entree_action["identifiant"](corps_lisible) if entree_action["identifiant"] else (demandeur or requete.get("demandeur"))
+        if entree_action["cible"]:
+            cible = corps_lisible.get(entree_action["cible"], None)
+
+    CONTEXTE_REQUETE.echeance = None
+    CONTEXTE_REQUETE.session = CONTEXTE_REQUETE.jeton = None
+
+    # 3. Métriques : une seule ligne "INCONNUE" pour toutes les actions inconnues (noms envoyés par le client)
+    es = mesure_es.fin()
+    metriques.enregistrer(action if entree_action is not None else "INCONNUE", reponse.get("status"),
+                          time.perf_counter() - debut, es)
+
+    # 4. Logging (Journalisation)
+    # Le serveur garde une trace de ce qu'il fait : un petit enregistrement est mis en file,
+    # le thread du journal l'écrit (fichier JSON-lines + console) sans faire attendre la requête.
+    journal_serveur.journaliser({
+        "horodatage": horodatage,
+        "action": action,
+        "utilisateur": identifiant,
+        "trace": requete.get("trace"),
+        "cible": cible,
+        "status": reponse.get("status"),
+        "message": reponse.get("message"),
+        "es": es
+    })
+    # 5. Retour
     # On renvoie le dictionnaire réponse qui sera converti en JSON pour le client.
     return reponse
 
+def traiter_depot(depot):
+    """
+    Traite une requête déposée (appelée par l'ordonnanceur) en mesurant ses phases (requetes_lentes).
+
+    Args:
+        depot (dict): {"id", "requete", "debut", "lecture", "soumis", "horodatages", "session"} (voir ecouter).
+    """
+    requetes_lentes.debut({"lecture_requete": depot["lecture"], "attente": time.perf_counter() - depot["soumis"]})
+    depot["horodatages"]["debut"] = time.time()
+    with requetes_lentes.phase("traitement"):
+        reponse = recevoir_pdu(depot["requete"], session_depot(depot))
+    depot["horodatages"]["fin"] = time.time()
+    return reponse
+
+def repondre_depot(depot, reponse, fichier_lent):
+    """
+    Écrit la réponse d'une requête (reponses/<id>.json) si son échéance n'est pas passée, puis, si la requête a dépassé SEUIL_REQUETE_LENTE,
+    l'écrit dans le journal des requêtes lentes avec le détail de ses phases.
+    La réponse emporte l'identifiant de trace du client et les horodatages du serveur (reçue, début, fin du traitement).
+    """
+    reponse["trace"] = {"id": depot["requete"].get("trace"), **depot["horodatages"]}
+    # Échéance passée : le client a cessé d'attendre, la réponse n'est pas écrite (elle resterait orpheline).
+    if not echeance_depassee(depot["requete"]):
+        with requetes_lentes.phase("serialisation"):
+            texte = json.dumps(reponse, indent=4)
+        with requetes_lentes.phase("ecriture_reponse"):
+            reseau.ecrire_fichier(reseau.DOSSIER_REPONSES / f"{depot['id']}.json", texte)
+    phases = requetes_lentes.fin()
+    duree = time.perf_counter() - depot["debut"]
+    if SEUIL_REQUETE_LENTE is not None and duree >= SEUIL_REQUETE_LENTE:
+        requetes_lentes.enregistrer(fichier_lent, depot["requete"], reponse, duree, phases, demandeur_depot(depot))
+
+def refuser_surcharge(depot, delai, fichier_lent):
+    """
+    Répond 503 sans traiter la requête (file de l'ordonnanceur pleine), avec le délai conseillé avant de réessayer.
+    Le refus est compté dans les métriques et le journal comme une réponse normale.
+    """
+    requete = depot["requete"]
+    reponse = {"status": 503, "message": f"Serveur surchargé, réessayez dans {delai} s", "reessayer_dans": delai}
+    entree_action = ACTIONS.get(requete.get("action"))
+    metriques.enregistrer(entree_action["nom"] if entree_action else "INCONNUE", 503, 0.0)
+    journal_serveur.journaliser({"horodatage": time.time(), "action": requete.get("action"),
+                                 "utilisateur": demandeur_depot(depot) or requete.get("demandeur"), "trace": requete.get("trace"), "cible": None,
+                                 "status": 503, "message": reponse["message"]})
+    depot["horodatages"]["debut"] = depot["horodatages"]["fin"] = time.time()
+    repondre_depot(depot, reponse, fichier_lent)
+
+def ecouter(fichier_verrou=None, nom_journal="requetes.jsonl", nom_journal_lent="requetes_lentes.jsonl"):
+    """
+    Boucle d'écoute d'un processus serveur (jusqu'à Ctrl+C) :
+    surveille le dossier 'requetes/' et confie chaque demande à l'ordonnanceur, qui écrit la réponse dans 'reponses/'.
+    Chaque requête est d'abord réservée par renommage : plusieurs processus peuvent écouter le même dossier.
+
+    Args:
+        fichier_verrou (Path|None): Verrou commun aux processus (mode pre-fork), None en mode un seul processus.
+        nom_journal (str): Fichier du journal des requêtes dans donnee_serveur/journal/ (un par processus).
+        nom_journal_lent (str): Fichier du journal des requêtes lentes, dans le même dossier.
+    """
+    journal_serveur.demarrer_journal(DOSSIER_JOURNAL / nom_journal)
+    # Les requêtes sont confiées à l'ordonnanceur : lectures en parallèle sur le pool,
+    # écritures une par une par ressource, requêtes d'un même client dans l'ordre.
+    fichier_lent = DOSSIER_JOURNAL / nom_journal_lent
+    ordo = ordonnanceur.creer_ordonnanceur(
+        traiter_depot,
+        lambda depot: classer_requete(depot["requete"], demandeur_depot(depot)),
+        lambda depot, reponse: repondre_depot(depot, reponse, fichier_lent),
+        NB_THREADS_SERVEUR, fichier_verrou,
+        utilisateur=lambda depot: demandeur_depot(depot) or depot["requete"].get("client"),
+        taille_max=TAILLE_FILE_SERVEUR, max_par_utilisateur=MAX_REQUETES_PAR_UTILISATEUR, apres_ecriture=apres_ecriture)
+    try:
+        # BOUCLE INFINIE D'ÉCOUTE
+        while True:
+            # Polling : Est-ce que des requêtes sont arrivées ? (un fichier par requête)
+            for fichier_requete in reseau.requetes_en_attente():
+                # A. Réservation : si un autre processus l'a déjà prise, on passe à la suivante.
+                reserve = reseau.reclamer_requete(fichier_requete)
+                if reserve is None:
+                    continue
+                try:
+                    # B. Lecture de la requête, puis suppression pour éviter de traiter 2 fois la même demande.
+                    debut = time.perf_counter()
+                    with open(reserve, "r", encoding="utf-8") as f:
+                        requete = json.load(f)
+                    os.remove(reserve)
+                    # Session du jeton, résolue une seule fois ici (équité, ressource, puis traitement s'en servent).
+                    session = session_valide(requete.get("jeton"))
+                    # C. Échéance déjà passée (ex: requête restée trop longtemps dans le dossier) : abandonnée
+                    #    tout de suite, sans passer par la file (recevoir_pdu la compte sans l'exécuter).
+                    if echeance_depassee(requete):
+                        recevoir_pdu(requete, session)
+                        continue
+                    # D. Traitement par l'ordonnanceur, qui déposera la réponse (reponses/<id>.json)
+                    client = requete.get("client") or requete.get("demandeur")
+                    soumis = time.perf_counter()
+                    depot = {"id": fichier_requete.stem, "requete": requete, "debut": debut, "lecture": soumis - debut,
+                             "soumis": soumis, "horodatages": {"recu": time.time()}, "session": session}
+                    if not ordonnanceur.soumettre(ordo, client, depot):
+                        # File pleine : réponse immédiate, le client réessaiera plus tard.
+                        refuser_surcharge(depot, ordonnanceur.delai_conseille(ordo), fichier_lent)
+
+                except Exception as e:
+                    # Filets de sécurité : Si le JSON est corrompu ou illisible, le serveur ne doit PAS crasher. Il log l'erreur et continue.
+                    print(f"[ERREUR] {e}")
+                    if reserve.exists():
+                        os.remove(reserve)
+            # Petite pause pour ne pas surcharger le processeur (CPU) à faire des boucles vides.
+            time.sleep(0.05)
+    finally:
+        # Fin des requêtes en cours avant de rendre la main, puis écriture des dernières lignes du journal
+        ordonnanceur.arreter(ordo)
+        journal_serveur.arreter_journal()
+
+def processus_pre_fork(numero):
+    """
+    Point d'entrée d'un processus du mode multi-processus : même boucle d'écoute,
+    avec le verrou de fichier commun pour coordonner lectures et écritures entre processus.
+    """
+    global MULTI_PROCESSUS
+    MULTI_PROCESSUS = True
+    reseau.DOSSIER_GENERATIONS.mkdir(exist_ok=True)
+    index_annuaire.GENERATIONS["dossier"] = reseau.DOSSIER_GENERATIONS
+    print(f"[RESEAU] Processus {numero} (pid {os.getpid()}) à l'écoute.")
+    try:
+        ecouter(reseau.FICHIER_VERROU, f"requetes_{numero}.jsonl", f"requetes_lentes_{numero}.jsonl")
+    except KeyboardInterrupt:
+        pass
+
+def lancer_pre_fork(nb_processus):
+    """
+    Démarre 'nb_processus' processus serveur qui se partagent le dossier des requêtes,
+    et attend leur arrêt (Ctrl+C).
+    """
+    # "spawn" : chaque processus repart d'un interpréteur neuf (pas de threads ni d'index hérités du menu).
+    contexte = multiprocessing.get_context("spawn")
+    processus = [contexte.Process(target=processus_pre_fork, args=(numero,)) for numero in range(1, nb_processus + 1)]
+    for p in processus:
+        p.start()
+    try:
+        for p in processus:
+            p.join()
+    finally:
+        for p in processus:
+            p.join(timeout=5) # Ctrl+C est aussi reçu par les processus, qui terminent leurs requêtes
+            if p.is_alive():
+                p.terminate()
+
 def menu_serveur():
     """
     Boucle principale du serveur.
     1. Initialise l'environnement (fichiers/dossiers).
     2. Affiche le menu console administrateur.
-    3. Surveille la présence du fichier 'pdu_requete.json' pour traiter les demandes entrantes.
-    4. Gère l'écriture de 'pdu_reponse.json'.
+    3. Lance l'écoute (voir ecouter) dans ce processus, ou dans plusieurs processus (mode pre-fork).
     """
     # 1. Initialisation
     reseau.creer_serveur() # Crée les dossiers si absents
@@ -666,12 +1818,19 @@ def menu_serveur():
         options = [
             "1. Démarrer le Serveur (Écoute)",
             "2. Réinitialiser les données(DANGER)",
+            "3. Démarrer en multi-processus",
             "0. Quitter"
         ]
         mes_fonctions.deco_console(titre, taille, options)
         choix = input("Votre choix > ")
         
-        if choix == "1":
+        if choix in ["1", "3"]:
+            if choix == "3" and ordonnanceur.fcntl is None:
+                print("Mode multi-processus indisponible sur ce système (verrou de fichier fcntl requis).")
+                time.sleep(1.5)
+                mes_fonctions.clear_console()
+                continue
+            effacer_sessions() # Les clients d'une exécution précédente doivent se reconnecter
             # Création du "Témoin" : Indique aux clients que le serveur est allumé.
             with open(reseau.FICHIER_TEMOIN, "w") as f:
                 f.write("ONLINE")
@@ -681,31 +1840,10 @@ def menu_serveur():
             print("="*40)
             
             try:
-                # BOUCLE INFINIE D'ÉCOUTE
-                while True:
-                    # 2. Polling : Est-ce qu'une requête est arrivée ?
-                    if reseau.FICHIER_REQUETE.exists():
-                        try:
-                            # A. Lecture de la requête (pdu_requete.json)
-                            with open(reseau.FICHIER_REQUETE, "r", encoding="utf-8") as f:
-                                requete = json.load(f)
-                            # B. Traitement
-                            reponse = recevoir_pdu(requete)
-                            # C. Nettoyage : On supprime la requête pour dire "J'ai bien reçu"
-                            # C'est important pour éviter de traiter 2 fois la même demande.
-                            os.remove(reseau.FICHIER_REQUETE)
-                            # D. Envoi de la réponse (pdu_reponse.json)
-                            with open(reseau.FICHIER_REPONSE, "w", encoding="utf-8") as f:
-                                json.dump(reponse, f, indent=4)
-                                
-                        except Exception as e:
-                            # Filets de sécurité : Si le JSON est corrompu ou illisible, le serveur ne doit PAS crasher. Il log l'erreur et continue.
-                            print(f"[ERREUR] {e}")
-                            if reseau.FICHIER_REQUETE.exists():
-                                os.remove(reseau.FICHIER_REQUETE)
-                    # Petite pause pour ne pas surcharger le processeur (CPU) à faire des boucles vides.
-                    time.sleep(0.1)
-                    
+                if choix == "1":
+                    ecouter()
+                else:
+                    lancer_pre_fork(NB_PROCESSUS_SERVEUR)
             except KeyboardInterrupt:
                 # Gestion propre de l'arrêt avec Ctrl+C
                 print("\nArrêt du serveur...")
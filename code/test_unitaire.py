@@ -1,9 +1,20 @@
+import os
 import csv
+import json
+import time
+import pstats
 import shutil
+import threading
 from pathlib import Path
 
 # On importe ton module serveur
 import serveur
+import ordonnanceur
+import index_annuaire
+import journal_serveur
+import metriques
+import mesure_es
+import requetes_lentes
 
 # --- CONFIGURATION DE L'ENVIRONNEMENT DE TEST ---
 print("--- INITIALISATION DE L'ENVIRONNEMENT DE TEST ---")
@@ -13,7 +24,10 @@ dossier_test = Path("test_env")
 serveur.DOSSIER_DATA = dossier_test
 serveur.FICHIER_COMPTES = dossier_test / "comptes.csv"
 serveur.FICHIER_PERMISSIONS = dossier_test / "permissions.csv"
+serveur.FICHIER_GROUPES = dossier_test / "groupes.csv"
 serveur.DOSSIER_ANNUAIRES = dossier_test / "annuaires"
+serveur.DOSSIER_PROFILAGE = dossier_test / "profilage"
+serveur.DOSSIER_SESSIONS = dossier_test / "sessions"
 fichier_temoin = dossier_test / ".server_online"
 
 def creer_serveur():
@@ -38,6 +52,12 @@ if dossier_test.exists():
     shutil.rmtree(dossier_test)
 creer_serveur() # Cette fonction du serveur va créer les fichiers vides
 
+def jeton_test(nom):
+    """
+    Ouvre une session serveur pour 'nom' avec son statut actuel (comme après une CONNEXION) et renvoie le jeton.
+    """
+    return serveur.ouvrir_session(nom, serveur.index_comptes()["statuts"].get(nom))
+
 # Fonction utilitaire pour afficher les résultats proprement
 def verifier(nom_test, reponse_recue):
     status_recu = reponse_recue.get("status")
@@ -191,6 +211,1143 @@ else:
 rep = serveur.Suppression_Compte({"nom_compte": "Fantome"})
 verifier("Suppression compte inconnu", rep)
 
+# ==========================================
+# 8. TEST DE LOT_CONTACTS
+# ==========================================
+print("\n=== 8. TEST LOT_CONTACTS ===")
+
+serveur.Creation_Compte({"nom": "LotUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+operations = [
+    {"type": "ajout", "contact": {"Nom": "MARTIN", "Prenom": "Paul", "Telephone": "", "Adresse": "", "Email": "paul@mail.com"}},
+    {"type": "ajout", "contact": {"Nom": "BERNARD", "Prenom": "Lea", "Telephone": "", "Adresse": "", "Email": "lea@mail.com"}},
+    {"type": "modif", "contact": {"Nom": "MARTIN", "Prenom": "Paul", "Telephone": "0611111111", "Adresse": "Nantes", "Email": "paul@mail.com"}},
+    {"type": "suppr", "contact": {"Nom": "BERNARD", "Prenom": "Lea"}},
+    {"type": "suppr", "contact": {"Nom": "FANTOME", "Prenom": "Casper"}},
+]
+rep = serveur.Lot_Contacts({"operations": operations}, "LotUser")
+verifier("Lot de 5 opérations", rep)
+statuts = [resultat["status"] for resultat in rep["donnee"]]
+if statuts == [200, 200, 200, 200, 404]:
+    print(f"   -> Résultats par opération : {statuts}")
+else:
+    print(f"   -> Résultats par opération inattendus : {statuts}")
+
+rep = serveur.Liste_Contacts({"proprietaire_cible": "LotUser"}, "LotUser")
+if len(rep["donnee"]) == 1 and rep["donnee"][0]["Adresse"] == "Nantes":
+    print("   -> Vérification données : Un seul contact restant, modifié ('Nantes')")
+else:
+    print(f"   -> Vérification données : Contenu inattendu {rep['donnee']}")
+
+# Une même opération répétée dans le lot est signalée au lieu d'écraser silencieusement la précédente
+operations = [
+    {"type": "modif", "contact": {"Nom": "MARTIN", "Prenom": "Paul", "Telephone": "", "Adresse": "Lyon", "Email": "paul@mail.com"}},
+    {"type": "modif", "contact": {"Nom": "MARTIN", "Prenom": "Paul", "Telephone": "", "Adresse": "Brest", "Email": "paul@mail.com"}},
+]
+rep = serveur.Lot_Contacts({"operations": operations}, "LotUser")
+adresse = serveur.Liste_Contacts({"proprietaire_cible": "LotUser"}, "LotUser")["donnee"][0]["Adresse"]
+reussi = [r["status"] for r in rep["donnee"]] == [200, 409] and "opération 0" in rep["donnee"][1]["message"] and adresse == "Lyon"
+print(f"TEST: Opération en double dans le lot (409) -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+serveur.Suppression_Compte({"nom_compte": "LotUser"})
+
+# ==========================================
+# 9. TEST DE CREATION_COMPTES_LOT
+# ==========================================
+print("\n=== 9. TEST CREATION_COMPTES_LOT ===")
+
+serveur.Creation_Compte({"nom": "DejaLa", "mot_de_passe": "hash123", "statut": "utilisateur"})
+lot = [
+    {"nom": "Import1", "mot_de_passe": "hash1", "statut": "utilisateur"},
+    {"nom": "Import2", "mot_de_passe": "hash2", "statut": "administrateur"},
+    {"nom": "Import1", "mot_de_passe": "hash3", "statut": "utilisateur"}, # Doublon dans le lot
+    {"nom": "DejaLa", "mot_de_passe": "hash4", "statut": "utilisateur"}, # Déjà sur le serveur
+    {"nom": "SansMdp", "mot_de_passe": "", "statut": "utilisateur"},
+]
+rep = serveur.Creation_Comptes_Lot({"comptes": lot})
+verifier("Import de 5 comptes", rep)
+statuts = [resultat["status"] for resultat in rep["donnee"]]
+if statuts == [201, 201, 409, 409, 400]:
+    print(f"   -> Résultats par compte : {statuts}")
+else:
+    print(f"   -> Résultats par compte inattendus : {statuts}")
+if (serveur.DOSSIER_ANNUAIRES / "annuaire_Import2.csv").exists():
+    print("   -> Vérification fichier : Les annuaires des comptes importés ont été créés")
+else:
+    print("   -> Vérification fichier : Annuaire du compte importé manquant")
+for nom in ["Import1", "Import2", "DejaLa"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+# Noms invalides refusés avant toute écriture, et annuaire impossible à créer : le compte n'est pas inscrit
+(serveur.DOSSIER_ANNUAIRES / "annuaire_Bloque.csv").mkdir()
+rep = serveur.Creation_Comptes_Lot({"comptes": [{"nom": nom, "mot_de_passe": "hash"}
+                                                for nom in ["a", "b/c", "d", " e", "..", "Bloque"]]})
+statuts = [resultat["status"] for resultat in rep["donnee"]]
+inscrits = serveur.index_comptes()["statuts"]
+cas = [("Résultat par compte (noms invalides 400, annuaire non créé 500)", statuts == [201, 400, 201, 400, 400, 500]),
+       ("Seuls les comptes avec annuaire sont inscrits",
+        "a" in inscrits and "d" in inscrits and not {"b/c", " e", "..", "Bloque"} & set(inscrits)),
+       ("Annuaires des comptes créés présents",
+        all((serveur.DOSSIER_ANNUAIRES / f"annuaire_{nom}.csv").exists() for nom in ["a", "d"])),
+       ("Compte seul : nom invalide refusé",
+        serveur.Creation_Compte({"nom": "x/y", "mot_de_passe": "hash", "statut": "utilisateur"})["status"] == 400)]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+(serveur.DOSSIER_ANNUAIRES / "annuaire_Bloque.csv").rmdir()
+for nom in ["a", "d"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+
+# ==========================================
+# 10. TEST DES GROUPES ET ANNUAIRES PUBLICS
+# ==========================================
+print("\n=== 10. TEST GROUPES / PUBLIC ===")
+
+for nom in ["Proprio", "Membre", "Externe"]:
+    serveur.Creation_Compte({"nom": nom, "mot_de_passe": "hash123", "statut": "utilisateur"})
+
+# Cas 1 : Partage avec un groupe
+rep = serveur.Gestion_Groupe({"groupe": "compta", "membre": "Membre", "type": "ajouter"})
+verifier("Ajout d'un membre au groupe 'compta'", rep)
+rep = serveur.Gestion_Permission({"groupe_cible": "compta", "type": "donner"}, "Proprio")
+verifier("Partage de l'annuaire avec '@compta'", rep)
+if serveur.Verification_Droit("Membre", "Proprio") and not serveur.Verification_Droit("Externe", "Proprio"):
+    print("   -> Vérification droits : Le membre du groupe a accès, l'externe non")
+else:
+    print("   -> Vérification droits : Résolution des groupes incorrecte")
+
+# Cas 2 : Annuaire public
+rep = serveur.Gestion_Permission({"public": True, "type": "donner"}, "Proprio")
+verifier("Annuaire rendu public", rep)
+if serveur.Verification_Droit("Externe") == ["Proprio"]:
+    print("   -> Vérification droits : L'annuaire public est listé pour tout le monde")
+else:
+    print(f"   -> Vérification droits : Liste inattendue {serveur.Verification_Droit('Externe')}")
+
+# Cas 3 : Suppression du groupe (les accès donnés au groupe disparaissent)
+serveur.Gestion_Permission({"public": True, "type": "retirer"}, "Proprio")
+rep = serveur.Gestion_Groupe({"groupe": "compta", "type": "supprimer"})
+verifier("Suppression du groupe 'compta'", rep)
+if not serveur.Verification_Droit("Membre", "Proprio") and serveur.Liste_Droit("Proprio")["donnee"] == []:
+    print("   -> Vérification droits : Plus aucun accès après suppression du groupe")
+else:
+    print("   -> Vérification droits : Des accès au groupe supprimé subsistent")
+
+# Cas 4 : Supprimer le compte "Membre" (même nom que la colonne) garde l'en-tête et les autres membres,
+# et une ligne vide dans groupes.csv ne fait pas échouer la gestion des groupes
+serveur.Gestion_Groupe({"groupe": "equipe", "membre": "Proprio", "type": "ajouter"})
+serveur.Gestion_Groupe({"groupe": "equipe", "membre": "Membre", "type": "ajouter"})
+serveur.Gestion_Groupe({"groupe": "equipe", "membre": "Externe", "type": "ajouter"})
+serveur.Suppression_Compte({"nom_compte": "Membre"})
+entete = serveur.FICHIER_GROUPES.read_text(encoding="utf-8").splitlines()[0]
+with open(serveur.FICHIER_GROUPES, "a", encoding="utf-8") as f:
+    f.write("\n")
+rep = serveur.Gestion_Groupe({"groupe": "equipe", "membre": "Externe", "type": "retirer"})
+verifier("Retrait d'un membre malgré une ligne vide", rep)
+if entete == "Groupe,Membre" and serveur.Liste_Groupes()["donnee"] == [{"Groupe": "equipe", "Membres": ["Proprio"]}]:
+    print("   -> Groupes : En-tête et membres conservés après suppression du compte 'Membre'")
+else:
+    print(f"   -> Groupes : ÉCHEC, en-tête '{entete}', groupes {serveur.Liste_Groupes()['donnee']}")
+for nom in ["Proprio", "Membre", "Externe"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+
+# ==========================================
+# 11. TEST DE L'INDEX DE RECHERCHE (TRIGRAMMES)
+# ==========================================
+print("\n=== 11. TEST INDEX DE RECHERCHE ===")
+
+def recherche_parcours_complet(proprietaire, terme):
+    # Ancienne méthode (référence) : parcours de tout le fichier.
+    path = serveur.DOSSIER_ANNUAIRES / f"annuaire_{proprietaire}.csv"
+    with open(path, "r", encoding="utf-8") as fichier:
+        return [ligne for ligne in csv.DictReader(fichier)
+                if any(terme in ligne[champ].lower() for champ in ["Nom", "Prenom", "Telephone", "Adresse", "Email"])]
+
+serveur.Creation_Compte({"nom": "IndexUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+for nom, prenom, ville in [("DUPONT", "Jean", "Paris"), ("DUPUIS", "Anne", "Lyon"), ("MARTIN", "Luc", "Toulouse")]:
+    serveur.Ajout_Contact({"contact": {"Nom": nom, "Prenom": prenom, "Telephone": "0600000000", "Adresse": ville, "Email": f"{prenom.lower()}@mail.com"}}, "IndexUser")
+# Modifications après construction de l'index : il doit être mis à jour sans relecture
+serveur.Recherche_Contact({"proprietaire_cible": "IndexUser", "recherche": "dup"}, "IndexUser")
+serveur.Modification_Contact({"contact": {"Nom": "DUPUIS", "Prenom": "Anne", "Telephone": "0611111111", "Adresse": "Marseille", "Email": "anne@mail.com"}}, "IndexUser")
+serveur.Suppression_Contact({"contact": {"Nom": "MARTIN", "Prenom": "Luc"}}, "IndexUser")
+
+identiques = True
+for terme in ["dup", "lyon", "marseille", "an", "", "0611", "toulouse", "@mail.com", "xyz"]:
+    rep = serveur.Recherche_Contact({"proprietaire_cible": "IndexUser", "recherche": terme}, "IndexUser")
+    if rep["donnee"] != recherche_parcours_complet("IndexUser", terme):
+        identiques = False
+        print(f"TEST: Recherche '{terme}' -> ÉCHEC (différent du parcours complet)")
+if identiques:
+    print("TEST: Recherche indexée -> SUCCÈS (résultats identiques au parcours complet)")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "IndexUser"})
+
+# ==========================================
+# 12. TEST DE AUTOCOMPLETE
+# ==========================================
+print("\n=== 12. TEST AUTOCOMPLETE ===")
+
+serveur.Creation_Compte({"nom": "AutoUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+for nom, prenom in [("DUPONT", "Jean"), ("DURAND", "Julie"), ("MARTIN", "Dumbo")]:
+    serveur.Ajout_Contact({"contact": {"Nom": nom, "Prenom": prenom, "Telephone": "", "Adresse": "", "Email": "a@mail.com"}}, "AutoUser")
+
+rep = serveur.Autocompletion({"prefixe": "du", "type": "contacts"}, "AutoUser")
+if rep["donnee"] == ["Dumbo", "DUPONT", "DURAND"]:
+    print(f"TEST: Suggestions 'du' -> SUCCÈS ({rep['donnee']})")
+else:
+    print(f"TEST: Suggestions 'du' -> ÉCHEC ({rep['donnee']})")
+serveur.Suppression_Contact({"contact": {"Nom": "DUPONT", "Prenom": "Jean"}}, "AutoUser")
+rep = serveur.Autocompletion({"prefixe": "du", "type": "contacts", "limite": 1}, "AutoUser")
+if rep["donnee"] == ["Dumbo"]:
+    print(f"TEST: Suggestions après suppression (limite 1) -> SUCCÈS ({rep['donnee']})")
+else:
+    print(f"TEST: Suggestions après suppression (limite 1) -> ÉCHEC ({rep['donnee']})")
+rep = serveur.Autocompletion({"prefixe": "auto", "type": "comptes"}, "AutoUser")
+if rep["donnee"] == ["AutoUser"]:
+    print(f"TEST: Suggestions de comptes 'auto' -> SUCCÈS ({rep['donnee']})")
+else:
+    print(f"TEST: Suggestions de comptes 'auto' -> ÉCHEC ({rep['donnee']})")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "AutoUser"})
+
+# ==========================================
+# 13. TEST DE RECHERCHE_GLOBALE
+# ==========================================
+print("\n=== 13. TEST RECHERCHE_GLOBALE ===")
+
+for nom in ["Chercheur", "Ami1", "Ami2", "Inconnu"]:
+    serveur.Creation_Compte({"nom": nom, "mot_de_passe": "hash123", "statut": "utilisateur"})
+    serveur.Ajout_Contact({"contact": {"Nom": "DUPONT", "Prenom": nom, "Telephone": "", "Adresse": "", "Email": "d@mail.com"}}, nom)
+serveur.Gestion_Permission({"utilisateur_cible": "Chercheur", "type": "donner"}, "Ami1")
+serveur.Gestion_Permission({"utilisateur_cible": "Chercheur", "type": "donner"}, "Ami2")
+
+rep = serveur.Recherche_Globale({"recherche": "dupont"}, "Chercheur")
+verifier("Recherche 'dupont' dans tous les annuaires", rep)
+proprietaires = [contact["Proprietaire"] for contact in rep["donnee"]]
+if proprietaires == ["Chercheur", "Ami1", "Ami2"]:
+    print(f"   -> Vérification : Résultats étiquetés par annuaire, 'Inconnu' exclu ({proprietaires})")
+else:
+    print(f"   -> Vérification : Propriétaires inattendus {proprietaires}")
+rep = serveur.Recherche_Globale({"recherche": "dupont", "limite": 2}, "Chercheur")
+if len(rep["donnee"]) == 2:
+    print("   -> Vérification : La limite globale de résultats est respectée")
+else:
+    print(f"   -> Vérification : Limite non respectée ({len(rep['donnee'])} résultats)")
+for nom in ["Chercheur", "Ami1", "Ami2", "Inconnu"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+
+# ==========================================
+# 14. TEST DE RECHERCHE_TELEPHONE
+# ==========================================
+print("\n=== 14. TEST RECHERCHE_TELEPHONE ===")
+
+for nom in ["Standard", "Collegue", "Prive"]:
+    serveur.Creation_Compte({"nom": nom, "mot_de_passe": "hash123", "statut": "utilisateur"})
+serveur.Ajout_Contact({"contact": {"Nom": "DUPONT", "Prenom": "Jean", "Telephone": "06 12 34 56 78", "Adresse": "", "Email": "j@mail.com"}}, "Collegue")
+serveur.Ajout_Contact({"contact": {"Nom": "SECRET", "Prenom": "Agent", "Telephone": "0612345678", "Adresse": "", "Email": "s@mail.com"}}, "Prive")
+serveur.Gestion_Permission({"utilisateur_cible": "Standard", "type": "donner"}, "Collegue")
+
+rep = serveur.Recherche_Telephone({"telephone": "+33 6.12.34.56.78"}, "Standard")
+verifier("Recherche du numéro '+33 6.12.34.56.78'", rep)
+if [(contact["Nom"], contact["Proprietaire"]) for contact in rep["donnee"]] == [("DUPONT", "Collegue")]:
+    print("   -> Vérification : Numéro normalisé trouvé, annuaire non autorisé filtré")
+else:
+    print(f"   -> Vérification : Résultat inattendu {rep['donnee']}")
+serveur.Modification_Contact({"contact": {"Nom": "DUPONT", "Prenom": "Jean", "Telephone": "0700000000", "Adresse": "", "Email": "j@mail.com"}}, "Collegue")
+rep = serveur.Recherche_Telephone({"telephone": "0612345678"}, "Standard")
+if rep["donnee"] == []:
+    print("   -> Vérification : L'ancien numéro n'est plus indexé après modification")
+else:
+    print(f"   -> Vérification : L'ancien numéro est encore indexé {rep['donnee']}")
+# Index des téléphones seul : l'index complet (trigrammes, tris) des annuaires n'est pas construit
+index_annuaire.INDEX.clear()
+index_annuaire.TELEPHONES.clear()
+rep = serveur.Recherche_Telephone({"telephone": "0700000000"}, "Standard")
+cas = [("Recherche sans construire l'index complet", len(rep["donnee"]) == 1 and not index_annuaire.INDEX)]
+# Contact ajouté hors du serveur : l'annuaire a changé, il est relu
+with open(serveur.DOSSIER_ANNUAIRES / "annuaire_Collegue.csv", "a", newline="", encoding="utf-8") as fichier:
+    csv.writer(fichier).writerow(["MARTIN", "Paul", "07.00.00.00.00", "", "p@mail.com"])
+rep = serveur.Recherche_Telephone({"telephone": "0700000000"}, "Standard")
+cas.append(("Annuaire modifié hors du serveur relu", [c["Nom"] for c in rep["donnee"]] == ["DUPONT", "MARTIN"]))
+# Échéance dépassée entre deux annuaires : 504
+serveur.CONTEXTE_REQUETE.echeance = time.time() - 1
+rep = serveur.Recherche_Telephone({"telephone": "0700000000"}, "Standard")
+serveur.CONTEXTE_REQUETE.echeance = None
+cas.append(("Échéance vérifiée entre les annuaires (504)", rep["status"] == 504))
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+for nom in ["Standard", "Collegue", "Prive"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+
+# ==========================================
+# 15. TEST DE LA RECHERCHE APPROXIMATIVE
+# ==========================================
+print("\n=== 15. TEST RECHERCHE APPROXIMATIVE ===")
+
+serveur.Creation_Compte({"nom": "FloueUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+for nom, prenom in [("DUPONT", "Jean"), ("DUPOND", "Marc"), ("MARTIN", "Luc")]:
+    serveur.Ajout_Contact({"contact": {"Nom": nom, "Prenom": prenom, "Telephone": "", "Adresse": "", "Email": "a@mail.com"}}, "FloueUser")
+
+rep = serveur.Recherche_Contact({"proprietaire_cible": "FloueUser", "recherche": "dupnot", "approximatif": True}, "FloueUser")
+trouves = [(contact["Nom"], contact["Distance"]) for contact in rep["donnee"]]
+if trouves == [("DUPONT", 1), ("DUPOND", 2)]:
+    print(f"TEST: Recherche approximative 'dupnot' -> SUCCÈS ({trouves})")
+else:
+    print(f"TEST: Recherche approximative 'dupnot' -> ÉCHEC ({trouves})")
+serveur.Modification_Contact({"contact": {"Nom": "MARTIN", "Prenom": "Luc", "Telephone": "", "Adresse": "", "Email": "b@mail.com"}}, "FloueUser")
+serveur.Ajout_Contact({"contact": {"Nom": "MARTINS", "Prenom": "Eva", "Telephone": "", "Adresse": "", "Email": "a@mail.com"}}, "FloueUser")
+rep = serveur.Recherche_Contact({"proprietaire_cible": "FloueUser", "recherche": "matrin", "approximatif": True, "distance_max": 1}, "FloueUser")
+trouves = [(contact["Nom"], contact["Distance"]) for contact in rep["donnee"]]
+if trouves == [("MARTIN", 1)]:
+    print(f"TEST: Recherche approximative 'matrin' (1 faute) -> SUCCÈS ({trouves})")
+else:
+    print(f"TEST: Recherche approximative 'matrin' (1 faute) -> ÉCHEC ({trouves})")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "FloueUser"})
+
+# ==========================================
+# 16. TEST DE LA RECHERCHE MULTI-CRITÈRES
+# ==========================================
+print("\n=== 16. TEST RECHERCHE MULTI-CRITÈRES ===")
+
+serveur.Creation_Compte({"nom": "FiltreUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+for nom, prenom, email in [("DURAND", "Paul", "paul@societe.fr"), ("DUPUIS", "Anne", "anne@mail.com"),
+                           ("DUMAS", "Paule", "paule@societe.fr"), ("MARTIN", "Durand", "m@societe.fr")]:
+    serveur.Ajout_Contact({"contact": {"Nom": nom, "Prenom": prenom, "Telephone": "", "Adresse": "", "Email": email}}, "FiltreUser")
+
+requete = {"proprietaire_cible": "FiltreUser", "recherche": "",
+           "filtres": [{"champ": "Nom", "operateur": "commence_par", "valeur": "du"},
+                       {"champ": "Email", "operateur": "finit_par", "valeur": "@societe.fr"}]}
+rep = serveur.Recherche_Contact(requete, "FiltreUser")
+cas = [("Filtres Nom commence par 'du' ET Email finit par '@societe.fr'",
+        [c["Nom"] for c in rep["donnee"]] == ["DURAND", "DUMAS"])]
+rep = serveur.Recherche_Contact({"proprietaire_cible": "FiltreUser", "recherche": "paul", "termes": ["dum"]}, "FiltreUser")
+cas.append(("Termes 'paul' ET 'dum'", [c["Nom"] for c in rep["donnee"]] == ["DUMAS"]))
+rep = serveur.Recherche_Contact(dict(requete, limite=1, champs=["Nom", "Email"]), "FiltreUser")
+cas.append(("Limite 1 et projection (Nom, Email)", rep["donnee"] == [{"Nom": "DURAND", "Email": "paul@societe.fr"}]))
+rep = serveur.Recherche_Contact({"proprietaire_cible": "FiltreUser", "filtres": [{"champ": "Age", "operateur": "egal", "valeur": "3"}]}, "FiltreUser")
+cas.append(("Filtre sur un champ inconnu (400)", rep["status"] == 400))
+# Paramètres mal formés : refusés (400) au lieu de faire planter la requête (500)
+for nom_cas, mauvais in [("filtres pas une liste", {"filtres": {"champ": "Nom"}}),
+                         ("filtre pas un objet", {"filtres": ["Nom"]}),
+                         ("termes pas une liste", {"termes": "dum"}),
+                         ("terme pas une chaîne", {"termes": [3]}),
+                         ("limite booléenne", {"limite": True})]:
+    rep = serveur.Recherche_Contact(dict({"proprietaire_cible": "FiltreUser", "recherche": "paul"}, **mauvais), "FiltreUser")
+    cas.append((f"Paramètre invalide : {nom_cas} (400)", rep["status"] == 400))
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "FiltreUser"})
+
+# ==========================================
+# 17. TEST DU CACHE DES RECHERCHES
+# ==========================================
+print("\n=== 17. TEST CACHE DES RECHERCHES ===")
+
+serveur.Creation_Compte({"nom": "CacheUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+contact_cache = {"Nom": "LEROY", "Prenom": "Eva", "Telephone": "", "Adresse": "", "Email": "eva@mail.com"}
+serveur.Ajout_Contact({"contact": contact_cache}, "CacheUser")
+requete = {"proprietaire_cible": "CacheUser", "recherche": "leroy"}
+premiere = serveur.Recherche_Contact(requete, "CacheUser")
+
+# Une recherche identique ne doit plus refaire la recherche (seule la signature du fichier est revérifiée).
+rechercher_origine = serveur.index_annuaire.rechercher_filtres
+def recherche_interdite(*args):
+    raise RuntimeError("recherche refaite alors que le résultat est en cache")
+serveur.index_annuaire.rechercher_filtres = recherche_interdite
+try:
+    seconde = serveur.Recherche_Contact({"proprietaire_cible": "CacheUser", "recherche": "LEROY"}, "CacheUser")
+    print(f"TEST: Recherche répétée servie par le cache -> {'SUCCÈS' if seconde == premiere else 'ÉCHEC'}")
+except RuntimeError as erreur:
+    print(f"TEST: Recherche répétée servie par le cache -> ÉCHEC ({erreur})")
+finally:
+    serveur.index_annuaire.rechercher_filtres = rechercher_origine
+
+serveur.Ajout_Contact({"contact": dict(contact_cache, Prenom="Hugo")}, "CacheUser")
+rep = serveur.Recherche_Contact(requete, "CacheUser")
+prenoms = [c["Prenom"] for c in rep["donnee"]]
+print(f"TEST: Nouvelle version après ajout -> {'SUCCÈS' if prenoms == ['Eva', 'Hugo'] else 'ÉCHEC'} ({prenoms})")
+# Annuaire modifié hors du serveur : la recherche répétée relit le fichier au lieu de servir l'ancien résultat
+with open(serveur.DOSSIER_ANNUAIRES / "annuaire_CacheUser.csv", "a", newline="", encoding="utf-8") as fichier:
+    csv.writer(fichier).writerow(["LEROY", "Zoe", "", "", "zoe@mail.com"])
+rep = serveur.Recherche_Contact(requete, "CacheUser")
+prenoms = [c["Prenom"] for c in rep["donnee"]]
+print(f"TEST: Modification externe du fichier vue -> {'SUCCÈS' if prenoms == ['Eva', 'Hugo', 'Zoe'] else 'ÉCHEC'} ({prenoms})")
+print(f"   -> Taille du cache : {len(serveur.CACHE_RECHERCHES)} (max {serveur.TAILLE_CACHE_RECHERCHES})")
+# Taille bornée en contacts : une recherche trop large n'est pas gardée, et le total reste sous le plafond
+serveur.CACHE_RECHERCHES.clear()
+serveur.TAILLE_CACHE["contacts"] = 0
+plafonds = (serveur.CONTACTS_PAR_RECHERCHE_MAX, serveur.CONTACTS_CACHE_MAX)
+serveur.CONTACTS_PAR_RECHERCHE_MAX, serveur.CONTACTS_CACHE_MAX = 2, 3
+serveur.Recherche_Contact(requete, "CacheUser") # 3 résultats : pas mis en cache
+trop_large_absente = not serveur.CACHE_RECHERCHES
+serveur.CONTACTS_PAR_RECHERCHE_MAX = plafonds[0]
+for prenom in ["eva", "hugo", "zoe"]:
+    serveur.Recherche_Contact({"proprietaire_cible": "CacheUser", "recherche": prenom}, "CacheUser")
+serveur.Recherche_Contact(requete, "CacheUser") # 3 résultats : les 3 recherches précédentes sont évincées
+total_cache = sum(len(resultats) for resultats in serveur.CACHE_RECHERCHES.values())
+serveur.CONTACTS_PAR_RECHERCHE_MAX, serveur.CONTACTS_CACHE_MAX = plafonds
+cas = [("Recherche trop large non mise en cache", trop_large_absente),
+       ("Total des contacts en cache plafonné", len(serveur.CACHE_RECHERCHES) == 1
+        and total_cache == serveur.TAILLE_CACHE["contacts"] == 3)]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "CacheUser"})
+
+# ==========================================
+# 18. TEST DU BALAYAGE EN COLONNES
+# ==========================================
+print("\n=== 18. TEST BALAYAGE EN COLONNES ===")
+
+serveur.Creation_Compte({"nom": "ColonneUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+for nom, prenom, email in [("DURAND", "Paul", "paul@societe.fr"), ("BLANC", "Zoe", "zoe@mail.com"), ("ROUX", "Ines", "ines@zq.fr")]:
+    serveur.Ajout_Contact({"contact": {"Nom": nom, "Prenom": prenom, "Telephone": "", "Adresse": "", "Email": email}}, "ColonneUser")
+
+# Seuil à 0 : même ce petit annuaire passe par les colonnes pour les termes courts.
+seuil_origine = serveur.index_annuaire.colonnes_annuaire.SEUIL_COLONNES
+serveur.index_annuaire.colonnes_annuaire.SEUIL_COLONNES = 0
+rep = serveur.Recherche_Contact({"proprietaire_cible": "ColonneUser", "recherche": "zo"}, "ColonneUser")
+cas = [("Terme court 'zo' cherché en colonnes", [c["Nom"] for c in rep["donnee"]] == ["BLANC"])]
+serveur.Suppression_Contact({"contact": {"Nom": "BLANC", "Prenom": "Zoe"}}, "ColonneUser")
+rep = serveur.Recherche_Contact({"proprietaire_cible": "ColonneUser", "recherche": "z", "compter": True}, "ColonneUser")
+cas.append(("Comptage après suppression (colonnes reconstruites)", rep["donnee"] == {"Total": 1}))
+serveur.index_annuaire.colonnes_annuaire.SEUIL_COLONNES = seuil_origine
+rep = serveur.Liste_Contacts({"proprietaire_cible": "ColonneUser"}, "ColonneUser")
+cas.append(("Liste des contacts depuis l'index", [c["Nom"] for c in rep["donnee"]] == ["DURAND", "ROUX"]))
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "ColonneUser"})
+
+# ==========================================
+# 19. TEST DES LISTES TRIÉES ET PAGINÉES
+# ==========================================
+print("\n=== 19. TEST LISTES TRIÉES ET PAGINÉES ===")
+
+serveur.Creation_Compte({"nom": "TriUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+for nom, prenom in [("MARTIN", "Luc"), ("bernard", "Anne"), ("MARTIN", "Alice"), ("ZOLA", "Emile"), ("Dupont", "Jean")]:
+    serveur.Ajout_Contact({"contact": {"Nom": nom, "Prenom": prenom, "Telephone": "", "Adresse": "", "Email": "a@mail.com"}}, "TriUser")
+serveur.Modification_Contact({"contact": {"Nom": "ZOLA", "Prenom": "Emile", "Telephone": "01", "Adresse": "", "Email": "z@mail.com"}}, "TriUser")
+serveur.Suppression_Contact({"contact": {"Nom": "Dupont", "Prenom": "Jean"}}, "TriUser")
+
+def noms_liste(**options):
+    rep = serveur.Liste_Contacts(dict({"proprietaire_cible": "TriUser"}, **options), "TriUser")
+    return [f"{c['Nom']} {c['Prenom']}" for c in rep.get("donnee", [])], rep
+
+noms, _ = noms_liste(tri="nom")
+cas = [("Tri par nom (insensible à la casse)", noms == ["bernard Anne", "MARTIN Alice", "MARTIN Luc", "ZOLA Emile"])]
+noms, rep = noms_liste(tri="nom", ordre="desc", page=2, taille_page=3)
+cas.append(("Ordre décroissant, page 2 de 3", noms == ["bernard Anne"] and rep["total"] == 4))
+noms, _ = noms_liste(page=1, taille_page=2)
+cas.append(("Ordre du fichier, page 1 de 2", noms == ["MARTIN Luc", "bernard Anne"]))
+_, rep = noms_liste(tri="age")
+cas.append(("Tri inconnu (400)", rep["status"] == 400))
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "TriUser"})
+
+# ==========================================
+# 20. TEST DU REGISTRE DES ACTIONS
+# ==========================================
+print("\n=== 20. TEST REGISTRE DES ACTIONS ===")
+
+serveur.Creation_Compte({"nom": "ChefTest", "mot_de_passe": "hash123", "statut": "administrateur"})
+serveur.Creation_Compte({"nom": "SimpleTest", "mot_de_passe": "hash123", "statut": "utilisateur"})
+cas = [
+    ("Action inconnue refusée (400)", serveur.recevoir_pdu({"action": "DANSE", "demandeur": "SimpleTest"})["status"] == 400),
+    ("INFOS_ADMIN refusé à un utilisateur (403)",
+     serveur.recevoir_pdu({"action": "INFOS_ADMIN", "jeton": jeton_test("SimpleTest"), "corps": {}})["status"] == 403),
+    ("INFOS_ADMIN accepté pour un administrateur",
+     serveur.recevoir_pdu({"action": "INFOS_ADMIN", "jeton": jeton_test("ChefTest"), "corps": {}})["status"] == 200),
+    ("AJOUT_CONTACT sans 'contact' refusé par le schéma (400)",
+     serveur.recevoir_pdu({"action": "AJOUT_CONTACT", "jeton": jeton_test("SimpleTest"), "corps": {}})["status"] == 400),
+]
+
+# Nouvelle action + middleware propre, sans toucher au routeur
+appels = []
+def compter_appels(entree_action, corps, demandeur, suivant):
+    appels.append(entree_action["nom"])
+    return suivant(corps, demandeur)
+serveur.enregistrer_action("PING", lambda corps, demandeur: {"status": 200, "message": "pong"}, middlewares=[compter_appels])
+rep = serveur.recevoir_pdu({"action": "PING", "jeton": jeton_test("SimpleTest"), "corps": {}})
+cas.append(("Action ajoutée au registre + middleware", rep["message"] == "pong" and appels == ["PING"]))
+del serveur.ACTIONS["PING"]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print("-" * 50)
+serveur.Suppression_Compte({"nom_compte": "ChefTest"})
+serveur.Suppression_Compte({"nom_compte": "SimpleTest"})
+
+# ==========================================
+# 21. TEST DE L'ORDONNANCEUR (LECTEURS / ÉCRIVAINS)
+# ==========================================
+print("\n=== 21. TEST ORDONNANCEUR ===")
+
+journal = []
+verrou_journal = threading.Lock()
+def traiter_factice(requete):
+    nom, duree = requete
+    with verrou_journal:
+        journal.append(("debut", nom))
+    time.sleep(duree)
+    with verrou_journal:
+        journal.append(("fin", nom))
+    return {"status": 200, "message": nom}
+def classer_factice(requete):
+    nom = requete[0]
+    if nom.startswith("ecriture_b"):
+        return (False, "annuaire_B")
+    return (False, "annuaire_A") if nom.startswith("ecriture") else (True, None)
+reponses = []
+ordo = ordonnanceur.creer_ordonnanceur(traiter_factice, classer_factice,
+                                       lambda requete, reponse: reponses.append(reponse["message"]), nb_threads=8)
+
+debut = time.perf_counter()
+for i in range(8):
+    ordonnanceur.soumettre(ordo, f"client{i}", (f"lecture{i}", 0.2))
+ordonnanceur.arreter(ordo)
+duree = time.perf_counter() - debut
+print(f"TEST: 8 lectures de 0.2 s en parallèle ({duree:.2f} s) -> {'SUCCÈS' if duree < 0.8 else 'ÉCHEC'}")
+
+journal.clear()
+ordo = ordonnanceur.creer_ordonnanceur(traiter_factice, classer_factice, lambda requete, reponse: None, nb_threads=8)
+for i in range(4):
+    ordonnanceur.soumettre(ordo, f"client{i}", (f"ecriture{i}", 0.02))
+ordonnanceur.soumettre(ordo, "client9", ("lecture_lente", 0.1))
+ordonnanceur.soumettre(ordo, "client9", ("lecture_rapide", 0.0))
+ordonnanceur.arreter(ordo)
+ecritures = [evenement for evenement in journal if evenement[1].startswith("ecriture")]
+sans_chevauchement = all(ecritures[i][0] == "debut" and ecritures[i + 1] == ("fin", ecritures[i][1])
+                         for i in range(0, len(ecritures), 2))
+print(f"TEST: Écritures d'une même ressource une par une -> {'SUCCÈS' if sans_chevauchement else 'ÉCHEC'}")
+ordre_client = journal.index(("fin", "lecture_lente")) < journal.index(("debut", "lecture_rapide"))
+print(f"TEST: Requêtes d'un même client dans l'ordre -> {'SUCCÈS' if ordre_client else 'ÉCHEC'}")
+# Ressources différentes : chacune sa file, mais jamais deux écritures en même temps (verrou global)
+journal.clear()
+ordo = ordonnanceur.creer_ordonnanceur(traiter_factice, classer_factice, lambda requete, reponse: None, nb_threads=8)
+for i in range(3):
+    ordonnanceur.soumettre(ordo, f"clientA{i}", (f"ecriture{i}", 0.02))
+    ordonnanceur.soumettre(ordo, f"clientB{i}", (f"ecriture_b{i}", 0.02))
+ordonnanceur.arreter(ordo)
+alternance = all(journal[i][0] == "debut" and journal[i + 1] == ("fin", journal[i][1]) for i in range(0, len(journal), 2))
+print(f"TEST: Écritures de ressources différentes une par une -> {'SUCCÈS' if alternance and len(journal) == 12 else 'ÉCHEC'}")
+print("-" * 50)
+
+# ==========================================
+# 22. TEST DU JOURNAL EN ARRIÈRE-PLAN
+# ==========================================
+print("\n=== 22. TEST JOURNAL EN ARRIÈRE-PLAN ===")
+
+fichier_journal = dossier_test / "journal" / "requetes.jsonl"
+journal_serveur.demarrer_journal(fichier_journal, console=False, taille_max=2000, nb_archives=2)
+debut = time.perf_counter()
+for i in range(100):
+    serveur.recevoir_pdu({"action": "LISTE_GROUPES", "jeton": jeton_test(f"journal{i}"), "corps": {}})
+duree = time.perf_counter() - debut
+journal_serveur.arreter_journal()
+
+archive = fichier_journal.with_name("requetes.jsonl.1")
+lignes = archive.read_text(encoding="utf-8").splitlines() + fichier_journal.read_text(encoding="utf-8").splitlines()
+enregistrements = [json.loads(ligne) for ligne in lignes]
+cas = [
+    ("Lignes JSON lisibles (action, utilisateur, status)",
+     all({"action", "utilisateur", "status"} <= set(e) for e in enregistrements if "perdus" not in e)),
+    ("Rotation du fichier au-delà de la taille maximale", archive.exists() and fichier_journal.stat().st_size <= 2000 + 500),
+    ("Dernière requête bien écrite", any(e.get("utilisateur") == "journal99" for e in enregistrements)),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print(f"   -> 100 requêtes journalisées en {duree * 1000:.1f} ms")
+print("-" * 50)
+
+# ==========================================
+# 23. TEST DES MÉTRIQUES
+# ==========================================
+print("\n=== 23. TEST MÉTRIQUES ===")
+
+serveur.Creation_Compte({"nom": "MesureAdmin", "mot_de_passe": "hash123", "statut": "administrateur"})
+serveur.Creation_Compte({"nom": "MesureUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+metriques.remettre_a_zero()
+for i in range(20):
+    serveur.recevoir_pdu({"action": "LISTE_GROUPES", "jeton": jeton_test("MesureAdmin"), "corps": {}})
+serveur.recevoir_pdu({"action": "AJOUT_CONTACT", "jeton": jeton_test("MesureAdmin"), "corps": {}})
+serveur.recevoir_pdu({"action": "ACTION_FANTAISIE_42", "jeton": jeton_test("MesureAdmin"), "corps": {}})
+reponse = serveur.recevoir_pdu({"action": "METRIQUES", "jeton": jeton_test("MesureAdmin"), "corps": {}})
+resume = {ligne["Action"]: ligne for ligne in reponse.get("donnee", [])}
+groupes = resume.get("LISTE_GROUPES", {})
+prometheus = serveur.recevoir_pdu({"action": "METRIQUES", "jeton": jeton_test("MesureAdmin"), "corps": {"format": "prometheus"}})
+metriques.remettre_a_zero()
+for duree in [0.001] * 90 + [0.2] * 10:
+    metriques.enregistrer("TEST", 200, duree)
+test = metriques.resume()[0]
+cas = [
+    ("METRIQUES refusé à un utilisateur (403)",
+     serveur.recevoir_pdu({"action": "METRIQUES", "jeton": jeton_test("MesureUser"), "corps": {}})["status"] == 403),
+    ("20 LISTE_GROUPES comptées, sans erreur", groupes.get("Nombre") == 20 and groupes.get("Erreurs") == 0),
+    ("Erreur 400 comptée par status", resume.get("AJOUT_CONTACT", {}).get("Status") == {"400": 1}),
+    ("Actions inconnues regroupées", "INCONNUE" in resume and "ACTION_FANTAISIE_42" not in resume),
+    ("Centiles ordonnés (p50 <= p95 <= p99)", groupes.get("p50_ms", 1) <= groupes.get("p95_ms", 0) <= groupes.get("p99_ms", 0)),
+    ("Centiles estimés depuis l'histogramme", test["p50_ms"] <= 1.0 and 100 <= test["p95_ms"] <= 250),
+    ("Export Prometheus", prometheus["status"] == 200 and
+     'annuaire_duree_requete_secondes_count{action="LISTE_GROUPES"} 20' in prometheus["donnee"] and
+     'annuaire_requetes_total{action="AJOUT_CONTACT",status="400"} 1' in prometheus["donnee"]),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+serveur.Suppression_Compte({"nom_compte": "MesureAdmin"})
+serveur.Suppression_Compte({"nom_compte": "MesureUser"})
+print("-" * 50)
+
+# ==========================================
+# 24. TEST DU PROFILAGE À LA DEMANDE
+# ==========================================
+print("\n=== 24. TEST PROFILAGE À LA DEMANDE ===")
+
+serveur.Creation_Compte({"nom": "ProfilAdmin", "mot_de_passe": "hash123", "statut": "administrateur"})
+def profilage_pdu(corps):
+    return serveur.recevoir_pdu({"action": "PROFILAGE", "jeton": jeton_test("ProfilAdmin"), "corps": corps})
+
+demarrage = profilage_pdu({"type": "demarrer", "outil": "cprofile", "nb_requetes": 3, "top": 10})
+deuxieme = profilage_pdu({"type": "demarrer", "outil": "tracemalloc", "duree": 10})
+for i in range(4):
+    serveur.recevoir_pdu({"action": "LISTE_COMPTES", "jeton": jeton_test("ProfilAdmin"), "corps": {}})
+resultat_temps = profilage_pdu({"type": "etat"})["donnee"]
+
+profilage_pdu({"type": "demarrer", "outil": "tracemalloc", "duree": 30})
+for i in range(3):
+    serveur.recevoir_pdu({"action": "LISTE_GROUPES", "jeton": jeton_test("ProfilAdmin"), "corps": {}})
+arret = profilage_pdu({"type": "arreter"})["donnee"]
+resultat_memoire = arret["Resultat"]
+
+# Deux lectures profilées en même temps (threads du pool) : aucune ne doit échouer
+profilage_pdu({"type": "demarrer", "outil": "cprofile", "nb_requetes": 2})
+rendez_vous = threading.Barrier(2, timeout=5)
+simultanees = []
+def lecture_profilee():
+    def lire():
+        rendez_vous.wait()
+        return serveur.Liste_Comptes()
+    try:
+        simultanees.append(serveur.profilage.executer(lire)["status"])
+    except Exception as erreur:
+        simultanees.append(repr(erreur))
+fils = [threading.Thread(target=lecture_profilee) for _ in range(2)]
+for fil in fils:
+    fil.start()
+for fil in fils:
+    fil.join()
+resultat_simultane = profilage_pdu({"type": "arreter"})["donnee"]["Resultat"]
+cas = [
+    ("PROFILAGE refusé à un utilisateur (403)",
+     serveur.recevoir_pdu({"action": "PROFILAGE", "jeton": jeton_test("Inconnu"), "corps": {}})["status"] == 403),
+    ("Limite invalide refusée (400)", profilage_pdu({"type": "demarrer", "nb_requetes": -1})["status"] == 400),
+    ("Limite booléenne refusée (400)", profilage_pdu({"type": "demarrer", "top": True})["status"] == 400),
+    ("Démarrage puis second profilage refusé (409)", demarrage["status"] == 200 and deuxieme["status"] == 409),
+    ("Session terminée après 3 requêtes", resultat_temps["En_cours"] is None and resultat_temps["Resultat"]["Nb_Requetes"] == 3),
+    ("Fichier .pstats écrit", all(Path(f).exists() and f.endswith(".pstats") for f in resultat_temps["Resultat"]["Fichiers"])),
+    ("Top 10 des fonctions, Liste_Comptes dans le profil", len(resultat_temps["Resultat"]["Top"]) == 10 and
+     any(fonction == "Liste_Comptes" for _, _, fonction in pstats.Stats(resultat_temps["Resultat"]["Fichiers"][0]).stats)),
+    ("tracemalloc arrêté à la demande, instantanés écrits", arret["En_cours"] is None and
+     resultat_memoire["Outil"] == "tracemalloc" and len(resultat_memoire["Fichiers"]) == 2 and
+     all(Path(f).exists() for f in resultat_memoire["Fichiers"])),
+    ("Deux lectures profilées simultanées réussies", simultanees == [200, 200]
+     and all(Path(f).exists() for f in resultat_simultane["Fichiers"])),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+serveur.Suppression_Compte({"nom_compte": "ProfilAdmin"})
+print("-" * 50)
+
+# ==========================================
+# 25. TEST DU COMPTAGE DES ENTRÉES/SORTIES
+# ==========================================
+print("\n=== 25. TEST COMPTAGE ENTRÉES/SORTIES ===")
+
+serveur.Creation_Compte({"nom": "EsAdmin", "mot_de_passe": "hash123", "statut": "administrateur"})
+metriques.remettre_a_zero()
+for i in range(3):
+    serveur.recevoir_pdu({"action": "AJOUT_CONTACT", "jeton": jeton_test("EsAdmin"),
+                          "corps": {"contact": {"Nom": f"ES{i}", "Prenom": "Test", "Email": f"es{i}@test.fr"}}})
+serveur.recevoir_pdu({"action": "INFOS_ADMIN", "jeton": jeton_test("EsAdmin"), "corps": {}})
+serveur.index_annuaire.oublier(serveur.DOSSIER_ANNUAIRES / "annuaire_EsAdmin.csv")
+serveur.recevoir_pdu({"action": "RECHERCHE_GLOBALE", "jeton": jeton_test("EsAdmin"), "corps": {"recherche": "es"}})
+resume = {ligne["Action"]: ligne for ligne in metriques.resume()}
+nb_comptes = len(serveur.index_comptes()["statuts"])
+
+mesure_es.debut()
+with mesure_es.ouvrir(dossier_test / "es.txt", "w", encoding="utf-8") as f:
+    f.write("é" * 100)
+with mesure_es.ouvrir(dossier_test / "es.txt", "r", encoding="utf-8") as f:
+    f.read()
+compteurs = mesure_es.fin()
+# Création par lot : lecture de comptes.csv, annuaire vide, ajout dans comptes.csv (tout passe par ouvrir)
+mesure_es.debut()
+serveur.Creation_Comptes_Lot({"comptes": [{"nom": "EsLot", "mot_de_passe": "hash123"}]})
+compteurs_lot = mesure_es.fin()
+cas = [
+    ("Octets comptés en octets (et non en caractères)", compteurs == {"fichiers": 2, "octets_lus": 200, "octets_ecrits": 200, "fsync": 0}),
+    ("CREATION_COMPTES_LOT : annuaire créé compté", compteurs_lot["fichiers"] == 3
+     and compteurs_lot["octets_ecrits"] > len(",".join(serveur.CHAMPS_CONTACT))),
+    ("AJOUT_CONTACT : écritures comptées", resume["AJOUT_CONTACT"]["ES"]["octets_ecrits"] > 0 and
+     resume["AJOUT_CONTACT"]["ES_par_requete"]["fichiers"] >= 1),
+    ("INFOS_ADMIN : un fichier ouvert par annuaire", resume["INFOS_ADMIN"]["ES"]["fichiers"] >= nb_comptes + 1),
+    ("RECHERCHE_GLOBALE : lectures du pool rattachées à la requête", resume["RECHERCHE_GLOBALE"]["ES"]["octets_lus"] > 0),
+    ("Export Prometheus des entrées/sorties",
+     'annuaire_entrees_sorties_total{action="INFOS_ADMIN",type="fichiers"}' in metriques.texte_prometheus()),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print(f"   -> INFOS_ADMIN : {resume['INFOS_ADMIN']['ES']}")
+for nom in ["EsAdmin", "EsLot"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+print("-" * 50)
+
+# ==========================================
+# 26. TEST DU JOURNAL DES REQUÊTES LENTES
+# ==========================================
+print("\n=== 26. TEST JOURNAL DES REQUÊTES LENTES ===")
+
+fichier_lent = dossier_test / "journal" / "requetes_lentes.jsonl"
+dossier_reponses = serveur.reseau.DOSSIER_REPONSES
+serveur.reseau.DOSSIER_REPONSES = dossier_test / "reponses"
+serveur.reseau.DOSSIER_REPONSES.mkdir(exist_ok=True)
+serveur.Creation_Compte({"nom": "LentAdmin", "mot_de_passe": "hash123", "statut": "administrateur"})
+
+def deposer(numero, requete):
+    soumis = time.perf_counter()
+    depot = {"id": f"lent{numero}", "requete": requete, "debut": soumis - 0.001, "lecture": 0.001, "soumis": soumis,
+             "horodatages": {"recu": time.time()}}
+    serveur.repondre_depot(depot, serveur.traiter_depot(depot), fichier_lent)
+    return json.loads((serveur.reseau.DOSSIER_REPONSES / f"lent{numero}.json").read_text(encoding="utf-8"))
+
+seuil_origine = serveur.SEUIL_REQUETE_LENTE
+serveur.SEUIL_REQUETE_LENTE = 60
+rapide = deposer(0, {"action": "LISTE_GROUPES", "jeton": jeton_test("LentAdmin"), "corps": {}})
+aucune_ligne = not fichier_lent.exists()
+serveur.SEUIL_REQUETE_LENTE = 0
+deposer(1, {"action": "INFOS_ADMIN", "jeton": jeton_test("LentAdmin"), "client": "c1", "corps": {}})
+deposer(2, {"action": "MODIF_COMPTE", "jeton": jeton_test("LentAdmin"),
+            "corps": {"nom_compte": "Personne", "nouveau_mdp": "secret", "nouveau_statut": None}})
+deposer(3, {"action": "CREATION_COMPTES_LOT", "jeton": jeton_test("LentAdmin"),
+            "corps": {"comptes": [{"nom": "LentX", "mot_de_passe": "secret2", "statut": "utilisateur"}]}})
+serveur.SEUIL_REQUETE_LENTE = seuil_origine
+lentes = [json.loads(ligne) for ligne in fichier_lent.read_text(encoding="utf-8").splitlines()]
+infos = lentes[0]
+phases_attendues = {"lecture_requete", "attente", "controle_droits", "stockage", "traitement", "serialisation", "ecriture_reponse"}
+
+# Phases imbriquées : le temps n'est compté qu'une fois
+requetes_lentes.debut()
+with requetes_lentes.phase("traitement"):
+    with requetes_lentes.phase("stockage"):
+        time.sleep(0.05)
+phases = requetes_lentes.fin()
+cas = [
+    ("Requête sous le seuil non journalisée", rapide["status"] == 200 and aucune_ligne),
+    ("Requêtes au-dessus du seuil journalisées", len(lentes) == 3 and infos["action"] == "INFOS_ADMIN" and infos["client"] == "c1"),
+    ("Détail des phases", phases_attendues <= set(infos["phases_ms"]) and infos["taille_corps"] == 2),
+    ("Somme des phases <= durée totale", sum(infos["phases_ms"].values()) <= infos["duree_ms"] + 0.01),
+    ("Phases imbriquées exclusives", phases["stockage"] >= 0.05 and phases["traitement"] < 0.01),
+    ("Mot de passe masqué (nouveau_mdp)", lentes[1]["corps"]["nouveau_mdp"] == "***" and "secret" not in json.dumps(lentes[1])),
+    ("Mot de passe masqué dans un lot", lentes[2]["corps"]["comptes"][0]["mot_de_passe"] == "***"
+     and lentes[2]["corps"]["comptes"][0]["nom"] == "LentX"),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print(f"   -> INFOS_ADMIN : {infos['phases_ms']}")
+serveur.Suppression_Compte({"nom_compte": "LentX"})
+serveur.Suppression_Compte({"nom_compte": "LentAdmin"})
+serveur.reseau.DOSSIER_REPONSES = dossier_reponses
+print("-" * 50)
+
+# ==========================================
+# 27. TEST DU TRAÇAGE CLIENT / SERVEUR
+# ==========================================
+print("\n=== 27. TEST TRAÇAGE CLIENT / SERVEUR ===")
+
+dossier_reponses = serveur.reseau.DOSSIER_REPONSES
+serveur.reseau.DOSSIER_REPONSES = dossier_test / "reponses"
+serveur.reseau.DOSSIER_REPONSES.mkdir(exist_ok=True)
+fichier_journal = dossier_test / "journal" / "trace.jsonl"
+journal_serveur.demarrer_journal(fichier_journal, console=False)
+envoi = time.time()
+soumis = time.perf_counter()
+depot = {"id": "trace1", "requete": {"action": "LISTE_GROUPES", "jeton": jeton_test("x"), "trace": "abc123", "corps": {}},
+         "debut": soumis, "lecture": 0.0, "soumis": soumis, "horodatages": {"recu": time.time()}}
+serveur.repondre_depot(depot, serveur.traiter_depot(depot), dossier_test / "journal" / "lentes_trace.jsonl")
+reponse = json.loads((serveur.reseau.DOSSIER_REPONSES / "trace1.json").read_text(encoding="utf-8"))
+reception = time.time()
+journal_serveur.arreter_journal()
+enregistrements = [json.loads(ligne) for ligne in fichier_journal.read_text(encoding="utf-8").splitlines()]
+serveur.reseau.DOSSIER_REPONSES = dossier_reponses
+
+trace = reponse.get("trace", {})
+duree = serveur.reseau.decomposer_latence(100.0, 100.5, {"recu": 100.1, "debut": 100.15, "fin": 100.35})
+cas = [
+    ("Identifiant de trace renvoyé dans la réponse", trace.get("id") == "abc123"),
+    ("Horodatages serveur ordonnés", envoi <= trace.get("recu", 0) <= trace.get("debut", 0) <= trace.get("fin", 0) <= reception),
+    ("Trace écrite dans le journal du serveur", any(e.get("trace") == "abc123" for e in enregistrements)),
+    ("Décomposition de la latence", duree == {"total": 500.0, "aller": 100.0, "file": 50.0, "traitement": 200.0, "retour": 150.0}),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print("-" * 50)
+
+# ==========================================
+# 28. TEST DU CONTRÔLE D'ADMISSION ET DE L'ÉQUITÉ
+# ==========================================
+print("\n=== 28. TEST CONTRÔLE D'ADMISSION ET ÉQUITÉ ===")
+
+feu_vert = threading.Event()
+ordre = []
+def traiter_bloquant(requete):
+    if requete[1] == "bloque":
+        feu_vert.wait(5)
+    ordre.append(requete[1])
+    return {"status": 200, "message": "ok"}
+
+# File limitée à 3 requêtes, 2 par utilisateur (requete = (utilisateur, nom))
+ordo = ordonnanceur.creer_ordonnanceur(traiter_bloquant, lambda requete: (True, None), lambda requete, reponse: None,
+                                       nb_threads=1, utilisateur=lambda requete: requete[0], taille_max=3,
+                                       max_par_utilisateur=2)
+admises = [ordonnanceur.soumettre(ordo, "c0", ("A", "bloque")), ordonnanceur.soumettre(ordo, "c1", ("A", "a1"))]
+refus_utilisateur = ordonnanceur.soumettre(ordo, "c2", ("A", "a2"))
+admises.append(ordonnanceur.soumettre(ordo, "c3", ("B", "b1")))
+refus_total = ordonnanceur.soumettre(ordo, "c4", ("C", "c1"))
+delai = ordonnanceur.delai_conseille(ordo)
+feu_vert.set()
+ordonnanceur.arreter(ordo)
+
+# Équité : un seul thread, A envoie une rafale de 5 requêtes, puis B une seule
+feu_vert.clear()
+ordre.clear()
+ordo = ordonnanceur.creer_ordonnanceur(traiter_bloquant, lambda requete: (True, None), lambda requete, reponse: None,
+                                       nb_threads=1, utilisateur=lambda requete: requete[0])
+ordonnanceur.soumettre(ordo, "z", ("Z", "bloque"))
+for i in range(5):
+    ordonnanceur.soumettre(ordo, f"a{i}", ("A", f"a{i}"))
+ordonnanceur.soumettre(ordo, "b", ("B", "b"))
+feu_vert.set()
+ordonnanceur.arreter(ordo)
+
+# Réponse 503 immédiate du serveur
+dossier_reponses = serveur.reseau.DOSSIER_REPONSES
+serveur.reseau.DOSSIER_REPONSES = dossier_test / "reponses"
+serveur.reseau.DOSSIER_REPONSES.mkdir(exist_ok=True)
+soumis = time.perf_counter()
+depot = {"id": "surcharge", "requete": {"action": "INFOS_ADMIN", "demandeur": "x", "corps": {}}, "debut": soumis,
+         "lecture": 0.0, "soumis": soumis, "horodatages": {"recu": time.time()}}
+serveur.refuser_surcharge(depot, 1.5, dossier_test / "journal" / "lentes_surcharge.jsonl")
+refus = json.loads((serveur.reseau.DOSSIER_REPONSES / "surcharge.json").read_text(encoding="utf-8"))
+serveur.reseau.DOSSIER_REPONSES = dossier_reponses
+cas = [
+    ("Requêtes admises sous les limites", all(admises)),
+    ("Refus au-delà de la limite par utilisateur", refus_utilisateur is False),
+    ("Refus quand la file est pleine", refus_total is False),
+    ("Délai conseillé borné", ordonnanceur.DELAI_MIN <= delai <= ordonnanceur.DELAI_MAX),
+    ("Tourniquet : B passe avant la fin de la rafale de A", ordre.index("b") == 2),
+    ("Réponse 503 avec délai conseillé", refus["status"] == 503 and refus["reessayer_dans"] == 1.5),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+print(f"   -> ordre de traitement : {ordre}")
+print("-" * 50)
+
+# ==========================================
+# 29. TEST DES ÉCHÉANCES CLIENT
+# ==========================================
+print("\n=== 29. TEST ÉCHÉANCES CLIENT ===")
+
+# Requête expirée : abandonnée sans être exécutée (elle aurait réussi dans les temps)
+serveur.Creation_Compte({"nom": "EcheanceAdmin", "mot_de_passe": "hash123", "statut": "administrateur"})
+expiree = serveur.recevoir_pdu({"action": "CREATION_COMPTE", "jeton": jeton_test("EcheanceAdmin"), "echeance": time.time() - 1,
+                                "corps": {"nom": "EcheanceX", "mot_de_passe": "hash123", "statut": "utilisateur"}})
+compte_cree = "EcheanceX" in serveur.Liste_Comptes()["donnee"]
+valide = serveur.recevoir_pdu({"action": "LISTE_GROUPES", "jeton": jeton_test("x"), "echeance": time.time() + 10, "corps": {}})
+
+# Échéance vérifiée entre deux étapes d'une opération longue (un compte à la fois)
+serveur.CONTEXTE_REQUETE.echeance = time.time() - 1
+infos = serveur.Infos_Admin()
+serveur.CONTEXTE_REQUETE.echeance = None
+
+# Aucune réponse écrite pour un client qui n'attend plus
+dossier_reponses = serveur.reseau.DOSSIER_REPONSES
+serveur.reseau.DOSSIER_REPONSES = dossier_test / "reponses"
+serveur.reseau.DOSSIER_REPONSES.mkdir(exist_ok=True)
+soumis = time.perf_counter()
+depot = {"id": "echeance1", "requete": {"action": "LISTE_GROUPES", "jeton": jeton_test("x"), "echeance": time.time() - 1,
+                                        "corps": {}},
+         "debut": soumis, "lecture": 0.0, "soumis": soumis, "horodatages": {"recu": time.time()}}
+serveur.repondre_depot(depot, serveur.traiter_depot(depot), dossier_test / "journal" / "lentes_echeance.jsonl")
+fichier_orphelin = (serveur.reseau.DOSSIER_REPONSES / "echeance1.json").exists()
+serveur.reseau.DOSSIER_REPONSES = dossier_reponses
+cas = [
+    ("Requête expirée abandonnée (504)", expiree["status"] == 504),
+    ("Requête expirée non exécutée", not compte_cree),
+    ("Requête dans les temps traitée", valide["status"] == 200),
+    ("Échéance vérifiée entre les étapes d'INFOS_ADMIN", infos["status"] == 504),
+    ("Pas de réponse écrite après l'échéance", not fichier_orphelin),
+    ("Échéance invalide ignorée", serveur.echeance_requete({"echeance": "demain"}) is None
+     and not serveur.echeance_depassee({"echeance": True})),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+serveur.Suppression_Compte({"nom_compte": "EcheanceAdmin"})
+print("-" * 50)
+
+# ==========================================
+# 30. TEST DES JETONS DE SESSION
+# ==========================================
+print("\n=== 30. TEST JETONS DE SESSION ===")
+
+serveur.Creation_Compte({"nom": "SessionAdmin", "mot_de_passe": "hash123", "statut": "administrateur"})
+serveur.Creation_Compte({"nom": "SessionUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+def connexion(nom):
+    return serveur.recevoir_pdu({"action": "CONNEXION", "corps": {"nom": nom, "mdp": "hash123"}})
+def envoyer(action, jeton, corps=None, demandeur=None):
+    return serveur.recevoir_pdu({"action": action, "demandeur": demandeur, "jeton": jeton, "corps": corps or {}})
+
+jeton_admin = connexion("SessionAdmin").get("jeton")
+jeton_user = connexion("SessionUser").get("jeton")
+admin_ok = envoyer("INFOS_ADMIN", jeton_admin)["status"] == 200
+usurpation = envoyer("INFOS_ADMIN", jeton_user, demandeur="SessionAdmin")["status"]
+sans_jeton = envoyer("LISTE_GROUPES", None, demandeur="SessionUser")["status"]
+jeton_inconnu = envoyer("LISTE_GROUPES", "0123456789abcdef")["status"]
+proprio_autre = envoyer("LISTE_PROPRIO", jeton_user, {"compte": "SessionAdmin"})["status"]
+proprio_admin = envoyer("LISTE_PROPRIO", jeton_admin, {"compte": "SessionUser"})
+
+# Le rôle vient de la session : aucune lecture de comptes.csv pour une action admin
+metriques.remettre_a_zero()
+serveur.invalider_index_comptes()
+envoyer("METRIQUES", jeton_admin)
+es_admin = metriques.METRIQUES["METRIQUES"]["es"]["fichiers"]
+
+# Expiration, déconnexion, et fermeture des sessions d'un compte modifié
+jeton_expire = connexion("SessionUser")["jeton"]
+serveur.SESSIONS[jeton_expire]["expire"] = time.time() - 1
+expire = envoyer("LISTE_GROUPES", jeton_expire)["status"]
+deconnexion = envoyer("DECONNEXION", jeton_user)["status"]
+apres_deconnexion = envoyer("LISTE_GROUPES", jeton_user)["status"]
+serveur.Modification_Compte({"nom_compte": "SessionAdmin", "nouveau_statut": "utilisateur"})
+apres_modification = envoyer("INFOS_ADMIN", jeton_admin)["status"]
+
+# Multi-processus : une session ouverte par un autre processus est retrouvée par son fichier
+serveur.MULTI_PROCESSUS = True
+jeton_partage = serveur.ouvrir_session("SessionUser", "utilisateur")
+serveur.SESSIONS.pop(jeton_partage) # Vue d'un autre processus : table vide
+retrouvee = serveur.session_valide(jeton_partage)
+jeton_visible = (serveur.DOSSIER_SESSIONS / f"{jeton_partage}.json").exists() or any(
+    jeton_partage in fichier.read_text(encoding="utf-8") or jeton_partage in fichier.name
+    for fichier in serveur.DOSSIER_SESSIONS.glob("*.json"))
+serveur.fichier_session(jeton_partage).unlink() # Fermée par un autre processus
+fermee_ailleurs = serveur.session_valide(jeton_partage)
+serveur.MULTI_PROCESSUS = False
+# Fichiers d'échange (requêtes avec le jeton, réponses) lisibles par leur seul propriétaire,
+# même si un reste d'écriture interrompue existe déjà avec d'autres droits
+fichier_echange = dossier_test / "echange.json"
+(dossier_test / ".echange.json.tmp").write_text("", encoding="utf-8")
+os.chmod(dossier_test / ".echange.json.tmp", 0o644)
+serveur.reseau.ecrire_json(fichier_echange, {"jeton": jeton_partage})
+droits_echange = fichier_echange.stat().st_mode & 0o777
+
+# Requête déposée : le jeton n'est résolu qu'une fois (équité, ressource, traitement), et le journal
+# des requêtes lentes garde le nom de la session, pas celui annoncé par le client
+jeton_depot = connexion("SessionUser")["jeton"]
+resolutions = []
+session_valide = serveur.session_valide
+serveur.session_valide = lambda jeton: resolutions.append(jeton) or session_valide(jeton)
+soumis = time.perf_counter()
+depot = {"id": "session1", "requete": {"action": "AJOUT_CONTACT", "demandeur": "Usurpateur", "jeton": jeton_depot,
+                                       "corps": {"contact": {"Nom": "S1", "Prenom": "Test", "Email": "s1@test.fr"}}},
+         "debut": soumis, "lecture": 0.0, "soumis": soumis, "horodatages": {"recu": time.time()}}
+serveur.demandeur_depot(depot) # Équité de l'ordonnanceur
+_, ressource_depot = serveur.classer_requete(depot["requete"], serveur.demandeur_depot(depot))
+dossier_reponses = serveur.reseau.DOSSIER_REPONSES
+serveur.reseau.DOSSIER_REPONSES = dossier_test / "reponses"
+serveur.reseau.DOSSIER_REPONSES.mkdir(exist_ok=True)
+seuil = serveur.SEUIL_REQUETE_LENTE
+serveur.SEUIL_REQUETE_LENTE = 0
+fichier_lent_session = dossier_test / "journal" / "lentes_session.jsonl"
+serveur.repondre_depot(depot, serveur.traiter_depot(depot), fichier_lent_session)
+serveur.session_valide = session_valide
+serveur.SEUIL_REQUETE_LENTE = seuil
+lent_session = json.loads(fichier_lent_session.read_text(encoding="utf-8").splitlines()[0])
+
+# Session fermée pendant que la requête attendait dans la file
+soumis = time.perf_counter()
+depot = {"id": "session2", "requete": {"action": "LISTE_GROUPES", "jeton": jeton_depot, "corps": {}},
+         "debut": soumis, "lecture": 0.0, "soumis": soumis, "horodatages": {"recu": time.time()},
+         "session": serveur.session_valide(jeton_depot)}
+serveur.fermer_session(jeton_depot)
+fermee_en_attente = serveur.traiter_depot(depot)["status"]
+requetes_lentes.fin()
+serveur.reseau.DOSSIER_REPONSES = dossier_reponses
+cas = [
+    ("CONNEXION renvoie un jeton", bool(jeton_admin) and bool(jeton_user) and jeton_admin != jeton_user),
+    ("Action admin acceptée avec une session administrateur", admin_ok),
+    ("Demandeur usurpé ignoré (403)", usurpation == 403),
+    ("Requête sans jeton ou avec un jeton inconnu refusée (401)", sans_jeton == 401 and jeton_inconnu == 401),
+    ("Accès d'un autre compte réservé aux admins", proprio_autre == 403 and proprio_admin["status"] == 200),
+    ("Rôle admin vérifié sans relire comptes.csv", es_admin == 0),
+    ("Session expirée refusée (401)", expire == 401 and jeton_expire not in serveur.SESSIONS),
+    ("Déconnexion : jeton refusé ensuite", deconnexion == 200 and apres_deconnexion == 401),
+    ("Rôle modifié : sessions du compte fermées", apres_modification == 401),
+    ("Session partagée entre processus", retrouvee is not None and retrouvee["nom"] == "SessionUser"
+     and fermee_ailleurs is None),
+    ("Jeton absent du dossier des sessions", not jeton_visible),
+    ("Fichiers d'échange lisibles par leur seul propriétaire", os.name != "posix" or droits_echange == 0o600),
+    ("Jeton d'une requête déposée résolu une seule fois", resolutions == [jeton_depot]
+     and ressource_depot == "annuaire_SessionUser"),
+    ("Journal lent : nom de la session, pas celui annoncé", lent_session["demandeur"] == "SessionUser"),
+    ("Session fermée pendant l'attente refusée (401)", fermee_en_attente == 401),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+serveur.Suppression_Compte({"nom_compte": "SessionAdmin"})
+serveur.Suppression_Compte({"nom_compte": "SessionUser"})
+print("-" * 50)
+
+# ==========================================
+# 31. TEST DES LISTES CONDITIONNELLES (304)
+# ==========================================
+print("\n=== 31. TEST LISTES CONDITIONNELLES (304) ===")
+
+def reecrire_sans_trace(path, ancien, nouveau):
+    """Réécrit un fichier à taille égale et lui remet sa date de modification : même signature qu'avant."""
+    infos = path.stat()
+    path.write_bytes(path.read_bytes().replace(ancien.encode(), nouveau.encode()))
+    os.utime(path, ns=(infos.st_atime_ns, infos.st_mtime_ns))
+
+def ecriture_autre_processus(path):
+    """Ce qu'un autre processus laisse après avoir écrit 'path' : la génération de ce fichier incrémentée."""
+    index_annuaire.fichier_generation(path).write_text(str(index_annuaire.generation(path) + 1), encoding="utf-8")
+
+serveur.Creation_Compte({"nom": "VersionUser", "mot_de_passe": "hash123", "statut": "utilisateur"})
+serveur.Ajout_Contact({"contact": {"Nom": "V1", "Prenom": "Test", "Email": "v1@test.fr"}}, "VersionUser")
+premiere = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser"}, "VersionUser")
+version = premiere.get("version")
+inchangee = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "si_version": version}, "VersionUser")
+autre_tri = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "tri": "nom", "si_version": version}, "VersionUser")
+refus = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "si_version": version}, "Inconnu")
+serveur.Ajout_Contact({"contact": {"Nom": "V2", "Prenom": "Test", "Email": "v2@test.fr"}}, "VersionUser")
+apres_ajout = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "si_version": version}, "VersionUser")
+# Version d'un autre processus ou d'avant un redémarrage (même numéro, autre instance) : jamais prise pour la même
+numero = version.rsplit("-", 1)[1] if version else ""
+autre_instance = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "si_version": "ffffffff-" + numero},
+                                        "VersionUser")
+cas = [
+    ("Liste renvoyée avec sa version", premiere["status"] == 200 and bool(version)),
+    ("Annuaire inchangé : 304 sans liste", inchangee["status"] == 304 and "donnee" not in inchangee),
+    ("Version valable quel que soit le tri", autre_tri["status"] == 304),
+    ("Droits vérifiés avant le 304", refus["status"] == 403),
+    ("Annuaire modifié : nouvelle liste et nouvelle version", apres_ajout["status"] == 200
+     and len(apres_ajout["donnee"]) == 2 and apres_ajout["version"] != version),
+    ("Version d'une autre instance ignorée", autre_instance["status"] == 200),
+]
+# Multi-processus : la version ne dépend que du fichier (un autre processus, ou un index reconstruit, donne la même)
+index_annuaire.GENERATIONS["dossier"] = dossier_test / ".generations"
+index_annuaire.GENERATIONS["dossier"].mkdir(exist_ok=True)
+chemin_version = serveur.DOSSIER_ANNUAIRES / "annuaire_VersionUser.csv"
+version_fichier = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser"}, "VersionUser")["version"]
+index_annuaire.oublier(chemin_version) # Comme un autre processus, qui n'a pas encore chargé l'annuaire
+reconstruit = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "si_version": version_fichier}, "VersionUser")
+reecrire_sans_trace(chemin_version, "V1", "V9")
+ecriture_autre_processus(chemin_version)
+modifie = serveur.Liste_Contacts({"proprietaire_cible": "VersionUser", "si_version": version_fichier}, "VersionUser")
+index_annuaire.GENERATIONS["dossier"] = None
+cas += [
+    ("Multi-processus : même version après reconstruction de l'index", reconstruit["status"] == 304),
+    ("Multi-processus : nouvelle version après une écriture d'un autre processus",
+     modifie["status"] == 200 and modifie["version"] != version_fichier),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+serveur.Suppression_Compte({"nom_compte": "VersionUser"})
+print("-" * 50)
+
+# ==========================================
+# 32. TEST DE LA GÉNÉRATION PARTAGÉE (MULTI-PROCESSUS)
+# ==========================================
+print("\n=== 32. TEST GÉNÉRATIONS PARTAGÉES ===")
+
+serveur.MULTI_PROCESSUS = True
+index_annuaire.GENERATIONS["dossier"] = dossier_test / ".generations"
+index_annuaire.GENERATIONS["dossier"].mkdir(exist_ok=True)
+for nom in ["GenUser", "GenAutre"]:
+    serveur.Creation_Compte({"nom": nom, "mot_de_passe": "hash123", "statut": "utilisateur"})
+serveur.Ajout_Contact({"contact": {"Nom": "Aaaa", "Prenom": "Test", "Telephone": "0600000001", "Email": "a@test.fr"}},
+                      "GenUser")
+serveur.Ajout_Contact({"contact": {"Nom": "Autre", "Prenom": "Test", "Email": "x@test.fr"}}, "GenAutre")
+serveur.Gestion_Permission({"utilisateur_cible": "Lecteur1", "type": "donner"}, "GenUser")
+chemin_gen = serveur.DOSSIER_ANNUAIRES / "annuaire_GenUser.csv"
+chemin_autre = serveur.DOSSIER_ANNUAIRES / "annuaire_GenAutre.csv"
+serveur.Recherche_Contact({"proprietaire_cible": "GenUser", "recherche": "aaaa"}, "GenUser")
+serveur.Recherche_Telephone({"telephone": "0600000001"}, "GenUser")
+version_autre = index_annuaire.version_annuaire(chemin_autre)
+serveur.index_comptes()
+serveur.index_droits()
+
+# Écritures d'un autre processus à taille égale et même date : la signature ne change pas
+reecrire_sans_trace(chemin_gen, "Aaaa", "Bbbb")
+reecrire_sans_trace(chemin_gen, "0600000001", "0600000002")
+reecrire_sans_trace(serveur.FICHIER_COMPTES, "GenUser", "GenUsez")
+reecrire_sans_trace(serveur.FICHIER_PERMISSIONS, "Lecteur1", "Lecteur2")
+invisible = serveur.Recherche_Contact({"proprietaire_cible": "GenUser", "recherche": "aaaa"}, "GenUser")
+for chemin in [chemin_gen, serveur.FICHIER_COMPTES, serveur.FICHIER_PERMISSIONS]:
+    ecriture_autre_processus(chemin)
+recherche_apres = serveur.Recherche_Contact({"proprietaire_cible": "GenUser", "recherche": "bbbb"}, "GenUser")
+cache_apres = serveur.Recherche_Contact({"proprietaire_cible": "GenUser", "recherche": "aaaa"}, "GenUser")
+telephone_apres = serveur.Recherche_Telephone({"telephone": "0600000002"}, "GenUser")
+statuts_apres = serveur.index_comptes()["statuts"]
+directs_apres = serveur.index_droits()["directs"]
+serveur.Recherche_Contact({"proprietaire_cible": "GenAutre", "recherche": "autre"}, "GenAutre")
+version_autre_apres = index_annuaire.version_annuaire(chemin_autre)
+reecrire_sans_trace(serveur.FICHIER_COMPTES, "GenUsez", "GenUser")
+ecriture_autre_processus(serveur.FICHIER_COMPTES)
+
+# Écriture de ce processus : la génération du fichier avance, ses propres index restent valables (pas de rechargement)
+version_avant = index_annuaire.version_annuaire(chemin_gen)
+generation_avant = index_annuaire.generation(chemin_gen)
+generation_comptes = index_annuaire.generation(serveur.FICHIER_COMPTES)
+serveur.index_comptes()
+mesure_es.debut()
+serveur.Ajout_Contact({"contact": {"Nom": "Cccc", "Prenom": "Test", "Email": "c@test.fr"}}, "GenUser")
+version_ajout = index_annuaire.version_annuaire(chemin_gen)
+serveur.apres_ecriture()
+mesure_es.fin()
+recherche_propre = serveur.Recherche_Contact({"proprietaire_cible": "GenUser", "recherche": "cccc"}, "GenUser")
+# L'ordonnanceur appelle apres_ecriture sous le verrou exclusif seulement (pas après une lecture)
+appels = []
+ordo_gen = ordonnanceur.creer_ordonnanceur(lambda r: r, lambda r: (True, None), lambda r, rep: None, nb_threads=1,
+                                           fichier_verrou=dossier_test / ".verrou_serveur",
+                                           apres_ecriture=lambda: appels.append("ecriture"))
+with ordonnanceur.verrou_inter_processus(ordo_gen, exclusif=False):
+    pass
+with ordonnanceur.verrou_inter_processus(ordo_gen, exclusif=True):
+    pass
+ordonnanceur.arreter(ordo_gen)
+cas = [
+    ("Sans la génération, l'écriture n'est pas vue", len(invisible["donnee"]) == 1),
+    ("Génération changée : l'annuaire est rechargé", len(recherche_apres["donnee"]) == 1),
+    ("Génération changée : le cache de recherche n'est plus servi", cache_apres["donnee"] == []),
+    ("Génération changée : l'index des téléphones est relu", len(telephone_apres["donnee"]) == 1),
+    ("Génération changée : l'index des comptes est rechargé", "GenUsez" in statuts_apres and "GenUser" not in statuts_apres),
+    ("Génération changée : l'index des droits est rechargé", "Lecteur2" in directs_apres and "Lecteur1" not in directs_apres),
+    ("Un autre annuaire n'est pas rechargé", version_autre_apres == version_autre),
+    ("Écriture du processus : génération du fichier incrémentée",
+     index_annuaire.generation(chemin_gen) == generation_avant + 1
+     and index_annuaire.generation(serveur.FICHIER_COMPTES) == generation_comptes),
+    ("Écriture du processus : index gardé sans rechargement",
+     version_ajout != version_avant and index_annuaire.version_annuaire(chemin_gen) == version_ajout
+     and len(recherche_propre["donnee"]) == 1),
+    ("Ordonnanceur : apres_ecriture appelée après une écriture seulement", appels == ["ecriture"]),
+]
+for nom_test, reussi in cas:
+    print(f"TEST: {nom_test} -> {'SUCCÈS' if reussi else 'ÉCHEC'}")
+for nom in ["GenUser", "GenAutre"]:
+    serveur.Suppression_Compte({"nom_compte": nom})
+index_annuaire.GENERATIONS["dossier"] = None
+serveur.MULTI_PROCESSUS = False
+print("-" * 50)
+
 # --- NETTOYAGE FINAL ---
 print("\n--- FIN DES TESTS ---")
 # Décommenter la ligne suivante si tu veux supprimer le dossier test à la fin